@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+商店页面解析引擎微基准 - 对比 soup（完整解析）与 fast（区域解析 + 单次遍历）
+
+用法:
+    python benchmarks/bench_store_parser.py [页面文件或目录 ...] [--rounds N]
+
+默认使用 benchmarks/fixtures 下保存的商店页面（*.html），可以把真实页面另存后放入该目录。
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from platforms import steam  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+
+
+def _collect_pages(paths):
+    files = []
+    for path in paths or [FIXTURES_DIR]:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.html"))))
+        else:
+            files.append(path)
+    return files
+
+
+def _bench(engine, html, rounds):
+    extract = steam._STORE_HTML_ENGINES[engine]
+    result = extract(html)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        extract(html)
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="商店页面解析引擎微基准")
+    parser.add_argument("pages", nargs="*", help="页面文件或目录（默认 benchmarks/fixtures）")
+    parser.add_argument("--rounds", type=int, default=20, help="每个页面重复解析次数")
+    args = parser.parse_args()
+
+    files = _collect_pages(args.pages)
+    if not files:
+        print("未找到页面文件")
+        return 1
+
+    print(f"fast 引擎使用的解析器: {steam.FAST_HTML_PARSER}")
+    print(f"{'页面':<40} {'大小':>8} {'soup(ms)':>10} {'fast(ms)':>10} {'加速':>7}  结果一致")
+    mismatched = 0
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        soup_time, soup_result = _bench("soup", html, args.rounds)
+        fast_time, fast_result = _bench("fast", html, args.rounds)
+        same = soup_result == fast_result
+        mismatched += not same
+        print(f"{os.path.basename(path):<40} {len(html.encode('utf-8')) // 1024:>6}KB "
+              f"{soup_time * 1000:>10.1f} {fast_time * 1000:>10.1f} {soup_time / fast_time:>6.1f}x  {'是' if same else '否'}")
+        if not same:
+            for key in soup_result:
+                if soup_result[key] != fast_result.get(key):
+                    print(f"    {key}: soup={soup_result[key]!r} fast={fast_result.get(key)!r}")
+
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+同步流程离线基准 - 在本地模拟服务（mock_server.py）上运行 sync / add / 商店页面抓取，
+按阶段统计墙钟时间、CPU 时间、请求数、429 与重试次数
+
+用法:
+    python benchmarks/bench_sync.py [--sizes 100,1000,10000] [--latency notion=0.02,store=0.01]
+                                    [--rate notion=3] [--inject-429 notion=0.01]
+                                    [--json result.json] [--baseline baseline.json] [--tolerance 0.25]
+
+每个规模在独立的进程中运行（独立的模拟服务与缓存目录），互不影响。
+默认关闭客户端限流（模拟服务没有真实配额），--client-rate-limits 时使用 .env / 默认配置中的限流参数。
+指定 --baseline 时与之前保存的 --json 结果比较，任一阶段墙钟时间变慢超过 tolerance 时返回非零退出码。
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(ROOT), "src"))
+sys.path.insert(0, ROOT)
+
+from mock_server import add_service_arguments  # noqa: E402
+
+# 阶段耗时的噪声下限：差值小于该秒数时不视为性能回退
+MIN_REGRESSION_SECONDS = 0.5
+
+
+def _admin_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/__admin/stats", timeout=10) as response:
+        return json.loads(response.read())
+
+
+def _snapshot(base_url):
+    """当前的客户端统计与模拟服务统计"""
+    from metrics import metrics
+
+    summary = metrics.summary()
+    server = _admin_stats(base_url)
+    return {
+        "cpu": time.process_time(),
+        "wall": time.perf_counter(),
+        "requests": sum(s["count"] for name, s in summary["stages"].items() if name.startswith("http ")),
+        "retries": sum(v for name, v in summary["counters"].items() if name.startswith("http.retries")),
+        "bytes": sum(v for name, v in summary["counters"].items() if name.startswith("http.bytes")),
+        "server_requests": sum(s["requests"] for s in server.values()),
+        "throttled": sum(s["throttled"] for s in server.values()),
+    }
+
+
+def _phase(results, name, base_url, func):
+    before = _snapshot(base_url)
+    func()
+    after = _snapshot(base_url)
+    results[name] = {
+        "wall_s": round(after["wall"] - before["wall"], 3),
+        "cpu_s": round(after["cpu"] - before["cpu"], 3),
+        "requests": after["requests"] - before["requests"],
+        "server_requests": after["server_requests"] - before["server_requests"],
+        "throttled": after["throttled"] - before["throttled"],
+        "retries": after["retries"] - before["retries"],
+        "bytes": after["bytes"] - before["bytes"],
+    }
+
+
+def _cold_start(m, acct, base_url):
+    """清空模拟服务中的 Notion 数据与本地缓存，之后的阶段从空库、冷缓存开始"""
+    request = urllib.request.Request(f"{base_url}/__admin/reset", data=b"{}", method="POST",
+                                     headers={"Content-Type": "application/json"})
+    urllib.request.urlopen(request, timeout=10).close()
+    for cache in (m.store_cache, m.owned_games_cache, m.achievements_cache, m.store_status, m.page_cache):
+        cache.purge()
+    m.query_all_games_from_notion(acct, full_refresh=True)
+
+
+def run_worker(size, result_file):
+    """子进程：环境变量已指向模拟服务，依次运行各阶段并保存结果"""
+    import notion_game_list as m
+    from metrics import metrics
+    from platforms.steam import get_steam_store_info
+
+    acct = m.accounts[0]
+    base_url = os.environ["STEAM_API_BASE"]
+    appids = [100000 + i for i in range(size)]
+    results = {}
+
+    _phase(results, "sync 全量（新建页面）", base_url, lambda: m.sync_games_to_notion(acct))
+    _phase(results, "sync 全量（无变化）", base_url, lambda: m.sync_games_to_notion(acct))
+    _phase(results, "sync 增量", base_url, lambda: m.sync_games_to_notion(acct, incremental=True))
+
+    # 前面的 sync 已把这些游戏写入 Notion 和各级缓存，不清空时 add 不会发出任何请求
+    _cold_start(m, acct, base_url)
+    add_appids = ",".join(str(a) for a in appids[:min(size, 50)])
+    _phase(results, f"add ×{min(size, 50)}（冷缓存）", base_url, lambda: m.add_multiple_games_by_appids(acct, add_appids))
+
+    # 商店页面抓取 + 解析（关闭条件请求缓存，每次都下载完整页面）
+    m.page_cache.enabled = False
+    store_appids = appids[:min(size, 200)]
+    _phase(results, f"商店页面 ×{len(store_appids)}", base_url,
+           lambda: [get_steam_store_info(appid) for appid in store_appids])
+
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump({"phases": results, "metrics": metrics.summary()}, f, ensure_ascii=False)
+
+
+def _start_mock(size, args):
+    command = [sys.executable, os.path.join(ROOT, "mock_server.py"), "--games", str(size)]
+    for option in ("latency", "rate", "burst", "inject_429"):
+        value = getattr(args, option)
+        if value:
+            command += [f"--{option.replace('_', '-')}", value]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    urls = {}
+    for line in process.stdout:
+        line = line.strip()
+        if line == "# ready":
+            return process, urls
+        key, _, value = line.partition("=")
+        urls[key] = value
+    raise RuntimeError("模拟服务启动失败")
+
+
+def run_size(size, args):
+    """启动模拟服务与子进程运行一个规模，返回各阶段结果"""
+    mock, urls = _start_mock(size, args)
+    try:
+        with tempfile.TemporaryDirectory(prefix="game2notion-bench-") as workdir:
+            env = dict(os.environ, **urls)
+            env.update({
+                "STEAM_API_KEY": "bench", "STEAM_USER_ID": "76561198000000000",
+                "NOTION_API_KEY": "bench", "NOTION_GAMES_DATABASE_ID": "bench-games",
+                "NOTION_DAILY_RECORDS_DB_ID": "bench-daily",
+                "CACHE_DIR": os.path.join(workdir, "cache"),
+                "PYTHONPATH": os.path.join(os.path.dirname(ROOT), "src"),
+            })
+            for key in ("ACCOUNTS_FILE", "METRICS_FILE"):
+                env.pop(key, None)
+            if not args.client_rate_limits:
+                for key in ("NOTION_RATE_LIMIT", "STEAM_API_RATE_LIMIT", "STEAM_STORE_RATE_LIMIT",
+                            "STEAM_COMMUNITY_RATE_LIMIT"):
+                    env[key] = "0"
+
+            result_file = os.path.join(workdir, "result.json")
+            output = None if args.verbose else subprocess.DEVNULL
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", str(size), result_file],
+                env=env, cwd=workdir, stdout=output, stderr=output, check=True,
+            )
+            with open(result_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+def _print_table(results):
+    print(f"{'规模':>6}  {'阶段':<20} {'墙钟(s)':>9} {'CPU(s)':>8} {'请求':>7} {'429':>5} {'重试':>5} {'下载(KB)':>10}")
+    for size, result in results.items():
+        for name, p in result["phases"].items():
+            print(f"{size:>6}  {name:<20} {p['wall_s']:>9.2f} {p['cpu_s']:>8.2f} {p['requests']:>7} "
+                  f"{p['throttled']:>5} {p['retries']:>5} {p['bytes'] // 1024:>10}")
+
+
+def _compare(results, baseline, tolerance):
+    """与基线比较，返回变慢的阶段列表"""
+    regressions = []
+    for size, result in results.items():
+        for name, p in result["phases"].items():
+            old = baseline.get(size, {}).get("phases", {}).get(name)
+            if not old:
+                continue
+            if p["wall_s"] > old["wall_s"] * (1 + tolerance) and p["wall_s"] - old["wall_s"] > MIN_REGRESSION_SECONDS:
+                regressions.append((size, name, old["wall_s"], p["wall_s"]))
+    return regressions
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        run_worker(int(sys.argv[2]), sys.argv[3])
+        return 0
+
+    parser = argparse.ArgumentParser(description="同步流程离线基准（本地模拟 Steam / Notion）")
+    parser.add_argument("--sizes", default="100,1000,10000", help="合成游戏库规模，逗号分隔")
+    parser.add_argument("--client-rate-limits", action="store_true", help="保留客户端限流配置（默认关闭）")
+    parser.add_argument("--json", help="保存结果为 JSON（可作为之后的 --baseline）")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的墙钟时间增幅（比例）")
+    parser.add_argument("--verbose", action="store_true", help="显示同步过程的输出")
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        print(f"运行规模 {size} ...", flush=True)
+        results[str(size)] = run_size(size, args)
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✓ 结果已保存: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = _compare(results, json.load(f), args.tolerance)
+        for size, name, old, new in regressions:
+            print(f"✗ 性能回退: 规模 {size} {name}: {old:.2f}s -> {new:.2f}s")
+        if regressions:
+            return 1
+        print("✓ 与基线相比无性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+"""
+本地模拟服务 - 离线基准测试用的 Steam Web API / 商店 / 社区 / Notion API 替身
+
+用法:
+    python benchmarks/mock_server.py [--games N] [--port P] [--latency notion=0.05,store=0.02]
+                                     [--rate notion=3] [--inject-429 notion=0.01]
+
+四个服务（steam_api、store、community、notion）分别监听 P、P+1、P+2、P+3（P 为 0 时使用随机端口），
+启动后按 .env 格式输出各服务地址，最后一行为 "# ready"。
+Steam 数据来自 benchmarks/fixtures 下保存的 GetOwnedGames / GetPlayerAchievements / appdetails JSON 与
+商店、评测页面，按 --games 扩展为合成游戏库；Notion 数据库保存在内存中（支持查询过滤、分页、创建与更新页面）。
+
+管理接口（各端口通用）:
+    GET  /__admin/stats    各服务的请求数与被限流（429）次数
+    POST /__admin/reset    {"games": N}，清空 Notion 数据并重建游戏库
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SERVICES = ("steam_api", "store", "community", "notion")
+
+# 统计时归并为同一接口的路径片段（appid、Steam ID、Notion id）
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36}|bench-[\w-]+)$")
+
+
+def _load_fixture(name, binary=False):
+    """读取 fixtures 下的文件：binary=True 时返回原始字节，否则按 JSON 解析"""
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        content = f.read()
+    return content if binary else json.loads(content.decode("utf-8"))
+
+
+def _notion_time(ts=None):
+    """Notion 的时间格式（精确到分钟）"""
+    dt = datetime.fromtimestamp(ts if ts is not None else time.time(), tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+
+class ServiceConfig:
+    """单个服务的模拟参数：固定延迟（秒）、令牌桶限流（每秒请求数，<= 0 不限流）与随机 429 比例"""
+
+    def __init__(self, latency=0.0, rate=0.0, burst=1, error_rate=0.0, retry_after=1):
+        self.latency = float(latency)
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.error_rate = float(error_rate)
+        self.retry_after = retry_after
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def throttled(self):
+        """本次请求是否返回 429"""
+        if self.error_rate and random.random() < self.error_rate:
+            return True
+        if self.rate <= 0:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return False
+            return True
+
+
+class MockState:
+    """模拟服务的共享数据：合成游戏库、内存中的 Notion 数据库与请求统计"""
+
+    def __init__(self, games=100, configs=None, seed=0):
+        self.configs = {name: (configs or {}).get(name) or ServiceConfig() for name in SERVICES}
+        self.owned_template = _load_fixture("steam_owned_games.json")["response"]["games"]
+        self.achievements = _load_fixture("steam_player_achievements.json")
+        self.appdetails = next(iter(_load_fixture("steam_appdetails.json").values()))["data"]
+        self.store_html = _load_fixture("store_app_367520.html", binary=True)
+        self.review_html = _load_fixture("steam_review.html", binary=True)
+        self._lock = threading.Lock()
+        self.seed = seed
+        self.reset(games)
+
+    def reset(self, games):
+        with self._lock:
+            rng = random.Random(self.seed)
+            now = int(time.time())
+            self.games = []
+            for index in range(int(games)):
+                template = self.owned_template[index % len(self.owned_template)]
+                game = dict(template)
+                game["appid"] = 100000 + index
+                game["name"] = f"{template['name']} {index}"
+                game["playtime_forever"] = rng.randint(0, 6000)
+                # 越靠前的游戏越近玩过
+                game["rtime_last_played"] = now - index * 3600 if game["playtime_forever"] else 0
+                self.games.append(game)
+            self.games_by_appid = {game["appid"]: game for game in self.games}
+            self.databases = {}  # {database_id: {page_id: page}}
+            self.pages = {}      # {page_id: database_id}
+            self.requests = {name: {} for name in SERVICES}
+            self.throttled_count = {name: 0 for name in SERVICES}
+
+    def count(self, service, endpoint):
+        with self._lock:
+            self.requests[service][endpoint] = self.requests[service].get(endpoint, 0) + 1
+
+    def throttle(self, service):
+        with self._lock:
+            self.throttled_count[service] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "requests": sum(self.requests[name].values()),
+                    "throttled": self.throttled_count[name],
+                    "endpoints": dict(sorted(self.requests[name].items())),
+                }
+                for name in SERVICES
+            }
+
+    # ---------- Steam ----------
+    def owned_games(self, params):
+        appids = {int(v[0]) for k, v in params.items() if k.startswith("appids_filter[")}
+        games = [g for g in self.games if not appids or g["appid"] in appids]
+        return {"response": {"game_count": len(games), "games": games}}
+
+    def recent_games(self, params):
+        cutoff = time.time() - 14 * 86400
+        count = int((params.get("count") or ["300"])[0])
+        games = [
+            {"appid": g["appid"], "name": g["name"], "playtime_2weeks": 60,
+             "playtime_forever": g["playtime_forever"], "img_icon_url": g.get("img_icon_url", "")}
+            for g in self.games if g["rtime_last_played"] >= cutoff
+        ][:count]
+        return {"response": {"total_count": len(games), "games": games}}
+
+    def player_achievements(self, params):
+        appid = int((params.get("appid") or ["0"])[0])
+        game = self.games_by_appid.get(appid)
+        # 每三个游戏中有一个没有成就（Steam 返回 400）
+        if game is None or appid % 3 == 2:
+            return 400, {"playerstats": {"error": "Requested app has no stats", "success": False}}
+        data = copy.deepcopy(self.achievements)
+        data["playerstats"]["gameName"] = game["name"]
+        return 200, data
+
+    def app_details(self, params):
+        appids = [int(a) for a in (params.get("appids") or [""])[0].split(",") if a]
+        result = {}
+        for appid in appids:
+            game = self.games_by_appid.get(appid)
+            if game is None:
+                result[str(appid)] = {"success": False}
+            elif (params.get("filters") or [""])[0] == "price_overview":
+                result[str(appid)] = {"success": True, "data": {"price_overview": self.appdetails["price_overview"]}}
+            else:
+                data = dict(self.appdetails, name=game["name"], steam_appid=appid)
+                result[str(appid)] = {"success": True, "data": data}
+        return result
+
+    # ---------- Notion ----------
+    @staticmethod
+    def _normalize_properties(properties):
+        """补全写入格式中缺少的 type / plain_text，使其与 Notion 返回的格式一致"""
+        result = {}
+        for name, prop in (properties or {}).items():
+            prop = copy.deepcopy(prop)
+            if "type" not in prop:
+                prop["type"] = next((k for k in prop if k != "id"), None)
+            if prop["type"] in ("title", "rich_text"):
+                for item in prop.get(prop["type"]) or []:
+                    item.setdefault("type", "text")
+                    item.setdefault("plain_text", item.get("text", {}).get("content", ""))
+            result[name] = prop
+        return result
+
+    def create_page(self, data):
+        database_id = (data.get("parent") or {}).get("database_id")
+        if not database_id:
+            return 400, {"object": "error", "status": 400, "message": "parent.database_id is required"}
+        now = _notion_time()
+        page = {
+            "object": "page",
+            "id": str(uuid.uuid4()),
+            "created_time": now,
+            "last_edited_time": now,
+            "parent": {"type": "database_id", "database_id": database_id},
+            "cover": data.get("cover"),
+            "icon": data.get("icon"),
+            "archived": False,
+            "properties": self._normalize_properties(data.get("properties")),
+        }
+        with self._lock:
+            self.databases.setdefault(database_id, {})[page["id"]] = page
+            self.pages[page["id"]] = database_id
+            return 200, copy.deepcopy(page)
+
+    def update_page(self, page_id, data):
+        with self._lock:
+            database_id = self.pages.get(page_id)
+            if database_id is None:
+                return 404, {"object": "error", "status": 404, "message": f"Could not find page {page_id}"}
+            page = self.databases[database_id][page_id]
+            page["properties"].update(self._normalize_properties(data.get("properties")))
+            for key in ("cover", "icon", "archived"):
+                if key in data:
+                    page[key] = data[key]
+            page["last_edited_time"] = _notion_time()
+            return 200, copy.deepcopy(page)
+
+    def query_database(self, database_id, data):
+        with self._lock:
+            pages = [
+                p for p in self.databases.get(database_id, {}).values()
+                if not p["archived"] and _match(p, data.get("filter"))
+            ]
+            for sort in reversed(data.get("sorts") or []):
+                key = sort.get("timestamp") or sort.get("property")
+                pages.sort(key=lambda p: p.get(key) or "", reverse=sort.get("direction") == "descending")
+            start = int(data.get("start_cursor") or 0)
+            size = min(100, int(data.get("page_size") or 100))
+            batch = pages[start:start + size]
+            has_more = start + size < len(pages)
+            return 200, {
+                "object": "list",
+                "results": copy.deepcopy(batch),
+                "has_more": has_more,
+                "next_cursor": str(start + size) if has_more else None,
+            }
+
+
+def _compare(value, condition):
+    """按 Notion 过滤条件比较（日期 / 时间均为 ISO 字符串，可直接比较）"""
+    if value is None:
+        return condition.get("is_empty", False)
+    for op, target in condition.items():
+        if op == "equals" and value != target:
+            return False
+        if op == "on_or_after" and value < target:
+            return False
+        if op == "after" and value <= target:
+            return False
+        if op == "before" and value >= target:
+            return False
+        if op == "on_or_before" and value > target:
+            return False
+    return True
+
+
+def _match(page, flt):
+    """判断页面是否满足过滤条件（支持 and / or、last_edited_time、日期与关联属性，其余条件视为满足）"""
+    if not flt:
+        return True
+    if "and" in flt:
+        return all(_match(page, f) for f in flt["and"])
+    if "or" in flt:
+        return any(_match(page, f) for f in flt["or"])
+    if flt.get("timestamp") in ("last_edited_time", "created_time"):
+        return _compare(page.get(flt["timestamp"]), flt.get(flt["timestamp"], {}))
+    prop = page["properties"].get(flt.get("property"))
+    if "relation" in flt:
+        ids = {item.get("id") for item in ((prop or {}).get("relation") or [])}
+        return "contains" not in flt["relation"] or flt["relation"]["contains"] in ids
+    if "date" in flt:
+        start = ((prop or {}).get("date") or {}).get("start")
+        return _compare(start[:10] if start else None, {k: v[:10] for k, v in flt["date"].items() if isinstance(v, str)})
+    return True
+
+
+def _endpoint(method, path):
+    segments = ["{id}" if _ID_SEGMENT.match(seg) else seg for seg in path.strip("/").split("/")]
+    return f"{method} /{'/'.join(segments)}"
+
+
+def _make_handler(service, state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+        def _send(self, status, body, content_type="application/json; charset=utf-8", headers=None):
+            if not isinstance(body, bytes):
+                body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, method):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            data = json.loads(raw) if raw else {}
+
+            if url.path.startswith("/__admin/"):
+                if url.path == "/__admin/stats":
+                    return self._send(200, state.stats())
+                if url.path == "/__admin/reset" and method == "POST":
+                    state.reset(data.get("games", len(state.games)))
+                    return self._send(200, {"games": len(state.games)})
+                return self._send(404, {"error": "not found"})
+
+            state.count(service, _endpoint(method, url.path))
+            config = state.configs[service]
+            if config.latency:
+                time.sleep(config.latency)
+            if config.throttled():
+                state.throttle(service)
+                return self._send(429, {"error": "rate limited"}, headers={"Retry-After": str(config.retry_after)})
+
+            try:
+                self._route(method, url.path, parse_qs(url.query), data)
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+
+        def _route(self, method, path, params, data):
+            if service == "steam_api":
+                if path.endswith("/GetOwnedGames/v0001/"):
+                    return self._send(200, state.owned_games(params))
+                if path.endswith("/GetRecentlyPlayedGames/v0001/"):
+                    return self._send(200, state.recent_games(params))
+                if path.endswith("/GetPlayerAchievements/v0001/"):
+                    return self._send(*state.player_achievements(params))
+            elif service == "store":
+                if path == "/api/appdetails":
+                    return self._send(200, state.app_details(params))
+                match = re.match(r"^/app/(\d+)/?$", path)
+                if match:
+                    if int(match.group(1)) not in state.games_by_appid:
+                        return self._send(302, b"", headers={"Location": "/"})
+                    etag = f'"{match.group(1)}-1"'
+                    if self.headers.get("If-None-Match") == etag:
+                        return self._send(304, b"", headers={"ETag": etag})
+                    return self._send(200, state.store_html, "text/html; charset=utf-8", {"ETag": etag})
+            elif service == "community":
+                if re.match(r"^/profiles/[^/]+/recommended/\d+/?$", path):
+                    return self._send(200, state.review_html, "text/html; charset=utf-8")
+            elif service == "notion":
+                match = re.match(r"^/v1/databases/([^/]+)/query$", path)
+                if match and method == "POST":
+                    return self._send(*state.query_database(match.group(1), data))
+                if path == "/v1/pages" and method == "POST":
+                    return self._send(*state.create_page(data))
+                match = re.match(r"^/v1/pages/([^/]+)$", path)
+                if match and method == "PATCH":
+                    return self._send(*state.update_page(match.group(1), data))
+            self._send(404, {"error": f"unknown endpoint: {method} {path}"})
+
+    return Handler
+
+
+def start_services(state, host="127.0.0.1", port=0):
+    """启动四个服务（后台线程），返回 (servers, {环境变量名: 服务地址})"""
+    servers = []
+    for index, service in enumerate(SERVICES):
+        server = ThreadingHTTPServer((host, port + index if port else 0), _make_handler(service, state))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"mock-{service}", daemon=True).start()
+        servers.append(server)
+    base = {service: f"http://{host}:{server.server_address[1]}" for service, server in zip(SERVICES, servers)}
+    urls = {
+        "STEAM_API_BASE": base["steam_api"],
+        "STEAM_STORE_BASE": base["store"],
+        "STEAM_COMMUNITY_BASE": base["community"],
+        "NOTION_API_BASE": f"{base['notion']}/v1",
+    }
+    return servers, urls
+
+
+def parse_service_options(text, cast=float):
+    """解析 "notion=0.05,store=0.02" 形式的按服务参数；不带服务名的值应用于全部服务"""
+    options = {}
+    for item in filter(None, (text or "").split(",")):
+        name, _, value = item.rpartition("=")
+        for service in ([name] if name else SERVICES):
+            if service not in SERVICES:
+                raise ValueError(f"未知的服务: {service}，可选: {', '.join(SERVICES)}")
+            options[service] = cast(value)
+    return options
+
+
+def build_configs(latency=None, rate=None, burst=None, inject_429=None):
+    """按服务组装 ServiceConfig"""
+    latency, rate, burst, inject_429 = (opts or {} for opts in (latency, rate, burst, inject_429))
+    return {
+        service: ServiceConfig(
+            latency=latency.get(service, 0.0),
+            rate=rate.get(service, 0.0),
+            burst=burst.get(service, 1),
+            error_rate=inject_429.get(service, 0.0),
+        )
+        for service in SERVICES
+    }
+
+
+def add_service_arguments(parser):
+    """模拟服务参数（bench_sync.py 复用）"""
+    parser.add_argument("--latency", default="", help="每个请求的固定延迟（秒），如 notion=0.05,store=0.02")
+    parser.add_argument("--rate", default="", help="服务端限流（每秒请求数），超出时返回 429，如 notion=3")
+    parser.add_argument("--burst", default="", help="服务端限流的突发容量，如 notion=3")
+    parser.add_argument("--inject-429", default="", help="随机返回 429 的比例，如 notion=0.01")
+
+
+def configs_from_args(args):
+    return build_configs(
+        latency=parse_service_options(args.latency),
+        rate=parse_service_options(args.rate),
+        burst=parse_service_options(args.burst, int),
+        inject_429=parse_service_options(args.inject_429),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam / Notion 本地模拟服务")
+    parser.add_argument("--games", type=int, default=100, help="合成游戏库的游戏数量")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="起始端口（0 表示随机端口）")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据的随机种子")
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    state = MockState(args.games, configs_from_args(args), seed=args.seed)
+    servers, urls = start_services(state, args.host, args.port)
+    for key, value in urls.items():
+        print(f"{key}={value}")
+    print("# ready", flush=True)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+多账号配置 - 每个账号是一组 Steam 账号 -> Notion 数据库的映射
+"""
+
+import json
+import os
+
+from daily_index import DailyRecordIndex
+from notion_client import NOTION_API_BASE, NotionClient
+from notion_index import NotionGameIndex
+
+
+class Account:
+    """单个同步账号的配置"""
+
+    def __init__(self, name, steam_api_key, steam_user_id, notion_api_key,
+                 games_database_id, daily_database_id=None):
+        self.name = name
+        self.steam_api_key = steam_api_key
+        self.steam_user_id = steam_user_id
+        self.notion_api_key = notion_api_key
+        self.games_database_id = games_database_id
+        self.daily_database_id = daily_database_id
+
+    def __repr__(self):
+        return f"Account({self.name!r}, steam_user_id={self.steam_user_id!r})"
+
+
+def _expand(value):
+    """支持 "$VAR" / "${VAR}" 形式引用环境变量，避免把密钥写进配置文件"""
+    return os.path.expandvars(value) if isinstance(value, str) else value
+
+
+def load_accounts(path=None, defaults=None):
+    """
+    读取账号列表。
+    path 为 JSON 文件（对象列表），未填写的字段使用 defaults（即单账号的环境变量配置）；
+    未指定 path 时只返回 defaults 对应的一个账号。
+    """
+    defaults = defaults or {}
+    if not path:
+        return [Account(name="default", **defaults)]
+
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"账号配置文件应为非空列表: {path}")
+
+    accounts = []
+    for index, entry in enumerate(entries):
+        fields = dict(defaults)
+        fields.update({key: _expand(value) for key, value in entry.items() if key != "name"})
+        unknown = set(fields) - {"steam_api_key", "steam_user_id", "notion_api_key",
+                                 "games_database_id", "daily_database_id"}
+        if unknown:
+            raise ValueError(f"账号配置包含未知字段: {', '.join(sorted(unknown))}")
+        accounts.append(Account(name=entry.get("name") or f"account{index + 1}", **fields))
+
+    names = [account.name for account in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError("账号名称不能重复")
+    return accounts
+
+
+class AccountContext:
+    """账号运行时：Notion 客户端与该账号数据库的本地索引"""
+
+    def __init__(self, account, notion, db):
+        self.account = account
+        self.notion = notion
+        self.notion_index = NotionGameIndex(db, account.games_database_id or "", self.query_games_database)
+        self.daily_index = DailyRecordIndex(
+            lambda payload: self.notion.query_database(account.daily_database_id, payload)
+        )
+
+    @property
+    def name(self):
+        return self.account.name
+
+    def query_games_database(self, payload):
+        """查询游戏库数据库（单页）"""
+        return self.notion.query_database(self.account.games_database_id, payload)
+
+
+def build_contexts(accounts, db, notion_concurrency, notion_base_url=None):
+    """为每个账号创建运行时；使用同一 Notion 密钥的账号共用客户端（并发上限与统计）"""
+    clients = {}
+    contexts = []
+    for account in accounts:
+        if account.notion_api_key not in clients:
+            clients[account.notion_api_key] = NotionClient(
+                account.notion_api_key, base_url=notion_base_url or NOTION_API_BASE, max_concurrency=notion_concurrency
+            )
+        contexts.append(AccountContext(account, clients[account.notion_api_key], db))
+    return contexts
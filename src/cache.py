@@ -0,0 +1,598 @@
+# -*- coding: utf-8 -*-
+"""
+本地持久化缓存（SQLite）
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Steam 商店信息按字段分组，各组有独立的过期时间
+STORE_FIELD_GROUPS = {
+    "static": ["game_name", "genres", "developers", "publishers", "release_date", "info"],
+    "media": ["app_icon", "header_image"],
+    "tags": ["tag"],
+    "price": ["price"],
+    "review": ["review"],
+}
+
+
+class CacheDB:
+    """线程安全的 SQLite 连接（懒加载，所有缓存表共用一个文件）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        return self._conn
+
+    def execute(self, sql, params=()):
+        """执行单条 SQL 并提交，返回全部结果行"""
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def executemany(self, sql, seq_of_params):
+        """批量执行同一条 SQL 并提交"""
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(sql, seq_of_params)
+            conn.commit()
+
+    def executescript(self, script):
+        with self._lock:
+            self._connection().executescript(script)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class StoreCache:
+    """Steam 商店信息缓存，键为 (appid, country, language)"""
+
+    EVICT_EVERY = 50  # 每写入 N 次检查一次容量
+
+    def __init__(self, db, ttls, max_entries=20000, enabled=True):
+        self.db = db
+        self.ttls = ttls  # {字段组: 秒}
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._puts = 0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.db.executescript("""
+                    CREATE TABLE IF NOT EXISTS store_info (
+                        appid INTEGER NOT NULL,
+                        country TEXT NOT NULL,
+                        language TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        fetched_at TEXT NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        PRIMARY KEY (appid, country, language)
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_store_info_accessed ON store_info (accessed_at);
+                """)
+                self._ready = True
+
+    def lookup(self, appid, country, language, groups=None):
+        """读取缓存，返回 (缓存数据, 已过期或缺失的字段组列表)"""
+        groups = list(groups or STORE_FIELD_GROUPS)
+        if not self.enabled:
+            return {}, groups
+        self._ensure_table()
+        rows = self.db.execute(
+            "SELECT data, fetched_at FROM store_info WHERE appid = ? AND country = ? AND language = ?",
+            (int(appid), country, language),
+        )
+        if not rows:
+            return {}, groups
+
+        data, fetched_at = json.loads(rows[0][0]), json.loads(rows[0][1])
+        now = time.time()
+        stale = [g for g in groups if now - fetched_at.get(g, 0) > self.ttls.get(g, 0)]
+
+        self.db.execute(
+            "UPDATE store_info SET accessed_at = ? WHERE appid = ? AND country = ? AND language = ?",
+            (now, int(appid), country, language),
+        )
+        return data, stale
+
+    def get(self, appid, country, language, groups=None):
+        """读取缓存；所需字段组（默认全部）均未过期时返回数据，否则返回 None"""
+        data, stale = self.lookup(appid, country, language, groups)
+        return None if stale else data
+
+    def put(self, appid, country, language, data, groups=None):
+        """写入缓存（groups 为本次刷新的字段组，默认全部）"""
+        if not self.enabled:
+            return
+        self._ensure_table()
+        now = time.time()
+        groups = groups or list(STORE_FIELD_GROUPS)
+
+        rows = self.db.execute(
+            "SELECT data, fetched_at FROM store_info WHERE appid = ? AND country = ? AND language = ?",
+            (int(appid), country, language),
+        )
+        merged, fetched_at = ({}, {}) if not rows else (json.loads(rows[0][0]), json.loads(rows[0][1]))
+        for group in groups:
+            for field in STORE_FIELD_GROUPS.get(group, []):
+                if field in data:
+                    merged[field] = data[field]
+            fetched_at[group] = now
+        # 不属于任何字段组的字段原样保存
+        grouped = {f for fields in STORE_FIELD_GROUPS.values() for f in fields}
+        merged.update({k: v for k, v in data.items() if k not in grouped})
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO store_info (appid, country, language, data, fetched_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (int(appid), country, language, json.dumps(merged, ensure_ascii=False),
+             json.dumps(fetched_at), now),
+        )
+
+        with self._lock:
+            self._puts += 1
+            should_evict = self._puts % self.EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """按最近访问时间淘汰超出容量的条目"""
+        if not self.enabled:
+            return
+        self._ensure_table()
+        self.db.execute(
+            "DELETE FROM store_info WHERE rowid IN ("
+            "SELECT rowid FROM store_info ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (int(self.max_entries),),
+        )
+
+    def purge(self):
+        """清空缓存"""
+        self._ensure_table()
+        self.db.execute("DELETE FROM store_info")
+
+
+class PageCache:
+    """页面条件请求缓存：按 URL 保存校验值（ETag / Last-Modified）与上次的解析结果"""
+
+    EVICT_EVERY = 50
+
+    def __init__(self, db, max_entries=20000, enabled=True):
+        self.db = db
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._puts = 0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.db.executescript("""
+                    CREATE TABLE IF NOT EXISTS page_validators (
+                        url TEXT PRIMARY KEY,
+                        parser TEXT NOT NULL,
+                        etag TEXT,
+                        last_modified TEXT,
+                        result TEXT NOT NULL,
+                        accessed_at REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_page_validators_accessed ON page_validators (accessed_at);
+                """)
+                self._ready = True
+
+    def get(self, url, parser):
+        """读取校验值与解析结果 {"etag", "last_modified", "result"}；解析方式不同时视为未缓存"""
+        if not self.enabled:
+            return None
+        self._ensure_table()
+        rows = self.db.execute(
+            "SELECT etag, last_modified, result FROM page_validators WHERE url = ? AND parser = ?",
+            (url, parser),
+        )
+        if not rows:
+            return None
+        etag, last_modified, result = rows[0]
+        return {"etag": etag, "last_modified": last_modified, "result": json.loads(result)}
+
+    def put(self, url, parser, etag, last_modified, result):
+        """保存校验值与解析结果（没有校验值的页面无法条件请求，不保存）"""
+        if not self.enabled or not (etag or last_modified):
+            return
+        self._ensure_table()
+        self.db.execute(
+            "INSERT OR REPLACE INTO page_validators (url, parser, etag, last_modified, result, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, parser, etag, last_modified, json.dumps(result, ensure_ascii=False), time.time()),
+        )
+        with self._lock:
+            self._puts += 1
+            should_evict = self._puts % self.EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def touch(self, url):
+        """304 命中后更新访问时间"""
+        if not self.enabled:
+            return
+        self._ensure_table()
+        self.db.execute("UPDATE page_validators SET accessed_at = ? WHERE url = ?", (time.time(), url))
+
+    def evict(self):
+        """按最近访问时间淘汰超出容量的条目"""
+        self._ensure_table()
+        self.db.execute(
+            "DELETE FROM page_validators WHERE rowid IN ("
+            "SELECT rowid FROM page_validators ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (int(self.max_entries),),
+        )
+
+    def purge(self):
+        """清空缓存"""
+        self._ensure_table()
+        self.db.execute("DELETE FROM page_validators")
+
+
+class OwnedGamesCache:
+    """
+    按 appid 索引的 GetOwnedGames 结果（游玩时间、图标等）。
+    本次运行内保存在内存中，运行之间保存在缓存数据库；未拥有的 appid 也会记录（data 为 NULL），避免重复查询。
+    """
+
+    def __init__(self, db, ttl=3600, enabled=True):
+        self.db = db
+        self.ttl = ttl
+        self.enabled = enabled
+        self._memory = {}  # {steam_user_id: {appid: (game 或 None, fetched_at)}}
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.db.executescript("""
+                    CREATE TABLE IF NOT EXISTS owned_games (
+                        steam_user_id TEXT NOT NULL,
+                        appid INTEGER NOT NULL,
+                        data TEXT,
+                        fetched_at REAL NOT NULL,
+                        PRIMARY KEY (steam_user_id, appid)
+                    );
+                """)
+                self._ready = True
+
+    def lookup(self, steam_user_id, appids):
+        """
+        读取指定游戏，返回 (已知结果 {appid: game，未拥有时为 None}, 缺失或已过期的 appid 列表)。
+        内存中没有的游戏从缓存数据库读取。
+        """
+        appids = [int(appid) for appid in appids]
+        if not self.enabled:
+            return {}, appids
+        now = time.time()
+        with self._lock:
+            memory = self._memory.setdefault(str(steam_user_id), {})
+            unknown = [appid for appid in appids if appid not in memory]
+        if unknown:
+            self._ensure_table()
+            rows = []
+            for start in range(0, len(unknown), 500):
+                batch = unknown[start:start + 500]
+                rows += self.db.execute(
+                    f"SELECT appid, data, fetched_at FROM owned_games WHERE steam_user_id = ? "
+                    f"AND appid IN ({', '.join('?' * len(batch))})",
+                    (str(steam_user_id), *batch),
+                )
+            with self._lock:
+                for appid, data, fetched_at in rows:
+                    memory.setdefault(appid, (json.loads(data) if data else None, fetched_at))
+
+        found, missing = {}, []
+        with self._lock:
+            for appid in appids:
+                entry = memory.get(appid)
+                if entry is None or now - entry[1] > self.ttl:
+                    missing.append(appid)
+                else:
+                    found[appid] = entry[0]
+        return found, missing
+
+    def update(self, steam_user_id, games, requested=None, replace=False):
+        """
+        写入 GetOwnedGames 的结果；requested 中没有返回的 appid 记为未拥有。
+        replace=True 表示 games 为完整游戏库，覆盖该用户已有的全部记录。
+        """
+        if not self.enabled:
+            return
+        self._ensure_table()
+        now = time.time()
+        entries = {int(game["appid"]): game for game in games}
+        for appid in requested or []:
+            entries.setdefault(int(appid), None)
+
+        user = str(steam_user_id)
+        with self._lock:
+            memory = self._memory.setdefault(user, {})
+            if replace:
+                memory.clear()
+            memory.update({appid: (game, now) for appid, game in entries.items()})
+        if replace:
+            self.db.execute("DELETE FROM owned_games WHERE steam_user_id = ?", (user,))
+        self.db.executemany(
+            "INSERT OR REPLACE INTO owned_games (steam_user_id, appid, data, fetched_at) VALUES (?, ?, ?, ?)",
+            [
+                (user, appid, json.dumps(game, ensure_ascii=False) if game is not None else None, now)
+                for appid, game in entries.items()
+            ],
+        )
+
+    def purge(self):
+        """清空缓存"""
+        self._ensure_table()
+        with self._lock:
+            self._memory.clear()
+        self.db.execute("DELETE FROM owned_games")
+
+
+class StoreStatusCache:
+    """
+    商店查询状态（按 appid）：默认地区没有数据时可用的地区，以及下架 / 锁区、需要年龄验证、请求失败的游戏。
+    记录过期前直接使用记录的结果，不再重复请求；请求失败按连续失败次数指数退避。
+    """
+
+    # region 表示默认地区以外可用的地区，其余为失败原因
+    STATES = ("region", "unavailable", "agecheck", "error")
+
+    def __init__(self, db, region_ttl=30 * 86400, unavailable_ttl=7 * 86400, error_retry=3600, enabled=True):
+        self.db = db
+        self.region_ttl = region_ttl
+        self.unavailable_ttl = unavailable_ttl
+        self.error_retry = error_retry
+        self.enabled = enabled
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.db.executescript("""
+                    CREATE TABLE IF NOT EXISTS store_status (
+                        appid INTEGER PRIMARY KEY,
+                        state TEXT NOT NULL,
+                        country TEXT,
+                        failures INTEGER NOT NULL DEFAULT 0,
+                        last_error TEXT,
+                        first_failed_at REAL,
+                        updated_at REAL NOT NULL
+                    );
+                """)
+                self._ready = True
+
+    def _ttl(self, state, failures):
+        if state == "region":
+            return self.region_ttl
+        if state == "error":
+            return min(self.error_retry * 2 ** max(failures - 1, 0), self.unavailable_ttl)
+        return self.unavailable_ttl
+
+    def _row(self, appid):
+        rows = self.db.execute(
+            "SELECT state, country, failures, last_error, first_failed_at, updated_at FROM store_status WHERE appid = ?",
+            (int(appid),),
+        )
+        if not rows:
+            return None
+        state, country, failures, last_error, first_failed_at, updated_at = rows[0]
+        return {"appid": int(appid), "state": state, "country": country, "failures": failures,
+                "last_error": last_error, "first_failed_at": first_failed_at, "updated_at": updated_at}
+
+    def get(self, appid):
+        """未过期的状态 {"state", "country", "failures", ...}，没有记录或已过期时返回 None"""
+        if not self.enabled:
+            return None
+        self._ensure_table()
+        entry = self._row(appid)
+        if entry is None or time.time() - entry["updated_at"] > self._ttl(entry["state"], entry["failures"]):
+            return None
+        return entry
+
+    def record_ok(self, appid, country=None):
+        """查询成功：country 为可用的其他地区，None 表示默认地区可用（删除记录）"""
+        if not self.enabled:
+            return
+        self._ensure_table()
+        if country is None:
+            self.db.execute("DELETE FROM store_status WHERE appid = ?", (int(appid),))
+            return
+        self.db.execute(
+            "INSERT OR REPLACE INTO store_status (appid, state, country, failures, last_error, first_failed_at, "
+            "updated_at) VALUES (?, 'region', ?, 0, NULL, NULL, ?)",
+            (int(appid), country, time.time()),
+        )
+
+    def record_failure(self, appid, state, error=None):
+        """查询失败：state 为 unavailable / agecheck / error，累计连续失败次数"""
+        if not self.enabled:
+            return
+        self._ensure_table()
+        now = time.time()
+        previous = self._row(appid)
+        failures = previous["failures"] + 1 if previous else 1
+        first_failed_at = (previous or {}).get("first_failed_at") or now
+        self.db.execute(
+            "INSERT OR REPLACE INTO store_status (appid, state, country, failures, last_error, first_failed_at, "
+            "updated_at) VALUES (?, ?, NULL, ?, ?, ?, ?)",
+            (int(appid), state, failures, error, first_failed_at, now),
+        )
+
+    def report(self):
+        """查询失败的游戏（按连续失败次数、首次失败时间排序）"""
+        self._ensure_table()
+        rows = self.db.execute(
+            "SELECT appid FROM store_status WHERE failures > 0 ORDER BY failures DESC, first_failed_at ASC"
+        )
+        return [self._row(appid) for (appid,) in rows]
+
+    def purge(self):
+        """清空缓存"""
+        self._ensure_table()
+        self.db.execute("DELETE FROM store_status")
+
+
+class AchievementsCache:
+    """
+    成就缓存：各游戏的成就总数（0 表示游戏没有成就统计）与各用户上次看到的成就进度。
+    进度按游玩时间记录，游玩时间没有变化时直接复用；没有成就的游戏在 no_stats_ttl 内不再查询。
+    """
+
+    def __init__(self, db, no_stats_ttl=30 * 86400, enabled=True):
+        self.db = db
+        self.no_stats_ttl = no_stats_ttl
+        self.enabled = enabled
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.db.executescript("""
+                    CREATE TABLE IF NOT EXISTS achievement_schema (
+                        appid INTEGER PRIMARY KEY,
+                        total INTEGER NOT NULL,
+                        updated_at REAL NOT NULL
+                    );
+                    CREATE TABLE IF NOT EXISTS achievement_progress (
+                        steam_user_id TEXT NOT NULL,
+                        appid INTEGER NOT NULL,
+                        playtime INTEGER,
+                        info TEXT NOT NULL,
+                        updated_at REAL NOT NULL,
+                        PRIMARY KEY (steam_user_id, appid)
+                    );
+                """)
+                self._ready = True
+
+    def get_total(self, appid):
+        """游戏的成就总数，0 表示没有成就；未知或"没有成就"的记录已过期时返回 None"""
+        if not self.enabled:
+            return None
+        self._ensure_table()
+        rows = self.db.execute("SELECT total, updated_at FROM achievement_schema WHERE appid = ?", (int(appid),))
+        if not rows:
+            return None
+        total, updated_at = rows[0]
+        if total == 0 and time.time() - updated_at > self.no_stats_ttl:
+            return None
+        return total
+
+    def get_progress(self, steam_user_id, appid):
+        """上次看到的成就进度，返回 (游玩时间, 成就信息)，没有记录时返回 None"""
+        if not self.enabled:
+            return None
+        self._ensure_table()
+        rows = self.db.execute(
+            "SELECT playtime, info FROM achievement_progress WHERE steam_user_id = ? AND appid = ?",
+            (str(steam_user_id), int(appid)),
+        )
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    def put_progress(self, steam_user_id, appid, playtime, info):
+        """记录成就进度（同时更新该游戏的成就总数）"""
+        if not self.enabled:
+            return
+        self._ensure_table()
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO achievement_progress (steam_user_id, appid, playtime, info, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (str(steam_user_id), int(appid), playtime, json.dumps(info, ensure_ascii=False), now),
+        )
+        if info.get("total", -1) >= 0:
+            self.db.execute(
+                "INSERT OR REPLACE INTO achievement_schema (appid, total, updated_at) VALUES (?, ?, ?)",
+                (int(appid), info["total"], now),
+            )
+
+    def mark_no_achievements(self, appid):
+        """记录游戏没有成就统计"""
+        if not self.enabled:
+            return
+        self._ensure_table()
+        self.db.execute(
+            "INSERT OR REPLACE INTO achievement_schema (appid, total, updated_at) VALUES (?, 0, ?)",
+            (int(appid), time.time()),
+        )
+
+    def purge(self):
+        """清空缓存"""
+        self._ensure_table()
+        self.db.executescript("DELETE FROM achievement_schema; DELETE FROM achievement_progress;")
+
+
+class StateStore:
+    """跨运行保存的同步状态（键值，值为 JSON）"""
+
+    def __init__(self, db):
+        self.db = db
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.db.executescript("""
+                    CREATE TABLE IF NOT EXISTS sync_state (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    );
+                """)
+                self._ready = True
+
+    def get(self, key, default=None):
+        self._ensure_table()
+        rows = self.db.execute("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set(self, key, value):
+        self._ensure_table()
+        self.db.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
+
+    def delete(self, key):
+        self._ensure_table()
+        self.db.execute("DELETE FROM sync_state WHERE key = ?", (key,))
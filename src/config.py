@@ -4,6 +4,8 @@
 """
 
 import os
+from urllib.parse import urlparse
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +19,17 @@ NOTION_API_KEY = os.environ.get("NOTION_API_KEY")
 NOTION_GAMES_DATABASE_ID = os.environ.get("NOTION_GAMES_DATABASE_ID")
 NOTION_DAILY_RECORDS_DB_ID = os.environ.get("NOTION_DAILY_RECORDS_DB_ID")
 
+# ==================== 服务地址 ====================
+# 默认为官方地址；离线基准测试时指向本地模拟服务（benchmarks/mock_server.py）
+NOTION_API_BASE = os.environ.get("NOTION_API_BASE", "https://api.notion.com/v1")
+STEAM_API_BASE = os.environ.get("STEAM_API_BASE", "https://api.steampowered.com")
+STEAM_STORE_BASE = os.environ.get("STEAM_STORE_BASE", "https://store.steampowered.com")
+STEAM_COMMUNITY_BASE = os.environ.get("STEAM_COMMUNITY_BASE", "https://steamcommunity.com")
+
+# ==================== 多账号配置 ====================
+# JSON 文件，内容为账号列表；未配置时只同步上面环境变量中的单个账号
+ACCOUNTS_FILE = os.environ.get("ACCOUNTS_FILE")
+
 # ==================== NOTION 属性名映射 ====================
 # 游戏库属性
 NOTION_PROPERTIES = {
@@ -49,20 +62,135 @@ NOTION_DAILY_PROPERTIES = {
     "playtime_forever": "总游玩时间"     # 累计游玩时间（number）
 }
 
+# ==================== 字段数据来源 ====================
+# owned_games: GetOwnedGames 返回值；achievements: 成就接口；
+# store:<字段组>: 商店数据（字段组与商店信息缓存一致）；static: 无需请求
+FIELD_SOURCES = {
+    "name": "owned_games",
+    "appid": "owned_games",
+    "playtime": "owned_games",
+    "last_play": "owned_games",
+    "platform": "static",
+    "store_url": "static",
+    "total_achievements": "achievements",
+    "achieved_achievements": "achievements",
+    "earliest_unlock": "achievements",
+    "game_name": "store:static",
+    "genres": "store:static",
+    "developers": "store:static",
+    "publishers": "store:static",
+    "release_date": "store:static",
+    "info": "store:static",
+    "tags": "store:tags",
+    "price": "store:price",
+    "review": "store:review",
+    "cover": "store:media",   # 页面封面（仅新增时写入）
+    "icon": "store:media",    # 页面图标（仅新增时写入）
+}
+
+# 各更新模式写入的字段：core 为默认增量更新，full 为新增/全量更新
+UPDATE_MODE_FIELDS = {
+    "core": ["playtime", "last_play", "achieved_achievements", "review"],
+    "full": list(NOTION_PROPERTIES) + ["cover", "icon"],
+}
+
 # ==================== 业务配置 ====================
 include_played_free_games = os.environ.get("include_played_free_games", "true").lower() == "true"
 enable_item_update = os.environ.get("enable_item_update", "true").lower() == "true"
 enable_filter = os.environ.get("enable_filter", "false").lower() == "true"
 enable_full_update = os.environ.get("enable_full_update", "false").lower() == "true"
 
+# 增量同步：只处理上次同步后玩过的游戏（GetRecentlyPlayedGames），每隔 N 天自动全量对账一次
+SYNC_INCREMENTAL = os.environ.get("SYNC_INCREMENTAL", "false").lower() == "true"
+FULL_RECONCILE_DAYS = float(os.environ.get("FULL_RECONCILE_DAYS", "7"))
+
+# 运行统计：运行结束时输出各阶段耗时表格，配置路径时同时保存 JSON 摘要
+METRICS_FILE = os.environ.get("METRICS_FILE")
+
 # 日期/时间配置
 TIMEZONE = os.environ.get("TIMEZONE", "Asia/Shanghai")
 
-MAX_RETRIES = 3
-RETRY_DELAY = 1
+# ==================== 重试配置 ====================
+# 只重试 429 / 5xx / 超时 / 连接错误；等待时间为带随机抖动的指数退避，有 Retry-After 时以其为准
+MAX_RETRIES = int(os.environ.get("MAX_RETRIES", "5"))                      # 单个请求最多尝试次数
+RETRY_DELAY = float(os.environ.get("RETRY_DELAY", "1"))                    # 退避基数（秒）
+RETRY_MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", "30"))           # 单次等待上限（秒）
+RETRY_BUDGET = float(os.environ.get("RETRY_BUDGET", "120"))                # 单个请求含重试的总时间预算（秒）
+# 同一主机连续失败 N 次后熔断一段时间，期间请求直接失败（N <= 0 表示不熔断）
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.environ.get("CIRCUIT_RESET_SECONDS", "60"))
+
+# ==================== 并发配置 ====================
+SYNC_WORKERS = int(os.environ.get("SYNC_WORKERS", "8"))                          # 详情获取阶段线程数
+SYNC_BUILD_WORKERS = int(os.environ.get("SYNC_BUILD_WORKERS", "2"))              # 属性构建阶段线程数
+SYNC_QUEUE_SIZE = int(os.environ.get("SYNC_QUEUE_SIZE", "50"))                   # 流水线各阶段队列容量
+STEAM_API_CONCURRENCY = int(os.environ.get("STEAM_API_CONCURRENCY", "4"))        # Steam Web API 并发上限
+STEAM_STORE_CONCURRENCY = int(os.environ.get("STEAM_STORE_CONCURRENCY", "4"))    # Steam 商店页面并发上限
+NOTION_CONCURRENCY = int(os.environ.get("NOTION_CONCURRENCY", "3"))              # Notion API 并发上限
+
+# ==================== 连接池配置 ====================
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "10"))  # 缓存的主机连接池数量
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))          # 每个主机的最大 keep-alive 连接数
+
+# ==================== 限流配置 ====================
+# 按主机的令牌桶：(每秒请求数, 突发容量)，每秒请求数 <= 0 表示不限流
+RATE_LIMITS = {
+    urlparse(NOTION_API_BASE).netloc: (
+        float(os.environ.get("NOTION_RATE_LIMIT", "3")),
+        int(os.environ.get("NOTION_RATE_BURST", "1")),
+    ),
+    urlparse(STEAM_API_BASE).netloc: (
+        float(os.environ.get("STEAM_API_RATE_LIMIT", "10")),
+        int(os.environ.get("STEAM_API_RATE_BURST", "10")),
+    ),
+    urlparse(STEAM_STORE_BASE).netloc: (
+        float(os.environ.get("STEAM_STORE_RATE_LIMIT", "2")),
+        int(os.environ.get("STEAM_STORE_RATE_BURST", "4")),
+    ),
+    urlparse(STEAM_COMMUNITY_BASE).netloc: (
+        float(os.environ.get("STEAM_COMMUNITY_RATE_LIMIT", "2")),
+        int(os.environ.get("STEAM_COMMUNITY_RATE_BURST", "4")),
+    ),
+}
+
+# ==================== 解析配置 ====================
+STORE_HTML_ENGINE = os.environ.get("STORE_HTML_ENGINE", "fast")  # 商店页面解析引擎：fast / soup
+# 商店数据来源：appdetails（JSON 接口提供基础信息与价格，页面只用于标签/评分/图片）/ html（全部来自页面）
+STORE_DATA_PROVIDER = os.environ.get("STORE_DATA_PROVIDER", "appdetails")
+
+# ==================== 缓存配置 ====================
+CACHE_DIR = os.environ.get("CACHE_DIR", ".cache")                              # 本地缓存目录
+STORE_CACHE_ENABLED = os.environ.get("STORE_CACHE_ENABLED", "true").lower() == "true"
+STORE_CACHE_MAX_ENTRIES = int(os.environ.get("STORE_CACHE_MAX_ENTRIES", "20000"))
+PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "true").lower() == "true"  # 页面条件请求（ETag / Last-Modified）
+# GetOwnedGames 结果（游玩时间、图标）的缓存时间（分钟），add 时复用，无需重新拉取整个游戏库
+OWNED_GAMES_CACHE_TTL = float(os.environ.get("OWNED_GAMES_CACHE_TTL_MINUTES", "60")) * 60
+# 默认地区（CN）商店没有数据（锁区）时依次尝试的地区，逗号分隔
+STORE_FALLBACK_COUNTRIES = [c.strip() for c in os.environ.get("STORE_FALLBACK_COUNTRIES", "SG").split(",") if c.strip()]
+# 商店查询状态的有效期：可用地区、下架 / 锁区 / 年龄验证（天），请求失败后的首次重试间隔（分钟，连续失败时翻倍）
+STORE_REGION_TTL = float(os.environ.get("STORE_REGION_TTL_DAYS", "30")) * 86400
+STORE_UNAVAILABLE_TTL = float(os.environ.get("STORE_UNAVAILABLE_TTL_DAYS", "7")) * 86400
+STORE_ERROR_RETRY = float(os.environ.get("STORE_ERROR_RETRY_MINUTES", "60")) * 60
+# 没有成就统计的游戏（成就接口返回 4xx "no stats"）在该天数内不再查询成就
+ACHIEVEMENTS_NO_STATS_TTL = float(os.environ.get("ACHIEVEMENTS_NO_STATS_TTL_DAYS", "30")) * 86400
+# 商店信息各字段组的过期时间（天）
+STORE_CACHE_TTLS = {
+    "static": float(os.environ.get("STORE_CACHE_TTL_STATIC_DAYS", "30")) * 86400,  # 名称/类型/开发商/简介等
+    "media": float(os.environ.get("STORE_CACHE_TTL_MEDIA_DAYS", "30")) * 86400,    # 图标/封面
+    "tags": float(os.environ.get("STORE_CACHE_TTL_TAGS_DAYS", "7")) * 86400,       # 用户标签
+    "price": float(os.environ.get("STORE_CACHE_TTL_PRICE_DAYS", "1")) * 86400,     # 价格
+    "review": float(os.environ.get("STORE_CACHE_TTL_REVIEW_DAYS", "1")) * 86400,   # 评分
+}
 
 # ==================== 辅助函数 ====================
 def get_property_name(prop_key, is_daily=False):
     """获取属性的实际名称"""
     props = NOTION_DAILY_PROPERTIES if is_daily else NOTION_PROPERTIES
-    return props.get(prop_key, prop_key)
\ No newline at end of file
+    return props.get(prop_key, prop_key)
+
+
+def get_required_sources(mode):
+    """获取更新模式所需的数据来源，返回 (是否需要成就接口, 所需商店字段组列表)"""
+    sources = {FIELD_SOURCES.get(field, "static") for field in UPDATE_MODE_FIELDS[mode]}
+    store_groups = sorted(src.split(":", 1)[1] for src in sources if src.startswith("store:"))
+    return "achievements" in sources, store_groups
\ No newline at end of file
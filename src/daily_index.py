@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+每日记录索引 - (游戏页面, 日期) -> 已有的每日记录，避免重复创建
+"""
+
+import threading
+from datetime import date, timedelta
+
+from config import get_property_name
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_daily_page(page):
+    """解析每日记录页面，返回 (关联的游戏页面 id 列表, 日期, 条目)"""
+    props = page.get("properties", {})
+    date_data = props.get(get_property_name("date", is_daily=True), {}).get("date") or {}
+    relation = props.get(get_property_name("game_name", is_daily=True), {}).get("relation") or []
+    entry = {
+        "record_id": page["id"],
+        "playtime": props.get(get_property_name("playtime", is_daily=True), {}).get("number") or 0,
+        "playtime_forever": props.get(get_property_name("playtime_forever", is_daily=True), {}).get("number") or 0,
+    }
+    return [item["id"] for item in relation if item.get("id")], (date_data.get("start") or "")[:10], entry
+
+
+class DailyRecordIndex:
+    """每日记录的内存索引：按日期范围批量加载，一次运行内只查询一次"""
+
+    def __init__(self, query_func, window_days=7):
+        self._query = query_func  # query_func(payload) -> Notion 查询结果（dict）
+        self.window_days = window_days
+        self._records = {}        # {(page_id, date): entry}
+        self._since = None        # 已加载的起始日期（含）
+        self._lock = threading.RLock()
+
+    def _load(self, since):
+        """加载 since（含）之后的全部记录"""
+        payload = {
+            "page_size": 100,
+            "filter": {
+                "property": get_property_name("date", is_daily=True),
+                "date": {"on_or_after": since},
+            },
+        }
+        if self._since is not None:
+            # 已加载过更晚的日期，只补齐缺失的区间
+            payload["filter"] = {"and": [
+                payload["filter"],
+                {"property": get_property_name("date", is_daily=True), "date": {"before": self._since}},
+            ]}
+
+        loaded = 0
+        next_cursor = None
+        has_more = True
+        while has_more:
+            data = dict(payload)
+            if next_cursor:
+                data["start_cursor"] = next_cursor
+            result = self._query(data)
+            for page in result.get("results", []):
+                try:
+                    page_ids, record_date, entry = parse_daily_page(page)
+                except Exception as e:
+                    logger.warning(f"解析每日记录失败: {e}")
+                    continue
+                for page_id in page_ids:
+                    self._records.setdefault((page_id, record_date), entry)
+                loaded += 1
+            has_more = result.get("has_more", False)
+            next_cursor = result.get("next_cursor")
+
+        self._since = since
+        logger.debug(f"已加载 {since} 起的每日记录: {loaded}")
+
+    def get(self, page_id, record_date):
+        """获取已有记录，需要时先加载对应日期范围"""
+        with self._lock:
+            if self._since is None or record_date < self._since:
+                default_since = (date.today() - timedelta(days=self.window_days)).isoformat()
+                self._load(min(record_date, default_since))
+            return self._records.get((page_id, record_date))
+
+    def put(self, page_id, record_date, entry):
+        """写入 Notion 后更新索引"""
+        with self._lock:
+            self._records[(page_id, record_date)] = entry
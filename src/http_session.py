@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+共享 HTTP 会话 - 按主机复用连接池（keep-alive）
+"""
+
+import threading
+from http import cookiejar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 默认连接池大小：缓存的主机池数量 / 每个主机的最大连接数
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+_session = None
+_pool_connections = DEFAULT_POOL_CONNECTIONS
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+_lock = threading.Lock()
+
+
+def configure_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """设置连接池大小（已创建的会话会被关闭并按新参数重建）"""
+    global _session, _pool_connections, _pool_maxsize
+    with _lock:
+        _pool_connections = max(1, int(pool_connections))
+        _pool_maxsize = max(1, int(pool_maxsize))
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=_pool_connections, pool_maxsize=_pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # 不保存服务端下发的 Cookie，保持每个请求无状态（Cookie 由调用方显式传入）
+    session.cookies.set_policy(cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session():
+    """获取全局共享的会话（线程安全，懒加载）"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def close_session():
+    """关闭会话并释放连接"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+运行统计 - 各阶段耗时直方图、计数器（重试、流量）与缓存命中率，运行结束时输出表格和 JSON
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """耗时直方图（毫秒分桶），百分位按所在分桶的上界估算"""
+
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float("inf"))
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for index, bound in enumerate(self.BUCKETS_MS):
+            if ms <= bound:
+                self.counts[index] += 1
+                break
+
+    def percentile(self, q):
+        """第 q 百分位（0-100）的估计值，超出最后一个有限分桶时返回最大值"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, n in zip(self.BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {
+                ("inf" if bound == float("inf") else str(bound)): n
+                for bound, n in zip(self.BUCKETS_MS, self.counts) if n
+            },
+        }
+
+
+class Metrics:
+    """
+    进程内的运行统计（线程安全）。
+    timer()/observe() 记录阶段耗时，incr() 记录计数，hit() 记录缓存命中（名称.hit / 名称.miss）。
+    """
+
+    def __init__(self):
+        self._timings = {}   # {阶段名称: Histogram}
+        self._counters = {}  # {计数名称: 数值}
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+            self.started = time.monotonic()
+
+    @contextmanager
+    def timer(self, name):
+        """统计代码块耗时（异常退出也会记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            if name not in self._timings:
+                self._timings[name] = Histogram()
+            self._timings[name].observe(seconds)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def hit(self, name, hit):
+        self.incr(f"{name}.hit" if hit else f"{name}.miss")
+
+    def summary(self):
+        """可序列化为 JSON 的统计摘要"""
+        with self._lock:
+            stages = {name: hist.as_dict() for name, hist in sorted(self._timings.items())}
+            counters = dict(sorted(self._counters.items()))
+
+        caches = {}
+        for name, value in counters.items():
+            for suffix in (".hit", ".miss"):
+                if name.endswith(suffix):
+                    caches.setdefault(name[:-len(suffix)], {"hit": 0, "miss": 0})[suffix[1:]] = value
+        for stats in caches.values():
+            total = stats["hit"] + stats["miss"]
+            stats["hit_rate"] = round(stats["hit"] / total, 3) if total else 0.0
+
+        return {
+            "elapsed_s": round(time.monotonic() - self.started, 1),
+            "stages": stages,
+            "counters": {k: v for k, v in counters.items() if not k.endswith((".hit", ".miss"))},
+            "caches": dict(sorted(caches.items())),
+        }
+
+    def log_table(self, summary=None):
+        """以表格形式输出统计"""
+        summary = summary or self.summary()
+        logger.info(f"运行统计（总耗时 {summary['elapsed_s']:.1f}s）")
+        if summary["stages"]:
+            logger.info(f"{'阶段':<36} {'次数':>6} {'合计(s)':>9} {'平均(ms)':>9} {'P50(ms)':>9} {'P95(ms)':>9} {'最大(ms)':>9}")
+            for name, s in summary["stages"].items():
+                logger.info(f"{name:<36} {s['count']:>6} {s['total_ms'] / 1000:>9.1f} {s['avg_ms']:>9.1f} "
+                            f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['max_ms']:>9.1f}")
+        if summary["caches"]:
+            logger.info(f"{'缓存':<36} {'命中':>6} {'未命中':>6} {'命中率':>8}")
+            for name, s in summary["caches"].items():
+                logger.info(f"{name:<36} {s['hit']:>6} {s['miss']:>6} {s['hit_rate']:>8.1%}")
+        if summary["counters"]:
+            logger.info(f"{'计数':<36} {'数值':>12}")
+            for name, value in summary["counters"].items():
+                logger.info(f"{name:<36} {value:>12}")
+
+    def write_json(self, path, summary=None, **extra):
+        """保存 JSON 摘要（extra 为附加字段，如各接口统计）"""
+        data = dict(summary or self.summary(), **extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"✓ 运行统计已保存: {path}")
+
+
+# 全局统计（各模块直接记录到这里）
+metrics = Metrics()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Notion API 客户端 - 统一鉴权与版本头、合并相同的并发请求、按接口统计耗时与错误
+"""
+
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils import get_logger, send_request_with_retry
+
+logger = get_logger(__name__)
+
+NOTION_API_BASE = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+# 路径中的页面 / 数据库 id（统计时归并为同一接口）
+_ID_SEGMENT = re.compile(r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$")
+
+
+def endpoint_name(method, path):
+    """接口名称，例如 POST /databases/{id}/query"""
+    segments = ["{id}" if _ID_SEGMENT.match(seg) else seg for seg in path.strip("/").split("/")]
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+
+class EndpointStats:
+    """单个接口的调用统计"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "coalesced": self.coalesced,
+            "avg_ms": round(self.total_seconds / self.calls * 1000, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+class NotionClient:
+    """
+    Notion API 客户端。
+    request() 供工作线程同步调用，arequest() 供 asyncio 代码并发调用；两者共用并发上限、
+    进行中请求表和统计。只读请求（GET 与数据库查询）参数相同时合并为一次调用。
+    """
+
+    def __init__(self, api_key, version=NOTION_VERSION, base_url=NOTION_API_BASE, max_concurrency=3):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Notion-Version": version,
+            "Content-Type": "application/json",
+        }
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._inflight = {}  # {请求键: Future}
+        self._stats = {}     # {接口名称: EndpointStats}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # ---------- 同步接口 ----------
+    def request(self, method, path, payload=None, coalesce=None):
+        """发送请求并返回 JSON；coalesce 默认只对只读请求开启"""
+        future, run = self._claim(method, path, payload, coalesce)
+        if run:
+            run()
+        return future.result()
+
+    def _claim(self, method, path, payload, coalesce):
+        """
+        登记请求，返回 (future, run)。
+        已有相同的请求在进行中时 run 为 None，直接等待该请求的结果；否则由调用方执行 run()。
+        """
+        if coalesce is None:
+            coalesce = method.lower() == "get" or path.rstrip("/").endswith("/query")
+        endpoint = endpoint_name(method, path)
+        key = (method.lower(), path, json.dumps(payload, sort_keys=True, ensure_ascii=False)) if coalesce else None
+
+        with self._lock:
+            future = self._inflight.get(key) if key else None
+            if future is not None:
+                self._stats_for(endpoint).coalesced += 1
+                return future, None
+            future = Future()
+            if key:
+                self._inflight[key] = future
+
+        def run():
+            try:
+                future.set_result(self._perform(method, path, payload, endpoint))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                if key:
+                    with self._lock:
+                        self._inflight.pop(key, None)
+
+        return future, run
+
+    def _perform(self, method, path, payload, endpoint):
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        start = time.perf_counter()
+        try:
+            with self._slots:
+                response = send_request_with_retry(url, headers=self.headers, json_data=payload, method=method)
+            return response.json()
+        except Exception:
+            with self._lock:
+                self._stats_for(endpoint).errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._stats_for(endpoint)
+                stats.calls += 1
+                stats.total_seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+
+    def _stats_for(self, endpoint):
+        if endpoint not in self._stats:
+            self._stats[endpoint] = EndpointStats()
+        return self._stats[endpoint]
+
+    # ---------- asyncio 接口 ----------
+    async def arequest(self, method, path, payload=None, coalesce=None):
+        """request() 的协程版本：阻塞的 HTTP 调用在专用线程池中执行"""
+        future, run = self._claim(method, path, payload, coalesce)
+        if run:
+            await asyncio.get_running_loop().run_in_executor(self._get_executor(), run)
+        return await asyncio.wrap_future(future)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="notion")
+            return self._executor
+
+    def close(self):
+        """关闭 asyncio 接口使用的线程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    # ---------- 常用接口 ----------
+    def query_database(self, database_id, payload):
+        """查询数据库（单页）"""
+        return self.request("post", f"databases/{database_id}/query", payload)
+
+    def create_page(self, data):
+        """创建页面"""
+        return self.request("post", "pages", data)
+
+    def update_page(self, page_id, data):
+        """更新页面"""
+        return self.request("patch", f"pages/{page_id}", data)
+
+    async def aquery_database(self, database_id, payload):
+        """query_database() 的协程版本"""
+        return await self.arequest("post", f"databases/{database_id}/query", payload)
+
+    async def acreate_page(self, data):
+        """create_page() 的协程版本"""
+        return await self.arequest("post", "pages", data)
+
+    async def aupdate_page(self, page_id, data):
+        """update_page() 的协程版本"""
+        return await self.arequest("patch", f"pages/{page_id}", data)
+
+    # ---------- 统计 ----------
+    def stats(self):
+        """各接口的调用统计 {接口名称: {"calls", "errors", "coalesced", "avg_ms", "max_ms"}}"""
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self._stats.items())}
+
+    def log_stats(self):
+        """以表格形式输出接口统计（调试日志）"""
+        stats = self.stats()
+        if not stats:
+            return
+        logger.debug(f"{'Notion 接口':<32} {'调用':>6} {'错误':>6} {'合并':>6} {'平均(ms)':>10} {'最大(ms)':>10}")
+        for endpoint, s in stats.items():
+            logger.debug(f"{endpoint:<32} {s['calls']:>6} {s['errors']:>6} {s['coalesced']:>6} "
+                         f"{s['avg_ms']:>10.1f} {s['max_ms']:>10.1f}")
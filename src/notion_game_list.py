@@ -4,31 +4,85 @@ Steam 游戏信息同步到 Notion
 """
 
 import argparse
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from config import (
     STEAM_API_KEY, STEAM_USER_ID, NOTION_API_KEY, NOTION_GAMES_DATABASE_ID,
-    NOTION_DAILY_RECORDS_DB_ID,
-    include_played_free_games, enable_item_update, enable_filter, enable_full_update,
+    NOTION_DAILY_RECORDS_DB_ID, ACCOUNTS_FILE,
+    include_played_free_games, enable_filter, enable_full_update,
     TIMEZONE,
-    get_property_name
+    SYNC_WORKERS, SYNC_BUILD_WORKERS, SYNC_QUEUE_SIZE, STEAM_API_CONCURRENCY, STEAM_STORE_CONCURRENCY, NOTION_CONCURRENCY,
+    RATE_LIMITS, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE,
+    MAX_RETRIES, RETRY_DELAY, RETRY_MAX_DELAY, RETRY_BUDGET, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS,
+    STORE_HTML_ENGINE, STORE_DATA_PROVIDER, CACHE_DIR, STORE_CACHE_ENABLED, STORE_CACHE_MAX_ENTRIES, STORE_CACHE_TTLS,
+    PAGE_CACHE_ENABLED, OWNED_GAMES_CACHE_TTL, ACHIEVEMENTS_NO_STATS_TTL,
+    STORE_FALLBACK_COUNTRIES, STORE_REGION_TTL, STORE_UNAVAILABLE_TTL, STORE_ERROR_RETRY, SYNC_INCREMENTAL, FULL_RECONCILE_DAYS, METRICS_FILE,
+    NOTION_API_BASE, STEAM_API_BASE, STEAM_STORE_BASE, STEAM_COMMUNITY_BASE,
+    get_property_name, get_required_sources
 )
 from platforms.steam import (
-    get_owned_games_from_steam, get_achievements_from_steam, 
-    parse_achievements_info, get_steam_store_info
+    get_owned_games_from_steam, get_steam_recent_games, get_achievements_from_steam,
+    achievements_unavailable, parse_achievements_info, set_store_html_engine, set_page_cache, set_base_urls
 )
+from cache import CacheDB, StoreCache, PageCache, OwnedGamesCache, AchievementsCache, StoreStatusCache, StateStore
+from store_data import StoreDataService, build_providers
+from http_session import configure_session
+from notion_index import diff_properties
+from accounts import load_accounts, build_contexts
+from pipeline import PipelineStage, run_pipeline
+from sync_journal import SyncJournal, STAGES, STAGE_PLANNED, STAGE_FETCHED, STAGE_WRITTEN, STAGE_DONE
+from sync_plan import iter_plan, plan_sync, summarize_plan, shard_plan, save_plan, load_plan
+from rate_limiter import rate_limiter
+from retry import RetryPolicy, CircuitBreaker, configure_retry
+from metrics import metrics
 from utils import (
     format_timestamp,
     format_notion_multi_select,
     get_logger,
     parse_steam_date,
-    send_request_with_retry,
     setup_logging,
 )
 
 logger = get_logger(__name__)
 
+# 各服务的并发上限（工作线程共享）
+_steam_api_slots = threading.BoundedSemaphore(max(1, STEAM_API_CONCURRENCY))
+_steam_store_slots = threading.BoundedSemaphore(max(1, STEAM_STORE_CONCURRENCY))
+
+# 按主机限流：只有实际发出的请求才需要等待令牌
+rate_limiter.configure_many(RATE_LIMITS)
+
+# 重试策略与按主机熔断
+configure_retry(
+    RetryPolicy(MAX_RETRIES, base_delay=RETRY_DELAY, max_delay=RETRY_MAX_DELAY, budget=RETRY_BUDGET),
+    CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_SECONDS),
+)
+
+# 所有出站请求共用按主机的 keep-alive 连接池
+configure_session(HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE)
+
+# 商店页面解析引擎与 Steam 服务地址
+set_store_html_engine(STORE_HTML_ENGINE)
+set_base_urls(api=STEAM_API_BASE, store=STEAM_STORE_BASE, community=STEAM_COMMUNITY_BASE)
+
+# 本地持久化缓存
+cache_db = CacheDB(os.path.join(CACHE_DIR, "game2notion.db"))
+store_cache = StoreCache(cache_db, STORE_CACHE_TTLS, STORE_CACHE_MAX_ENTRIES, enabled=STORE_CACHE_ENABLED)
+page_cache = PageCache(cache_db, STORE_CACHE_MAX_ENTRIES, enabled=PAGE_CACHE_ENABLED)
+set_page_cache(page_cache)
+owned_games_cache = OwnedGamesCache(cache_db, OWNED_GAMES_CACHE_TTL, enabled=STORE_CACHE_ENABLED)
+achievements_cache = AchievementsCache(cache_db, ACHIEVEMENTS_NO_STATS_TTL, enabled=STORE_CACHE_ENABLED)
+sync_state = StateStore(cache_db)
+sync_journal = SyncJournal(cache_db)
+store_status = StoreStatusCache(cache_db, STORE_REGION_TTL, STORE_UNAVAILABLE_TTL, STORE_ERROR_RETRY,
+                                enabled=STORE_CACHE_ENABLED)
+store_service = StoreDataService(store_cache, build_providers(STORE_DATA_PROVIDER), slots=_steam_store_slots,
+                                 status=store_status, fallback_countries=STORE_FALLBACK_COUNTRIES)
+
 
 def _get_tzinfo(timezone):
     """获取时区信息（非法时区回退到本地时区）"""
@@ -242,8 +296,8 @@ def build_update_properties(game, achievements_info, steam_store_data, full_upda
     return props
 
 
-def build_page_data(game, achievements_info, steam_store_data, is_update=False):
-    """构建 Notion page 数据"""
+def build_page_data(game, achievements_info, steam_store_data, is_update=False, database_id=None):
+    """构建 Notion page 数据（新增时 database_id 为所属游戏库）"""
     properties = build_game_properties(game, achievements_info, steam_store_data)
     
     data = {"properties": properties}
@@ -260,7 +314,7 @@ def build_page_data(game, achievements_info, steam_store_data, is_update=False):
             icon_url = f"https://media.steampowered.com/steamcommunity/public/images/apps/{game['appid']}/{game['img_icon_url']}.jpg"
         
         data.update({
-            "parent": {"type": "database_id", "database_id": NOTION_GAMES_DATABASE_ID},
+            "parent": {"type": "database_id", "database_id": database_id or NOTION_GAMES_DATABASE_ID},
             "cover": {"type": "external", "external": {"url": cover_url}},
             "icon": {"type": "external", "external": {"url": icon_url}}
         })
@@ -269,84 +323,61 @@ def build_page_data(game, achievements_info, steam_store_data, is_update=False):
 
 
 # ==================== NOTION API ====================
-def query_all_games_from_notion():
-    """一次性查询 Notion 中所有游戏"""
-    url = f"https://api.notion.com/v1/databases/{NOTION_GAMES_DATABASE_ID}/query"
-    headers = {
-        "Authorization": f"Bearer {NOTION_API_KEY}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    games_map = {}  # {game_name: {"page_id": ..., "last_play": ...}}
-    has_more = True
-    next_cursor = None
-    
-    name_prop = get_property_name("name")
-    last_play_prop = get_property_name("last_play")
-    platform_prop = get_property_name("platform")
-    playtime_prop = get_property_name("playtime")
-    
-    while has_more:
-        data = {"page_size": 100}
-        if next_cursor:
-            data["start_cursor"] = next_cursor
-        
-        try:
-            response = send_request_with_retry(url, headers=headers, json_data=data, method="post")
-            result = response.json()
-            
-            for page in result.get("results", []):
-                props = page.get("properties", {})
-                try:
-                    name_prop_data = props.get(name_prop, {}).get("title", [])
-                    if not name_prop_data:
-                        continue
-                    
-                    game_name = name_prop_data[0]["plain_text"]
-                    page_id = page["id"]
-                    
-                    last_play_data = props.get(last_play_prop, {}).get("date", {})
-                    last_play = last_play_data.get("start") if last_play_data else None
-                    # 读取游戏平台
-                    platform_info = props.get(platform_prop, {}).get("select", {})
-                    platform = platform_info.get("name") if platform_info else "Unknown"
-                    
-                    playtime = props.get(playtime_prop, {}).get("number", 0)
-
-                    key = (game_name, platform)
-                    games_map[key] = {
-                        "page_id": page_id,
-                        "last_play": last_play,
-                        "playtime": playtime
-                    }
-                except Exception as e:
-                    logger.warning(f"解析游戏信息失败: {e}")
-            
-            has_more = result.get("has_more", False)
-            next_cursor = result.get("next_cursor")
-        
-        except Exception as e:
-            logger.error(f"查询 Notion 失败: {e}")
-            break
-    
-    logger.info(f"✓ 获取 Notion 中 {len(games_map)} 个游戏")
-    return games_map
+# 同步账号（未配置 ACCOUNTS_FILE 时为环境变量中的单个账号）；每个账号有自己的 Notion 客户端、
+# 游戏库本地镜像（持久化在缓存数据库，按 last_edited_time 增量刷新）和每日记录索引
+accounts = build_contexts(
+    load_accounts(ACCOUNTS_FILE, defaults={
+        "steam_api_key": STEAM_API_KEY,
+        "steam_user_id": STEAM_USER_ID,
+        "notion_api_key": NOTION_API_KEY,
+        "games_database_id": NOTION_GAMES_DATABASE_ID,
+        "daily_database_id": NOTION_DAILY_RECORDS_DB_ID,
+    }),
+    cache_db,
+    NOTION_CONCURRENCY,
+    notion_base_url=NOTION_API_BASE,
+)
 
 
-def add_game_to_notion(game, achievements_info, steam_store_data):
-    """添加游戏到 Notion"""
-    url = "https://api.notion.com/v1/pages"
-    headers = {
-        "Authorization": f"Bearer {NOTION_API_KEY}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    data = build_page_data(game, achievements_info, steam_store_data)
+def _record_written_page(acct, page):
+    """用写入接口返回的页面对象更新本地镜像"""
+    try:
+        acct.notion_index.upsert_page(page)
+    except Exception as e:
+        logger.debug(f"更新本地索引失败: {e}")
+
+
+def _page_gone(error):
+    """写入失败是否因为页面已在 Notion 中归档或删除（404，或提示 archived 的校验错误）"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return False
+    if response.status_code == 404:
+        return True
+    return response.status_code == 400 and "archived" in (response.text or "")
+
+
+def query_all_games_from_notion(acct, full_refresh=False):
+    """获取 Notion 中所有游戏（本进程首次调用时增量刷新本地镜像）"""
+    with metrics.timer("notion.index_query"):
+        acct.notion_index.ensure_fresh(full=full_refresh)
+    games = acct.notion_index.lookup()  # 按 (平台, appid) 查找，没有 appid 的旧页面按名称查找
+    logger.info(f"✓ 获取 Notion 中 {len(games)} 个游戏")
+    duplicates = games.duplicates()
+    if duplicates:
+        logger.warning(f"Notion 中有 {len(duplicates)} 个游戏存在重复页面，可运行 dedupe 合并")
+    return games
+
+
+def add_game_to_notion(acct, game, achievements_info, steam_store_data, data=None):
+    """添加游戏到 Notion（data 为预先构建的页面数据）"""
+    if data is None:
+        data = build_page_data(game, achievements_info, steam_store_data, database_id=acct.account.games_database_id)
     
     try:
-        response = send_request_with_retry(url, headers=headers, json_data=data, method="post")
+        with metrics.timer("notion.write"):
+            page = acct.notion.create_page(data)
+        _record_written_page(acct, page)
         logger.info(f"✓ 已添加: {game['name']}")
         return True
     except Exception as e:
@@ -354,26 +385,49 @@ def add_game_to_notion(game, achievements_info, steam_store_data):
         return False
 
 
-def update_game_in_notion(page_id, game, achievements_info, steam_store_data, force_update=None):
-    """更新游戏信息在 Notion"""
-    url = f"https://api.notion.com/v1/pages/{page_id}"
-    headers = {
-        "Authorization": f"Bearer {NOTION_API_KEY}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-
+def build_update_diff(acct, page_id, game, achievements_info, steam_store_data, force_update=None):
+    """构建更新属性，并去掉与 Notion 当前值相同的字段"""
     if force_update is None:
         force_update = enable_full_update
 
     properties = build_update_properties(game, achievements_info, steam_store_data, full_update=force_update)
+    entry = acct.notion_index.get(page_id)
+    if entry and entry.get("appid") is None:
+        # 按名称匹配到的旧页面：补写 appid，之后游戏改名也能按 appid 匹配
+        properties[get_property_name("appid")] = {
+            "type": "rich_text",
+            "rich_text": [{"type": "text", "text": {"content": str(game["appid"])}}]
+        }
+    if entry and "values" in entry:
+        properties = diff_properties(properties, entry["values"])
+    return properties
+
+
+def update_game_in_notion(acct, page_id, game, achievements_info, steam_store_data, force_update=None, properties=None):
+    """
+    更新游戏信息在 Notion（只 PATCH 有变化的字段），返回是否成功；
+    页面已归档或删除时返回 None（已从本地镜像移除）
+    """
+    if properties is None:
+        properties = build_update_diff(acct, page_id, game, achievements_info, steam_store_data, force_update)
+    if not properties:
+        logger.info(f"⊘ 无变化，跳过更新: {game['name']}")
+        return True
+
     data = {"properties": properties}
     
     try:
-        response = send_request_with_retry(url, headers=headers, json_data=data, method="patch")
+        with metrics.timer("notion.write"):
+            page = acct.notion.update_page(page_id, data)
+        _record_written_page(acct, page)
         logger.info(f"✓ 已更新: {game['name']}")
         return True
     except Exception as e:
+        if _page_gone(e):
+            # 从本地镜像中移除，之后按 "不在 Notion 中" 重新添加
+            acct.notion_index.remove(page_id)
+            logger.warning(f"✗ 页面已归档或删除，将重新添加: {game['name']}")
+            return None
         logger.error(f"✗ 更新失败: {game['name']} - {e}")
         return False
 
@@ -399,25 +453,64 @@ def should_record_game(game, achievements_info):
     return True
 
 
-def _fetch_game_details(game):
-    """获取成就与商店信息（仅在需要时调用）"""
-    achievements_data = get_achievements_from_steam(game, STEAM_API_KEY, STEAM_USER_ID)
+def _get_store_info(appid, country="CN", language="schinese", groups=None):
+    """获取商店信息（只请求缓存已过期字段组对应的数据来源，锁区时使用记住的其他地区）"""
+    return store_service.get_with_fallback(appid, country=country, language=language, groups=groups)
+
+
+def _get_achievements_info(acct, game, owned=True):
+    """
+    获取成就信息：游玩时间与上次相同时复用缓存的进度，没有成就统计的游戏不再请求。
+    owned=False（未拥有的游戏）时不记录"没有成就"，避免把账号相关的错误当成游戏本身没有成就。
+    """
+    steam_user_id = acct.account.steam_user_id
+    appid = int(game["appid"])
+    playtime = game.get("playtime_forever") if owned else None
+
+    if achievements_cache.get_total(appid) == 0:
+        metrics.hit("achievements_cache", True)
+        return parse_achievements_info(None)
+    cached = achievements_cache.get_progress(steam_user_id, appid)
+    if cached is not None and playtime is not None and cached[0] == playtime:
+        metrics.hit("achievements_cache", True)
+        return cached[1]
+    metrics.hit("achievements_cache", False)
+
+    with _steam_api_slots, metrics.timer("steam.achievements"):
+        achievements_data = get_achievements_from_steam(game, acct.account.steam_api_key, steam_user_id)
     achievements_info = parse_achievements_info(achievements_data)
-    steam_store_data = get_steam_store_info(game["appid"])
-    if steam_store_data.get("tag") == []:
-        steam_store_data = get_steam_store_info(game["appid"], country="SG")
+    if achievements_data is None:
+        # 请求失败：沿用上次的进度，避免把成就数写成 -1
+        return cached[1] if cached is not None else achievements_info
+    if achievements_data.get("playerstats", {}).get("success"):
+        achievements_cache.put_progress(steam_user_id, appid, playtime, achievements_info)
+    elif owned and achievements_unavailable(achievements_data):
+        achievements_cache.mark_no_achievements(appid)
+    return achievements_info
+
+
+def _fetch_game_details(acct, game, mode="full"):
+    """按更新模式获取所需的成就与商店信息（不需要的数据源不会请求）"""
+    need_achievements, store_groups = get_required_sources(mode)
+
+    achievements_info = parse_achievements_info(None)
+    if need_achievements:
+        achievements_info = _get_achievements_info(acct, game)
+
+    steam_store_data = {}
+    if store_groups:
+        steam_store_data = _get_store_info(game["appid"], groups=store_groups)
     return achievements_info, steam_store_data
 
 
-def _create_daily_record(game_name, playtime_today_minutes, playtime_forever_minutes, page_id, record_date):
-    """创建每日游玩记录"""
-    url = "https://api.notion.com/v1/pages"
+def _create_daily_record(acct, game_name, playtime_today_minutes, playtime_forever_minutes, page_id, record_date):
+    """创建每日游玩记录，返回新页面 id"""
     record_date_str = record_date or datetime.now().date().isoformat()
 
     data = {
         "parent": {
             "type": "database_id",
-            "database_id": NOTION_DAILY_RECORDS_DB_ID,
+            "database_id": acct.account.daily_database_id,
         },
         "icon": {
             "type": "emoji",
@@ -455,158 +548,522 @@ def _create_daily_record(game_name, playtime_today_minutes, playtime_forever_min
         }
     }
 
-    headers = {
-        "Authorization": f"Bearer {NOTION_API_KEY}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
+    with metrics.timer("notion.daily_write"):
+        page = acct.notion.create_page(data)
+    logger.info(f"✓ 已记录每日游玩: {game_name} - {playtime_today_minutes}min (累计: {playtime_forever_minutes}min)")
+    return page.get("id")
+
+
+def _update_daily_record(acct, record_id, playtime_today_minutes, playtime_forever_minutes):
+    """更新已有每日记录的游玩时间"""
+    data = {
+        "properties": {
+            get_property_name("playtime", is_daily=True): {
+                "type": "number",
+                "number": playtime_today_minutes
+            },
+            get_property_name("playtime_forever", is_daily=True): {
+                "type": "number",
+                "number": playtime_forever_minutes
+            }
+        }
     }
 
-    send_request_with_retry(url, headers=headers, json_data=data, method="post")
-    logger.info(f"✓ 已记录每日游玩: {game_name} - {playtime_today_minutes}min (累计: {playtime_forever_minutes}min)")
+    with metrics.timer("notion.daily_write"):
+        acct.notion.update_page(record_id, data)
+
+
+def _write_daily_record(acct, game_name, playtime_today_minutes, playtime_forever_minutes, page_id, record_date):
+    """写入每日游玩记录：同一游戏同一天已有记录时合并分钟数，记录已包含本次游玩时跳过"""
+    record_date = record_date or datetime.now().date().isoformat()
+    existing = acct.daily_index.get(page_id, record_date)
+
+    if existing is None:
+        record_id = _create_daily_record(
+            acct, game_name, playtime_today_minutes, playtime_forever_minutes, page_id, record_date
+        )
+        acct.daily_index.put(page_id, record_date, {
+            "record_id": record_id,
+            "playtime": playtime_today_minutes,
+            "playtime_forever": playtime_forever_minutes,
+        })
+        return
+
+    # 累计时间不小于本次的值，说明这段游玩已经记录过（重复运行或续跑）
+    if existing["playtime_forever"] >= playtime_forever_minutes:
+        logger.info(f"⊘ 每日记录已存在，跳过: {game_name} ({record_date})")
+        return
+
+    merged_minutes = existing["playtime"] + playtime_today_minutes
+    _update_daily_record(acct, existing["record_id"], merged_minutes, playtime_forever_minutes)
+    acct.daily_index.put(page_id, record_date, dict(
+        existing, playtime=merged_minutes, playtime_forever=playtime_forever_minutes
+    ))
+    logger.info(f"✓ 已合并每日游玩: {game_name} - {merged_minutes}min (累计: {playtime_forever_minutes}min)")
 
 
 # ==================== MAIN ====================
-def sync_games_to_notion(sync_daily=False):
-    """同步 Steam 游戏到 Notion"""
-    logger.info("=" * 50)
-    logger.info("开始同步 Steam 游戏到 Notion")
-    logger.info("=" * 50)
+def _checkpoint(ctx, stage, **kwargs):
+    """记录游戏的处理进度（未启用运行日志时不记录）"""
+    if ctx.get("run_id") is not None:
+        sync_journal.record(ctx["run_id"], ctx["change"], stage, **kwargs)
+    ctx["stage"] = stage
+
+
+def _stage_reached(ctx, stage):
+    return STAGES.index(ctx.get("stage", STAGE_PLANNED)) >= STAGES.index(stage)
+
+
+def _stage_fetch(ctx):
+    """流水线阶段 1：按更新模式获取成就与商店信息"""
+    change = ctx["change"]
+    if change["action"] == "skip":
+        ctx["result"] = "skipped"
+        return None
+    if _stage_reached(ctx, STAGE_FETCHED):
+        return ctx
+
+    mode = "full" if change["action"] == "add" or enable_full_update else "core"
+    ctx["details"] = _fetch_game_details(ctx["acct"], change["game"], mode)
+    _checkpoint(ctx, STAGE_FETCHED, details=ctx["details"])
+    return ctx
+
+
+def _stage_build(ctx):
+    """流水线阶段 2：构建新增页面数据或更新属性（无变化时提前结束）"""
+    change = ctx["change"]
+    game = change["game"]
+    achievements_info, steam_store_data = ctx["details"]
+    if _stage_reached(ctx, STAGE_WRITTEN):
+        return ctx
+
+    if change["action"] == "add":
+        ctx["data"] = build_page_data(
+            game, achievements_info, steam_store_data, database_id=ctx["acct"].account.games_database_id
+        )
+        return ctx
+
+    properties = build_update_diff(
+        ctx["acct"], change["page_id"], game, achievements_info, steam_store_data, force_update=enable_full_update
+    )
+    if not properties:
+        logger.info(f"⊘ 无变化，跳过更新: {game['name']}")
+        ctx["result"] = "skipped"
+        _checkpoint(ctx, STAGE_DONE)
+        return None
+    ctx["data"] = properties
+    return ctx
+
+
+def _stage_write(ctx, sync_daily):
+    """流水线阶段 3：写入 Notion（含每日记录）"""
+    acct = ctx["acct"]
+    change = ctx["change"]
+    game = change["game"]
+    game_name = game["name"]
+    achievements_info, steam_store_data = ctx["details"]
+
+    if change["action"] == "add":
+        # 游戏不存在 -> 新增
+        if not _stage_reached(ctx, STAGE_WRITTEN):
+            if not add_game_to_notion(acct, game, achievements_info, steam_store_data, data=ctx["data"]):
+                ctx["result"] = "failed"
+                return ctx
+            _checkpoint(ctx, STAGE_DONE)
+        ctx["result"] = "added"
+        return ctx
+
+    # 游戏已存在 -> 更新
+    page_id = change["page_id"]
+    if not _stage_reached(ctx, STAGE_WRITTEN):
+        written = update_game_in_notion(acct, page_id, game, achievements_info, steam_store_data, properties=ctx["data"])
+        if not written:
+            ctx["result"] = "failed"
+            if written is None:
+                # 页面已归档或删除：改为新增，续跑或下次运行时重新添加
+                ctx["change"] = dict(change, action="add", reason="not_in_notion", page_id=None)
+                _checkpoint(ctx, STAGE_PLANNED)
+            return ctx
+        _checkpoint(ctx, STAGE_WRITTEN)
+    ctx["result"] = "updated"
 
-    if sync_daily and not NOTION_DAILY_RECORDS_DB_ID:
-        logger.warning("未配置 NOTION_DAILY_RECORDS_DB_ID，跳过每日记录同步")
+    if sync_daily and acct.account.daily_database_id:
+        previous_minutes = int(change.get("previous_minutes") or 0)
+        current_minutes = int(game.get("playtime_forever", 0))
+        playtime_today_minutes = current_minutes - previous_minutes
+        if playtime_today_minutes > 0:
+            allocations = _split_playtime_by_date(
+                game.get("rtime_last_played"),
+                playtime_today_minutes,
+                TIMEZONE,
+            )
+            if not allocations:
+                game_last_played_date = format_timestamp(game.get("rtime_last_played"), TIMEZONE, date_only=True)
+                allocations = [(game_last_played_date, playtime_today_minutes)]
+
+            daily_done = ctx.setdefault("daily_done", [])
+            for record_date, minutes in allocations:
+                if record_date in daily_done:
+                    continue
+                _write_daily_record(
+                    acct,
+                    game_name,
+                    minutes,
+                    current_minutes,
+                    page_id,
+                    record_date,
+                )
+                daily_done.append(record_date)
+                _checkpoint(ctx, STAGE_WRITTEN, daily_done=daily_done)
+    _checkpoint(ctx, STAGE_DONE)
+    return ctx
+
+
+def _journaled_changes(acct, changes, run_id, entries):
+    """为变更附加运行日志中的进度；日志中有记录的游戏沿用上次的变更（保留原始游玩时间等）"""
+    for change in changes:
+        entry = entries.pop(change["appid"], None)
+        if entry is None:
+            if change["action"] != "skip":
+                ctx = {"acct": acct, "change": change, "run_id": run_id}
+                _checkpoint(ctx, STAGE_PLANNED)
+                yield ctx
+            else:
+                yield {"acct": acct, "change": change}
+            continue
+        yield _resumed_context(acct, entry, run_id)
+
+    # 本次计划中已不存在、但上次未完成的游戏
+    for entry in entries.values():
+        yield _resumed_context(acct, entry, run_id)
+
+
+def _resumed_context(acct, entry, run_id):
+    ctx = {"acct": acct, "change": entry["change"], "run_id": run_id, "stage": entry["stage"],
+           "daily_done": entry["daily_done"]}
+    if entry["details"] is not None:
+        ctx["details"] = entry["details"]
+    if entry["stage"] == STAGE_DONE:
+        ctx["change"] = dict(entry["change"], action="skip")
+    return ctx
+
+
+class SyncIncompleteError(RuntimeError):
+    """部分游戏写入 Notion 失败：运行日志保留（可 --resume 重试），同步水位不推进"""
+
+
+def apply_changes(acct, changes, sync_daily=False, journal_scope=None, resume=False):
+    """
+    让变更流过 获取详情 -> 构建属性 -> 写入 Notion 流水线，返回 (新增数, 更新数, 跳过数)。
+    指定 journal_scope 时记录运行日志，resume=True 时跳过上次未完成运行中已完成的步骤。
+    有游戏写入失败时抛出 SyncIncompleteError（运行日志不清理）。
+    """
+    if sync_daily and not acct.account.daily_database_id:
+        logger.warning(f"账号 {acct.name} 未配置每日记录数据库，跳过每日记录同步")
         sync_daily = False
-    
+
+    run_id, entries = None, {}
+    if journal_scope:
+        run_id, resumed = sync_journal.start(journal_scope, resume=resume)
+        if resumed:
+            entries = sync_journal.entries(run_id)
+
+    counts = {"added": 0, "updated": 0, "skipped": 0, "failed": 0}
+    errors = []
+
+    def on_done(ctx, error):
+        if error is not None:
+            errors.append(error)
+            return
+        result = ctx.get("result")
+        if result in counts:
+            counts[result] += 1
+
+    stages = [
+        PipelineStage("fetch", _stage_fetch, workers=SYNC_WORKERS, queue_size=SYNC_QUEUE_SIZE),
+        PipelineStage("build", _stage_build, workers=SYNC_BUILD_WORKERS, queue_size=SYNC_QUEUE_SIZE),
+        PipelineStage("write", lambda ctx: _stage_write(ctx, sync_daily),
+                      workers=NOTION_CONCURRENCY, queue_size=SYNC_QUEUE_SIZE),
+    ]
+    if run_id is None:
+        items = ({"acct": acct, "change": change} for change in changes)
+    else:
+        items = _journaled_changes(acct, changes, run_id, entries)
+    run_pipeline(items, stages, on_done)
+
+    for result, count in counts.items():
+        metrics.incr(f"games.{result}", count)
+    if errors:
+        raise errors[0]
+    if counts["failed"]:
+        raise SyncIncompleteError(
+            f"{counts['failed']} 个游戏写入失败（新增: {counts['added']}, 更新: {counts['updated']}），"
+            f"未推进同步水位{'，可使用 --resume 重试' if run_id is not None else ''}"
+        )
+    if run_id is not None:
+        sync_journal.finish(run_id)
+    return counts["added"], counts["updated"], counts["skipped"]
+
+
+def _load_sync_inputs(acct, games=None):
+    """拉取 Steam 游戏列表与 Notion 索引，失败返回 None"""
     # 获取 Steam 游戏列表
-    games = get_owned_games_from_steam(STEAM_API_KEY, STEAM_USER_ID, include_played_free_games)
+    if games is None:
+        with metrics.timer("steam.owned_games"):
+            games = get_owned_games_from_steam(
+                acct.account.steam_api_key, acct.account.steam_user_id, include_played_free_games
+            )
+        if not games:
+            logger.error("未获取到游戏列表")
+            return None
+        # 保存完整游戏库，之后的 add 直接使用其中的游玩时间与图标
+        owned_games_cache.update(acct.account.steam_user_id, games, replace=True)
+
+    # 一次性查询 Notion 中所有游戏
+    notion_games_map = query_all_games_from_notion(acct)
+    return games, notion_games_map
+
+
+# 最近游玩列表只覆盖两周，超过这个间隔没有同步时必须全量对账
+RECENT_GAMES_WINDOW = 14 * 86400
+
+
+def _state_key(acct, name):
+    return f"steam:{acct.account.steam_user_id}:{name}"
+
+
+def _full_reconcile_due(acct):
+    """是否需要全量对账：从未同步过、距上次全量同步超过 FULL_RECONCILE_DAYS，或超出最近游玩列表的覆盖范围"""
+    now = time.time()
+    last_full = sync_state.get(_state_key(acct, "last_full_sync"))
+    last_sync = sync_state.get(_state_key(acct, "last_sync"))
+    if last_full is None or sync_state.get(_state_key(acct, "last_played_watermark")) is None:
+        return True
+    if now - last_full > FULL_RECONCILE_DAYS * 86400:
+        return True
+    return last_sync is None or now - last_sync > RECENT_GAMES_WINDOW
+
+
+def _load_recent_games(acct):
+    """增量模式：只返回上次同步后玩过的游戏，失败返回 None"""
+    with metrics.timer("steam.recent_games"):
+        recent = get_steam_recent_games(acct.account.steam_api_key, acct.account.steam_user_id)
+    if recent is None:
+        # 请求失败与"没有玩过"不同：不能推进 last_sync，否则会掩盖最近游玩列表的两周覆盖范围
+        logger.error("未获取到最近游玩列表")
+        return None
+    if not recent:
+        return []
+
+    # 最近游玩列表不含 rtime_last_played，只取这些游戏的完整信息
+    with metrics.timer("steam.owned_games"):
+        games = get_owned_games_from_steam(
+            acct.account.steam_api_key, acct.account.steam_user_id, include_played_free_games,
+            appids=[game["appid"] for game in recent],
+        )
     if not games:
-        logger.error("未获取到游戏列表")
+        logger.error("未获取到最近游玩游戏的信息")
+        return None
+    owned_games_cache.update(acct.account.steam_user_id, games)
+
+    watermark = sync_state.get(_state_key(acct, "last_played_watermark"), 0)
+    return [game for game in games if (game.get("rtime_last_played") or 0) >= watermark]
+
+
+def _record_sync_state(acct, games, full):
+    """同步全部成功后推进 rtime_last_played 水位"""
+    now = int(time.time())
+    watermark = sync_state.get(_state_key(acct, "last_played_watermark"), 0)
+    watermark = max([watermark] + [game.get("rtime_last_played") or 0 for game in games])
+    sync_state.set(_state_key(acct, "last_played_watermark"), watermark)
+    sync_state.set(_state_key(acct, "last_sync"), now)
+    if full:
+        sync_state.set(_state_key(acct, "last_full_sync"), now)
+
+
+def build_sync_plan(acct):
+    """生成同步计划（不获取详情、不写入），失败返回 None"""
+    inputs = _load_sync_inputs(acct)
+    if inputs is None:
+        return None
+    return plan_sync(*inputs)
+
+
+def apply_plan(acct, plan, sync_daily=False, journal_scope=None, resume=False):
+    """执行同步计划，返回 (新增数, 更新数, 跳过数)"""
+    return apply_changes(acct, plan["changes"], sync_daily=sync_daily, journal_scope=journal_scope, resume=resume)
+
+
+def sync_games_to_notion(acct, sync_daily=False, incremental=False, resume=False):
+    """同步 Steam 游戏到 Notion（incremental=True 时只处理上次同步后玩过的游戏，resume=True 时从上次中断处继续）"""
+    logger.info("=" * 50)
+    logger.info(f"开始同步 Steam 游戏到 Notion（账号: {acct.name}）")
+    logger.info("=" * 50)
+
+    full = not incremental or _full_reconcile_due(acct)
+    if incremental and full:
+        logger.info("执行全量对账")
+
+    games = None
+    if not full:
+        games = _load_recent_games(acct)
+        if games is None:
+            return
+        logger.info(f"增量同步，上次同步后玩过的游戏: {len(games)}")
+
+    inputs = _load_sync_inputs(acct, games)
+    if inputs is None:
         return
-    
-    # 一次性查询 Notion 中所有游戏
-    notion_games_map = query_all_games_from_notion()
-    
-    added_count = 0
-    updated_count = 0
-    skipped_count = 0
-    
-    for idx, game in enumerate(games, 1):
-        game_name = game["name"]
-        
-        # 在本地查找游戏
-        game_key = (game_name, "Steam")
-        notion_game = notion_games_map.get(game_key)
-        
-        if notion_game:
-            # 游戏已存在 -> 更新
-            if enable_item_update and (game.get("rtime_last_played") > 0):
-                page_id = notion_game["page_id"]
-                last_play = notion_game["last_play"]
-                game_last_played = format_timestamp(game.get("rtime_last_played"), TIMEZONE, date_only=False)
-                game_last_played_date = format_timestamp(game.get("rtime_last_played"), TIMEZONE, date_only=True)
-                previous_minutes = int(notion_game.get("playtime", 0) or 0)
-                current_minutes = int(game.get("playtime_forever", 0))
-                
-                if last_play != game_last_played or previous_minutes != current_minutes:
-                    achievements_info, steam_store_data = _fetch_game_details(game)
-                    if update_game_in_notion(page_id, game, achievements_info, steam_store_data):
-                        updated_count += 1
-                        if sync_daily and NOTION_DAILY_RECORDS_DB_ID:
-                            playtime_today_minutes = current_minutes - previous_minutes
-                            if playtime_today_minutes > 0:
-                                allocations = _split_playtime_by_date(
-                                    game.get("rtime_last_played"),
-                                    playtime_today_minutes,
-                                    TIMEZONE,
-                                )
-                                if not allocations:
-                                    allocations = [(game_last_played_date, playtime_today_minutes)]
-
-                                for record_date, minutes in allocations:
-                                    _create_daily_record(
-                                        game_name,
-                                        minutes,
-                                        current_minutes,
-                                        page_id,
-                                        record_date,
-                                    )
-                else:
-                    skipped_count += 1
-            else:
-                skipped_count += 1
-        else:
-            # 游戏不存在 -> 新增
-            achievements_info, steam_store_data = _fetch_game_details(game)
-            if add_game_to_notion(game, achievements_info, steam_store_data):
-                added_count += 1
-        
-        time.sleep(0.3)  # API 限制
+
+    # 边计划边执行：变更逐个进入流水线，各阶段的网络等待互相重叠
+    added_count, updated_count, skipped_count = apply_changes(
+        acct, iter_plan(*inputs), sync_daily=sync_daily,
+        journal_scope=f"sync:{acct.account.steam_user_id}", resume=resume,
+    )
+    _record_sync_state(acct, inputs[0], full)
     
+    logger.info("\n" + "=" * 50)
+    logger.info(f"同步完成（账号: {acct.name}）! 新增: {added_count}, 更新: {updated_count}, 跳过: {skipped_count}")
+    logger.info("=" * 50)
+
+
+def write_sync_plan(acct, path):
+    """生成同步计划并保存为 JSON"""
+    plan = build_sync_plan(acct)
+    if plan is None:
+        return False
+
+    save_plan(plan, path)
+    summary = summarize_plan(plan)
+    for change in plan["changes"]:
+        if change["action"] != "skip":
+            logger.debug(f"  {change['action']:<6} {change['appid']:>10}  {change['name']}  ({change['reason']})")
+    logger.info(f"✓ 同步计划已保存到 {path}: 新增 {summary['add']}, 更新 {summary['update']}, 跳过 {summary['skip']}")
+    return True
+
+
+def apply_sync_plan(acct, path, sync_daily=False, shard=None, resume=False):
+    """读取并执行已保存的同步计划（shard 为 (index, count) 时只执行其中一份）"""
+    plan = load_plan(path)
+    scope = f"apply:{plan['created_at']}"
+    if shard:
+        plan = shard_plan(plan, *shard)
+        scope += f":{shard[0] + 1}/{shard[1]}"
+
+    logger.info(f"开始执行同步计划: {path} ({len(plan['changes'])} 项)")
+    # 计划可能由其他进程或更早的时候生成，先刷新本地镜像，避免按过期的属性值计算差异
+    query_all_games_from_notion(acct)
+    added_count, updated_count, skipped_count = apply_plan(
+        acct, plan, sync_daily=sync_daily, journal_scope=scope, resume=resume
+    )
+
     logger.info("\n" + "=" * 50)
     logger.info(f"同步完成! 新增: {added_count}, 更新: {updated_count}, 跳过: {skipped_count}")
     logger.info("=" * 50)
 
 
+# GetOwnedGames 按 appids_filter 查询时每次请求的 appid 数量（避免 URL 过长）
+OWNED_GAMES_BATCH_SIZE = 100
+
+
+def _get_owned_games(acct, appids):
+    """
+    获取指定游戏的 GetOwnedGames 信息 {appid: game}（未拥有的游戏不包含在内）。
+    优先使用缓存，未命中或已过期时只按 appids_filter 分批查询这些游戏，不拉取整个游戏库。
+    """
+    steam_user_id = acct.account.steam_user_id
+    found, missing = owned_games_cache.lookup(steam_user_id, appids)
+    for appid in appids:
+        metrics.hit("owned_games_cache", appid not in missing)
+    for start in range(0, len(missing), OWNED_GAMES_BATCH_SIZE):
+        batch = missing[start:start + OWNED_GAMES_BATCH_SIZE]
+        with _steam_api_slots, metrics.timer("steam.owned_games"):
+            games = get_owned_games_from_steam(
+                acct.account.steam_api_key, steam_user_id, include_played_free_games, appids=batch
+            )
+        if games is None:
+            # 请求失败时不能把这些游戏记为未拥有，否则之后会用 0 覆盖真实的游玩时间
+            raise RuntimeError("获取已拥有游戏信息失败")
+        owned_games_cache.update(steam_user_id, games, requested=batch)
+        found.update({int(game["appid"]): game for game in games})
+    return {appid: game for appid, game in found.items() if game is not None}
+
+
+def _fetch_appid_details(acct, appid, owned=None):
+    """
+    获取指定 appid 的成就与商店信息，返回 (game, achievements_info, steam_store_data)；未找到时返回 None。
+    owned 为该游戏的 GetOwnedGames 信息（已拥有时），用于填写真实的游玩时间与图标。
+    """
+    achievements_info = _get_achievements_info(acct, dict(owned or {}, appid=appid), owned=bool(owned))
+    steam_store_data = _get_store_info(appid)
+
+    if owned:
+        # 与 sync 使用相同的名称，保证对应到同一个 Notion 页面
+        return dict(owned, appid=appid), achievements_info, steam_store_data
+
+    game_name = steam_store_data.get("game_name", f"AppID_{appid}")
+    if not game_name:
+        return None
+
+    # 未拥有的游戏：构建基础游戏信息
+    game = {
+        "appid": appid,
+        "name": game_name,
+        "playtime_forever": 0,
+        "rtime_last_played": 0,
+        "img_icon_url": ""
+    }
+    return game, achievements_info, steam_store_data
+
+
+def _write_appid(acct, game, achievements_info, steam_store_data, notion_games_map):
+    """新增或强制更新单个游戏，返回 "added" / "updated"，失败返回 None"""
+    game_name = game["name"]
+    notion_game = notion_games_map.find("Steam", appid=game["appid"], name=game_name)
+
+    if notion_game:
+        # 游戏已存在 -> 强制更新
+        logger.info(f"游戏已存在于 Notion，执行强制更新: {game_name}")
+        page_id = notion_game["page_id"]
+        if update_game_in_notion(acct, page_id, game, achievements_info, steam_store_data, force_update=True):
+            logger.info("✓ 强制更新成功")
+            return "updated"
+        logger.error("✗ 强制更新失败")
+        return None
+
+    # 游戏不存在 -> 新增
+    logger.info(f"游戏不存在，新增到 Notion: {game_name}")
+    if add_game_to_notion(acct, game, achievements_info, steam_store_data):
+        logger.info("✓ 新增成功")
+        return "added"
+    logger.error("✗ 新增失败")
+    return None
+
 
-def add_single_game_by_appid(appid):
+def add_single_game_by_appid(acct, appid):
     """通过 appid 添加或更新单个游戏"""
     logger.info("=" * 50)
     logger.info(f"开始处理游戏 (AppID: {appid})")
     logger.info("=" * 50)
     
     try:
-        # 获取游戏的成就信息和商店信息
-        achievements_data = get_achievements_from_steam({"appid": appid}, STEAM_API_KEY, STEAM_USER_ID)
-        achievements_info = parse_achievements_info(achievements_data)
-        steam_store_data = get_steam_store_info(appid)
-        if steam_store_data["tag"] == []:
-            steam_store_data = get_steam_store_info(appid, country="SG")
-        
-        game_name = steam_store_data.get("game_name", f"AppID_{appid}")
-        if not game_name:
+        owned = _get_owned_games(acct, [appid]).get(appid)
+        details = _fetch_appid_details(acct, appid, owned)
+        if details is None:
             logger.error(f"✗ 未找到 AppID {appid} 的游戏信息")
             return False
-        
-        # 构建基础游戏信息
-        game = {
-            "appid": appid,
-            "name": game_name,
-            "playtime_forever": 0,
-            "rtime_last_played": 0,
-            "img_icon_url": ""
-        }
-        
+
         # 查询 Notion 中的游戏
-        notion_games_map = query_all_games_from_notion()
-        game_key = (game_name, "Steam")
-        notion_game = notion_games_map.get(game_key)
-        
-        if notion_game:
-            # 游戏已存在 -> 强制更新
-            logger.info(f"游戏已存在于 Notion，执行强制更新: {game_name}")
-            page_id = notion_game["page_id"]
-            if update_game_in_notion(page_id, game, achievements_info, steam_store_data, force_update=True):
-                logger.info("✓ 强制更新成功")
-                return True
-            else:
-                logger.error("✗ 强制更新失败")
-                return False
-        else:
-            # 游戏不存在 -> 新增
-            logger.info(f"游戏不存在，新增到 Notion: {game_name}")
-            if add_game_to_notion(game, achievements_info, steam_store_data):
-                logger.info("✓ 新增成功")
-                return True
-            else:
-                logger.error("✗ 新增失败")
-                return False
+        notion_games_map = query_all_games_from_notion(acct)
+        return _write_appid(acct, *details, notion_games_map) is not None
     
     except Exception as e:
         logger.error(f"处理游戏失败: {e}")
         return False
 
 
-def add_multiple_games_by_appids(appids_str):
-    """通过多个 appid 添加或更新游戏（支持逗号分隔）"""
+def add_multiple_games_by_appids(acct, appids_str):
+    """通过多个 appid 批量添加或更新游戏（支持逗号分隔）"""
     # 解析 appid 列表
     try:
         appids = [int(aid.strip()) for aid in appids_str.split(',')]
@@ -614,35 +1071,232 @@ def add_multiple_games_by_appids(appids_str):
         logger.error(f"✗ AppID 格式错误: {e}")
         logger.info("用法: python notion_game_list.py add 387290,24534,5501")
         return False
+    appids = list(dict.fromkeys(appids))  # 去重并保持顺序
     
     logger.info(f"开始处理 {len(appids)} 个游戏")
-    success_count = 0
-    
-    for idx, appid in enumerate(appids, 1):
-        logger.info(f"\n[{idx}/{len(appids)}] 处理 AppID: {appid}")
-        if add_single_game_by_appid(appid):
-            success_count += 1
-        time.sleep(0.5)  # API 限制
-    
+    results = {}  # {appid: (状态, 游戏名)}
+
+    # 1) Notion 索引只加载一次
+    notion_games_map = query_all_games_from_notion(acct)
+
+    # 2) 游玩时间与价格批量预取，再并发获取所有 appid 的 Steam 数据
+    try:
+        owned_games = _get_owned_games(acct, appids)
+    except Exception as e:
+        # 不知道是否拥有时不能写入（未拥有的游戏按游玩时间 0 写入，会覆盖真实数据）
+        logger.error(f"✗ {e}，已取消本次添加")
+        return False
+    try:
+        store_service.prefetch_prices(appids)
+    except Exception as e:
+        logger.warning(f"批量获取价格失败: {e}")
+
+    def fetch(appid):
+        try:
+            return _fetch_appid_details(acct, appid, owned_games.get(appid))
+        except Exception as e:
+            logger.error(f"获取 AppID {appid} 信息失败: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, SYNC_WORKERS)) as executor:
+        details_list = list(executor.map(fetch, appids))
+
+    pending = []
+    for appid, details in zip(appids, details_list):
+        if details is None:
+            results[appid] = ("未找到", "")
+        else:
+            pending.append((appid, details))
+
+    # 3) 写入 Notion（并发受 NOTION_CONCURRENCY 与限流器约束）
+    def write(item):
+        appid, details = item
+        try:
+            return _write_appid(acct, *details, notion_games_map)
+        except Exception as e:
+            logger.error(f"写入 AppID {appid} 失败: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, NOTION_CONCURRENCY)) as executor:
+        for (appid, details), result in zip(pending, executor.map(write, pending)):
+            status = {"added": "新增", "updated": "更新"}.get(result, "失败")
+            results[appid] = (status, details[0]["name"])
+
+    # 4) 逐个 appid 汇报结果
+    success_count = sum(1 for status, _ in results.values() if status in ("新增", "更新"))
     logger.info("\n" + "=" * 50)
+    for appid in appids:
+        status, game_name = results[appid]
+        logger.info(f"  {appid:>10}  {status}  {game_name}")
     logger.info(f"处理完成! 成功: {success_count}/{len(appids)}")
     logger.info("=" * 50)
     return success_count == len(appids)
 
 
+def _move_daily_records(acct, from_page_id, to_page_id):
+    """把关联到 from_page_id 的每日记录改为关联 to_page_id，返回修改的记录数"""
+    relation_name = get_property_name("game_name", is_daily=True)
+    payload = {"page_size": 100, "filter": {"property": relation_name, "relation": {"contains": from_page_id}}}
+    records = []
+    next_cursor = None
+    has_more = True
+    while has_more:
+        data = dict(payload, start_cursor=next_cursor) if next_cursor else payload
+        result = acct.notion.query_database(acct.account.daily_database_id, data)
+        records.extend(result.get("results", []))
+        has_more = result.get("has_more", False)
+        next_cursor = result.get("next_cursor")
+
+    for record in records:
+        relation = record.get("properties", {}).get(relation_name, {}).get("relation") or []
+        page_ids = [item["id"] for item in relation if item.get("id") != from_page_id]
+        if to_page_id not in page_ids:
+            page_ids.append(to_page_id)
+        acct.notion.update_page(record["id"], {"properties": {
+            relation_name: {"relation": [{"id": page_id} for page_id in page_ids]},
+        }})
+    return len(records)
+
+
+def dedupe_notion_games(acct, dry_run=False):
+    """
+    合并重复的游戏页面：同一 appid（或同名且没有 appid）的多个页面只保留一个，
+    其余页面的每日记录改为关联保留的页面，然后归档。返回归档的页面数。
+    """
+    groups = query_all_games_from_notion(acct).duplicates()
+    if not groups:
+        logger.info("✓ 没有重复的游戏页面")
+        return 0
+
+    archived = 0
+    for entries in groups.values():
+        keep, extras = entries[0], entries[1:]
+        logger.info(f"{keep['name']} (appid: {keep.get('appid') or '-'}): 保留 {keep['page_id']}，"
+                    f"重复页面: {', '.join(e['page_id'] for e in extras)}")
+        if dry_run:
+            continue
+        for extra in extras:
+            try:
+                if acct.account.daily_database_id:
+                    moved = _move_daily_records(acct, extra["page_id"], keep["page_id"])
+                    if moved:
+                        logger.info(f"  已迁移 {moved} 条每日记录")
+                page = acct.notion.update_page(extra["page_id"], {"archived": True})
+                _record_written_page(acct, page)
+                archived += 1
+            except Exception as e:
+                logger.error(f"  归档 {extra['page_id']} 失败: {e}")
+
+    if dry_run:
+        logger.info(f"重复游戏: {len(groups)}，待归档页面: {sum(len(e) - 1 for e in groups.values())}（--dry-run，未修改）")
+    else:
+        logger.info(f"去重完成! 重复游戏: {len(groups)}，已归档页面: {archived}")
+    return archived
+
+
+def report_store_status():
+    """列出商店信息持续查询失败的游戏（下架 / 锁区、需要年龄验证、请求失败），返回游戏数"""
+    entries = store_status.report()
+    if not entries:
+        logger.info("✓ 没有商店信息查询失败的游戏")
+        return 0
+
+    labels = {"unavailable": "下架/锁区", "agecheck": "年龄验证", "error": "请求失败"}
+    now = time.time()
+    logger.info(f"商店信息查询失败的游戏: {len(entries)}")
+    logger.info(f"{'AppID':>10}  {'原因':<10} {'连续失败':>8} {'持续(天)':>8}  {'上次查询':<16}")
+    for entry in entries:
+        days = (now - entry["first_failed_at"]) / 86400 if entry["first_failed_at"] else 0
+        checked = datetime.fromtimestamp(entry["updated_at"], tz=_get_tzinfo(TIMEZONE)).strftime("%Y-%m-%d %H:%M")
+        logger.info(f"{entry['appid']:>10}  {labels.get(entry['state'], entry['state']):<10} "
+                    f"{entry['failures']:>8} {days:>8.1f}  {checked:<16}")
+    return len(entries)
+
+
+def select_accounts(name=None):
+    """按名称选择账号（未指定时为全部账号）"""
+    if not name:
+        return accounts
+    selected = [acct for acct in accounts if acct.name == name]
+    if not selected:
+        raise ValueError(f"未知的账号: {name}（可用: {', '.join(acct.name for acct in accounts)}）")
+    return selected
+
+
+def run_for_accounts(selected, func, failures=None):
+    """
+    对每个账号执行 func(acct)，多个账号时并行执行（每个账号一个线程）。
+    商店信息缓存、HTTP 连接池和限流器由所有账号共享；单个账号失败不影响其他账号。
+    返回 {账号名称: func 的返回值（失败时为 None）}，失败的账号记入 failures {账号名称: 异常}
+    """
+    def run(acct):
+        try:
+            return func(acct)
+        except Exception as e:
+            logger.error(f"账号 {acct.name} 处理失败: {e}")
+            if failures is not None:
+                failures[acct.name] = e
+            return None
+
+    if len(selected) == 1:
+        return {selected[0].name: run(selected[0])}
+
+    with ThreadPoolExecutor(max_workers=len(selected), thread_name_prefix="account") as executor:
+        return dict(zip((acct.name for acct in selected), executor.map(run, selected)))
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Steam 游戏同步到 Notion")
     parser.add_argument('--debug', action='store_true', help='启用调试日志')
     parser.add_argument('--daily', action='store_true', help='同步 Notion 每日游戏记录')
+    parser.add_argument('--no-cache', action='store_true', help='不使用商店信息缓存')
+    parser.add_argument('--purge-cache', action='store_true', help='运行前清空商店信息缓存')
+    parser.add_argument('--incremental', action='store_true', default=SYNC_INCREMENTAL,
+                        help='增量同步：只处理上次同步后玩过的游戏（定期自动全量对账）')
+    parser.add_argument('--full', dest='incremental', action='store_false', help='强制全量同步')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的 sync / apply 继续（跳过已完成的步骤）')
+    parser.add_argument('--rebuild-index', action='store_true', help='全量重建 Notion 游戏库本地镜像')
+    parser.add_argument('--plan-file', default='sync_plan.json', help='plan / apply 使用的计划文件')
+    parser.add_argument('--shard', help='apply 时只执行计划的一部分，格式 K/N（K 从 1 开始）')
+    parser.add_argument('--metrics-file', default=METRICS_FILE, help='运行结束时把统计摘要保存为 JSON')
+    parser.add_argument('--dry-run', action='store_true', help='dedupe 时只列出重复页面，不做修改')
+    parser.add_argument('--account', help='只处理指定名称的账号（默认处理 ACCOUNTS_FILE 中的全部账号）')
     
     # 添加子命令或位置参数支持 add appid 的方式
-    parser.add_argument('action', nargs='?', default='sync', help='执行的操作: sync (同步所有) 或 add')
+    parser.add_argument('action', nargs='?', default='sync',
+                        help='执行的操作: sync (同步所有), add, plan (仅生成计划), apply (执行计划), dedupe (合并重复页面) '
+                             '或 store-report (列出商店信息查询失败的游戏)')
     parser.add_argument('appid', nargs='?', type=str, help='游戏的 AppID (可用逗号分隔多个)')
     
     args = parser.parse_args()
     
     # 配置日志
     setup_logging(debug=args.debug, logfile="app.log" if args.debug else None)
+
+    if args.purge_cache:
+        store_cache.purge()
+        owned_games_cache.purge()
+        achievements_cache.purge()
+        store_status.purge()
+        page_cache.purge()
+        logger.info("✓ 已清空商店信息缓存")
+    if args.no_cache:
+        store_cache.enabled = False
+        owned_games_cache.enabled = False
+        achievements_cache.enabled = False
+        store_status.enabled = False
+        page_cache.enabled = False
+    try:
+        selected = select_accounts(args.account)
+    except ValueError as e:
+        logger.error(str(e))
+        exit(1)
+    failures = {}  # {账号名称: 异常}，任一账号失败时以非零状态退出
+    if args.rebuild_index:
+        run_for_accounts(selected, lambda acct: query_all_games_from_notion(acct, full_refresh=True), failures)
+    if args.action.lower() in ('plan', 'apply') and len(selected) > 1:
+        logger.error(f"{args.action} 一次只能处理一个账号，请使用 --account 指定")
+        exit(1)
     
     # 根据不同的操作执行相应的函数
     if args.action.lower() == 'add':
@@ -654,13 +1308,47 @@ if __name__ == "__main__":
         
         # 检查是否包含逗号（多个 appid）
         if ',' in args.appid:
-            add_multiple_games_by_appids(args.appid)
+            run_for_accounts(selected, lambda acct: add_multiple_games_by_appids(acct, args.appid), failures)
         else:
             # 单个 appid
-            add_single_game_by_appid(int(args.appid))
+            run_for_accounts(selected, lambda acct: add_single_game_by_appid(acct, int(args.appid)), failures)
     elif args.action.lower() == 'sync':
-        sync_games_to_notion(sync_daily=args.daily)
+        run_for_accounts(selected, lambda acct: sync_games_to_notion(
+            acct, sync_daily=args.daily, incremental=args.incremental, resume=args.resume
+        ), failures)
+    elif args.action.lower() == 'dedupe':
+        run_for_accounts(selected, lambda acct: dedupe_notion_games(acct, dry_run=args.dry_run), failures)
+    elif args.action.lower() == 'store-report':
+        report_store_status()
+    elif args.action.lower() == 'plan':
+        if not write_sync_plan(selected[0], args.plan_file):
+            exit(1)
+    elif args.action.lower() == 'apply':
+        shard = None
+        if args.shard:
+            try:
+                k, n = (int(x) for x in args.shard.split('/'))
+                if not 1 <= k <= n:
+                    raise ValueError
+            except ValueError:
+                logger.error(f"--shard 格式错误: {args.shard}，应为 K/N")
+                exit(1)
+            shard = (k - 1, n)
+        run_for_accounts(selected, lambda acct: apply_sync_plan(
+            acct, args.plan_file, sync_daily=args.daily, shard=shard, resume=args.resume
+        ), failures)
     else:
         logger.error(f"未知的操作: {args.action}")
-        logger.info("可用操作: sync (默认), add <appid>")
-        exit(1)
\ No newline at end of file
+        logger.info("可用操作: sync (默认), add <appid>, plan, apply, dedupe, store-report")
+        exit(1)
+    clients = {id(acct.notion): acct for acct in selected}.values()
+    for acct in clients:
+        acct.notion.log_stats()
+
+    summary = metrics.summary()
+    metrics.log_table(summary)
+    if args.metrics_file:
+        metrics.write_json(args.metrics_file, summary, notion={acct.name: acct.notion.stats() for acct in clients})
+    if failures:
+        logger.error(f"{len(failures)} 个账号处理失败: {', '.join(failures)}")
+        exit(1)
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Notion 游戏库本地镜像 - 按 last_edited_time 增量刷新，按 (平台, appid) / (平台, 游戏名) 匹配页面
+"""
+
+import json
+import threading
+from datetime import datetime, timezone
+
+from config import get_property_name
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_date(value):
+    """日期时间统一转换为 UTC、精确到分钟，纯日期原样返回"""
+    if not value or "T" not in value:
+        return value
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc)
+    return dt.replace(second=0, microsecond=0).isoformat()
+
+
+def property_value(prop):
+    """把 Notion 属性（读取或写入格式均可）规整为可比较的简单值"""
+    if not prop:
+        return None
+    ptype = prop.get("type")
+    value = prop.get(ptype)
+
+    if ptype in ("title", "rich_text"):
+        return "".join(
+            item.get("plain_text") or item.get("text", {}).get("content", "")
+            for item in value or []
+        )
+    if ptype == "select":
+        return value.get("name") if value else None
+    if ptype == "multi_select":
+        return sorted(item.get("name", "") for item in value or [])
+    if ptype == "date":
+        return normalize_date(value.get("start")) if value else None
+    if ptype == "relation":
+        return sorted(item.get("id", "") for item in value or [])
+    return value  # number / url / checkbox 等
+
+
+def diff_properties(properties, current_values):
+    """只保留与 Notion 当前值不同的属性"""
+    return {
+        name: prop
+        for name, prop in properties.items()
+        if name not in current_values or property_value(prop) != current_values[name]
+    }
+
+
+def _parse_appid(value):
+    value = (value or "").strip() if isinstance(value, str) else value
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_game_page(page):
+    """解析 Notion 游戏页面为索引条目，无标题或已归档时返回 None"""
+    if page.get("archived") or page.get("in_trash"):
+        return None
+    props = page.get("properties", {})
+    name_prop_data = props.get(get_property_name("name"), {}).get("title", [])
+    if not name_prop_data:
+        return None
+
+    last_play_data = props.get(get_property_name("last_play"), {}).get("date", {})
+    platform_info = props.get(get_property_name("platform"), {}).get("select", {})
+
+    return {
+        "page_id": page["id"],
+        "name": name_prop_data[0]["plain_text"],
+        "platform": platform_info.get("name") if platform_info else "Unknown",
+        "last_play": last_play_data.get("start") if last_play_data else None,
+        "playtime": props.get(get_property_name("playtime"), {}).get("number", 0),
+        "appid": _parse_appid(property_value(props.get(get_property_name("appid")))),
+        "created_time": page.get("created_time"),
+        "last_edited_time": page.get("last_edited_time"),
+        "values": {name: property_value(prop) for name, prop in props.items()},
+    }
+
+
+class GameLookup:
+    """
+    游戏页面的多键索引：(平台, appid) 为主键，(平台, 游戏名) 为辅键（用于没有 appid 的旧页面）。
+    同一个键对应多个页面时视为重复，按 有 appid、创建时间、page_id 排序，第一个为保留的页面。
+    """
+
+    def __init__(self, entries):
+        ordered = sorted(entries, key=lambda e: (e.get("appid") is None, e.get("created_time") or "", e["page_id"]))
+        self._by_appid = {}  # {(platform, appid): [entry]}
+        self._by_name = {}   # {(platform, name): [entry]}
+        for entry in ordered:
+            if entry.get("appid") is not None:
+                self._by_appid.setdefault((entry["platform"], entry["appid"]), []).append(entry)
+            self._by_name.setdefault((entry["platform"], entry["name"]), []).append(entry)
+        self._count = len(ordered)
+
+    def __len__(self):
+        return self._count
+
+    def find(self, platform, appid=None, name=None):
+        """按 appid 查找页面，找不到时按名称查找（同名但 appid 不同的页面是另一个游戏）"""
+        if appid is not None:
+            entries = self._by_appid.get((platform, int(appid)))
+            if entries:
+                return entries[0]
+        for entry in self._by_name.get((platform, name), []) if name else []:
+            if entry.get("appid") is None or appid is None:
+                return entry
+        return None
+
+    def duplicates(self):
+        """重复的页面 {键: [保留的页面, 重复页面...]}；没有 appid 的同名页面归入同名且有 appid 的组"""
+        groups = {key: list(entries) for key, entries in self._by_appid.items()}
+        for (platform, name), entries in self._by_name.items():
+            unkeyed = [e for e in entries if e.get("appid") is None]
+            if not unkeyed:
+                continue
+            appids = {e["appid"] for e in entries if e.get("appid") is not None}
+            if len(appids) == 1:
+                groups[(platform, appids.pop())].extend(unkeyed)
+            elif not appids:
+                groups[(platform, name)] = unkeyed
+        return {key: entries for key, entries in groups.items() if len(entries) > 1}
+
+
+class NotionGameIndex:
+    """游戏页面的本地镜像，持久化在缓存数据库中"""
+
+    def __init__(self, db, database_id, query_func):
+        self.db = db
+        self.database_id = database_id
+        self._query = query_func  # query_func(payload) -> Notion 查询结果（dict）
+        self._pages = {}          # {page_id: entry}
+        self._loaded = False
+        self._refreshed = False
+        self._lock = threading.RLock()
+
+    def _ensure_tables(self):
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS notion_pages (
+                database_id TEXT NOT NULL,
+                page_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (database_id, page_id)
+            );
+            CREATE TABLE IF NOT EXISTS notion_index_state (
+                database_id TEXT PRIMARY KEY,
+                watermark TEXT
+            );
+        """)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._ensure_tables()
+        rows = self.db.execute("SELECT data FROM notion_pages WHERE database_id = ?", (self.database_id,))
+        self._pages = {}
+        for (data,) in rows:
+            entry = json.loads(data)
+            if "appid" not in entry:
+                # 旧版本镜像中的条目没有单独保存 appid
+                entry["appid"] = _parse_appid(entry.get("values", {}).get(get_property_name("appid")))
+            self._pages[entry["page_id"]] = entry
+        self._loaded = True
+
+    def _watermark(self):
+        rows = self.db.execute(
+            "SELECT watermark FROM notion_index_state WHERE database_id = ?", (self.database_id,)
+        )
+        return rows[0][0] if rows else None
+
+    def _store_many(self, entries):
+        """批量写入 [(page_id, entry)]，entry 为 None 表示删除"""
+        upserts, deletes = [], []
+        for page_id, entry in entries:
+            if entry is None:
+                self._pages.pop(page_id, None)
+                deletes.append((self.database_id, page_id))
+            else:
+                self._pages[page_id] = entry
+                upserts.append((self.database_id, page_id, json.dumps(entry, ensure_ascii=False)))
+        if upserts:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO notion_pages (database_id, page_id, data) VALUES (?, ?, ?)",
+                upserts,
+            )
+        if deletes:
+            self.db.executemany("DELETE FROM notion_pages WHERE database_id = ? AND page_id = ?", deletes)
+
+    def refresh(self, full=False):
+        """从 Notion 拉取变更；首次运行或 full=True 时全量重建"""
+        with self._lock:
+            self._load()
+            watermark = None if full else self._watermark()
+            if watermark is None:
+                self.db.execute("DELETE FROM notion_pages WHERE database_id = ?", (self.database_id,))
+                self._pages = {}
+
+            payload = {
+                "page_size": 100,
+                "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+            }
+            if watermark:
+                # Notion 的 last_edited_time 精确到分钟，使用 on_or_after 避免遗漏同一分钟内的修改
+                payload["filter"] = {
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {"on_or_after": watermark},
+                }
+
+            new_watermark = watermark
+            changed = 0
+            next_cursor = None
+            has_more = True
+            while has_more:
+                data = dict(payload)
+                if next_cursor:
+                    data["start_cursor"] = next_cursor
+                try:
+                    result = self._query(data)
+                except Exception as e:
+                    logger.error(f"查询 Notion 失败: {e}")
+                    # 未完整拉取时不推进水位，下次运行重新拉取
+                    new_watermark = watermark
+                    break
+
+                entries = []
+                for page in result.get("results", []):
+                    try:
+                        entries.append((page["id"], parse_game_page(page)))
+                    except Exception as e:
+                        logger.warning(f"解析游戏信息失败: {e}")
+                    edited = page.get("last_edited_time")
+                    if edited and (new_watermark is None or edited > new_watermark):
+                        new_watermark = edited
+                self._store_many(entries)
+                changed += len(entries)
+
+                has_more = result.get("has_more", False)
+                next_cursor = result.get("next_cursor")
+
+            if new_watermark and new_watermark != watermark:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO notion_index_state (database_id, watermark) VALUES (?, ?)",
+                    (self.database_id, new_watermark),
+                )
+            self._refreshed = True
+            mode = "全量" if watermark is None else "增量"
+            logger.debug(f"Notion 索引{mode}刷新，变更页面: {changed}")
+
+    def ensure_fresh(self, full=False):
+        """本进程内只刷新一次（full=True 时强制全量重建）"""
+        if full or not self._refreshed:
+            self.refresh(full=full)
+
+    def upsert_page(self, page):
+        """写入 Notion 后用返回的页面对象更新本地镜像"""
+        if not page or "id" not in page:
+            return
+        with self._lock:
+            self._load()
+            try:
+                self._store_many([(page["id"], parse_game_page(page))])
+            except Exception as e:
+                logger.warning(f"更新本地索引失败: {e}")
+
+    def remove(self, page_id):
+        """删除页面条目（页面已在 Notion 中归档或删除，增量刷新不会返回这类页面）"""
+        with self._lock:
+            self._load()
+            self._store_many([(page_id, None)])
+
+    def get(self, page_id):
+        """按 page_id 获取索引条目"""
+        with self._lock:
+            self._load()
+            return self._pages.get(page_id)
+
+    def lookup(self):
+        """返回当前全部页面的 GameLookup"""
+        with self._lock:
+            self._load()
+            return GameLookup(list(self._pages.values()))
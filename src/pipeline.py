@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+多阶段流水线 - 各阶段通过有界队列连接，每个阶段有独立的工作线程数
+"""
+
+import queue
+import threading
+
+from metrics import metrics
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+class PipelineStage:
+    """流水线阶段：func(item) 返回交给下一阶段的 item，返回 None 表示该条目已处理完毕"""
+
+    def __init__(self, name, func, workers=1, queue_size=100):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+
+
+def run_pipeline(items, stages, on_done):
+    """
+    让 items 依次流过各阶段。
+    每个条目离开流水线时（处理完毕、提前结束或出错）在调用线程中执行 on_done(item, error)。
+    items 可以是生成器，生产速度受第一阶段队列容量约束。
+    items、工作线程或 on_done 本身抛出的异常会在流水线排空后重新抛出（只有部分条目被处理时不能视为成功）。
+    """
+    queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+    done_queue = queue.Queue()
+    failures = []  # 流水线本身的异常（不属于单个条目），按发生顺序
+    failures_lock = threading.Lock()
+
+    def fail(error):
+        with failures_lock:
+            failures.append(error)
+
+    def worker(index):
+        stage = stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            try:
+                try:
+                    with metrics.timer(f"pipeline.{stage.name}"):
+                        result = stage.func(item)
+                except Exception as e:
+                    logger.error(f"流水线阶段 {stage.name} 出错: {e}")
+                    done_queue.put((item, e))
+                    continue
+                if result is None or outbox is None:
+                    done_queue.put((item if result is None else result, None))
+                else:
+                    outbox.put(result)
+            except BaseException as e:
+                # 工作线程继续消费队列，避免上游阻塞
+                logger.error(f"流水线阶段 {stage.name} 的工作线程出错: {e}")
+                fail(e)
+
+    threads = []
+    for index, stage in enumerate(stages):
+        stage_threads = [
+            threading.Thread(target=worker, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        ]
+        for thread in stage_threads:
+            thread.start()
+        threads.append(stage_threads)
+
+    def produce():
+        try:
+            for item in items:
+                queues[0].put(item)
+        except BaseException as e:
+            logger.error(f"流水线生产条目时出错: {e}")
+            fail(e)
+        finally:
+            # 逐级关闭：上一阶段的线程全部退出后再通知下一阶段
+            for index, stage in enumerate(stages):
+                for _ in range(stage.workers):
+                    queues[index].put(_STOP)
+                for thread in threads[index]:
+                    thread.join()
+            done_queue.put(_STOP)
+
+    producer = threading.Thread(target=produce, name="producer", daemon=True)
+    producer.start()
+
+    while True:
+        entry = done_queue.get()
+        if entry is _STOP:
+            break
+        try:
+            on_done(*entry)
+        except BaseException as e:
+            fail(e)
+    producer.join()
+    if failures:
+        raise failures[0]
@@ -7,14 +7,30 @@ from .steam import (
     get_owned_games_from_steam,
     get_steam_recent_games,
     get_achievements_from_steam,
+    achievements_unavailable,
     parse_achievements_info,
-    get_steam_store_info
+    get_steam_store_info,
+    get_steam_app_details,
+    get_steam_prices,
+    empty_store_info,
+    StorePageUnavailable,
+    set_store_html_engine,
+    set_page_cache,
+    set_base_urls
 )
 
 __all__ = [
     'get_owned_games_from_steam',
     'get_steam_recent_games',
     'get_achievements_from_steam',
+    'achievements_unavailable',
     'parse_achievements_info',
-    'get_steam_store_info'
+    'get_steam_store_info',
+    'get_steam_app_details',
+    'get_steam_prices',
+    'empty_store_info',
+    'StorePageUnavailable',
+    'set_store_html_engine',
+    'set_page_cache',
+    'set_base_urls'
 ]
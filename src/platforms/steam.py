@@ -3,36 +3,139 @@
 Steam API 相关函数
 """
 
-import requests
 import time
-from bs4 import BeautifulSoup
-from urllib import request
+from bs4 import BeautifulSoup, SoupStrainer
+from html import unescape
 from http import cookiejar
+from urllib.parse import urlparse
+
+from metrics import metrics
+from utils import request_with_retry
+
+# lxml 为可选依赖，安装后商店页面解析明显更快
+try:
+    import lxml  # noqa: F401
+    FAST_HTML_PARSER = "lxml"
+except ImportError:
+    FAST_HTML_PARSER = "html.parser"
+
+
+def _steam_api_get(url, params):
+    """带限流的 Steam Web API GET 请求（按重试策略重试 429 / 5xx / 超时）"""
+    return request_with_retry("get", url, params=params, timeout=10)
+
+
+class StorePageUnavailable(Exception):
+    """商店页面被重定向：reason 为 "unavailable"（下架或锁区，跳转到首页）或 "agecheck"（需要年龄验证）"""
+
+    def __init__(self, appid, reason):
+        super().__init__(f"AppID {appid} 商店页面不可用: {reason}")
+        self.appid = appid
+        self.reason = reason
+
+
+def _check_store_redirect(appid, response):
+    """商店页面被重定向到其他页面时抛出 StorePageUnavailable"""
+    if not response.history:
+        return
+    path = urlparse(response.url).path
+    if "/agecheck/" in path:
+        raise StorePageUnavailable(appid, "agecheck")
+    if not path.startswith(f"/app/{appid}"):
+        raise StorePageUnavailable(appid, "unavailable")
+
+
+def _fetch_html(url, headers, conditional=None, check=None):
+    """
+    带限流的页面请求（按重试策略重试 429 / 5xx / 超时），内容未变化（304）时返回 None。
+    check(response) 在检查状态码之前调用，用于识别重定向等情况。
+    """
+    headers = dict(headers)
+    if conditional:
+        if conditional.get("etag"):
+            headers["If-None-Match"] = conditional["etag"]
+        if conditional.get("last_modified"):
+            headers["If-Modified-Since"] = conditional["last_modified"]
+
+    response = request_with_retry("get", url, headers=headers, timeout=10)
+    if response.status_code == 304 and conditional:
+        return None
+    if check is not None:
+        check(response)
+    response.raise_for_status()
+    return response
+
+
+# 页面条件请求缓存（由调用方通过 set_page_cache 注入）
+_page_cache = None
+
+# 服务地址（可指向本地模拟服务，见 benchmarks/mock_server.py）
+_base_urls = {
+    "api": "https://api.steampowered.com",
+    "store": "https://store.steampowered.com",
+    "community": "https://steamcommunity.com",
+}
+
+
+def set_base_urls(api=None, store=None, community=None):
+    """设置 Steam Web API / 商店 / 社区的服务地址，None 表示保持不变"""
+    for name, url in (("api", api), ("store", store), ("community", community)):
+        if url:
+            _base_urls[name] = url.rstrip("/")
+
+
+def set_page_cache(cache):
+    """设置页面条件请求缓存（cache.PageCache），None 表示不使用"""
+    global _page_cache
+    _page_cache = cache
+
+
+def _fetch_parsed(url, headers, parser, parse, check=None):
+    """
+    请求页面并解析；有缓存的校验值时发起条件请求，304 时直接复用上次的解析结果。
+    parser 标识解析方式，解析方式变化后旧结果不再复用。
+    """
+    cached = _page_cache.get(url, parser) if _page_cache is not None else None
+    response = _fetch_html(url, headers, conditional=cached, check=check)
+    if _page_cache is not None and _page_cache.enabled:
+        metrics.hit("page_cache", response is None)
+    if response is None:
+        _page_cache.touch(url)
+        return cached["result"]
+
+    with metrics.timer(f"store.parse {parser}"):
+        result = parse(response.content.decode('utf-8'))
+    if _page_cache is not None:
+        _page_cache.put(url, parser, response.headers.get("ETag"), response.headers.get("Last-Modified"), result)
+    return result
+
 
 # ==================== STEAM API ====================
-def get_owned_games_from_steam(steam_api_key, steam_user_id, include_played_free_games=True):
-    """获取 Steam 所有游戏"""
-    url = "http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
+def get_owned_games_from_steam(steam_api_key, steam_user_id, include_played_free_games=True, appids=None):
+    """获取 Steam 所有游戏（指定 appids 时只返回这些游戏），请求失败返回 None"""
+    url = f"{_base_urls['api']}/IPlayerService/GetOwnedGames/v0001/"
     params = {
         "key": steam_api_key,
         "steamid": steam_user_id,
         "include_appinfo": "True",
         "include_played_free_games": "True" if include_played_free_games else "False"
     }
+    for index, appid in enumerate(appids or []):
+        params[f"appids_filter[{index}]"] = appid
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = _steam_api_get(url, params)
         response.raise_for_status()
         print("✓ 从 Steam 获取游戏列表成功")
         return response.json().get("response", {}).get("games", [])
     except Exception as e:
         print(f"✗ 从 Steam 获取游戏失败: {e}")
-        return []
+        return None
 
 
 def get_steam_recent_games(steam_api_key, steam_user_id, count=300):
-    """获取最近游玩的游戏（包含游玩时间）"""
-    url = "https://api.steampowered.com/IPlayerService/GetRecentlyPlayedGames/v0001/"
+    """获取最近游玩的游戏（包含游玩时间），请求失败返回 None"""
+    url = f"{_base_urls['api']}/IPlayerService/GetRecentlyPlayedGames/v0001/"
     params = {
         "key": steam_api_key,
         "steamid": steam_user_id,
@@ -41,7 +144,7 @@ def get_steam_recent_games(steam_api_key, steam_user_id, count=300):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = _steam_api_get(url, params)
         response.raise_for_status()
         data = response.json().get("response", {})
         games = data.get("games", [])
@@ -49,12 +152,12 @@ def get_steam_recent_games(steam_api_key, steam_user_id, count=300):
         return games
     except Exception as e:
         print(f"✗ 从 Steam 获取最近游玩失败: {e}")
-        return []
+        return None
 
 
 def get_achievements_from_steam(game, steam_api_key, steam_user_id):
-    """获取游戏成就数据"""
-    url = "http://api.steampowered.com/ISteamUserStats/GetPlayerAchievements/v0001/"
+    """获取游戏成就数据（4xx 时返回接口的错误信息，请求失败时返回 None）"""
+    url = f"{_base_urls['api']}/ISteamUserStats/GetPlayerAchievements/v0001/"
     params = {
         "key": steam_api_key,
         "steamid": steam_user_id,
@@ -62,17 +165,29 @@ def get_achievements_from_steam(game, steam_api_key, steam_user_id):
     }
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = _steam_api_get(url, params)
         # 4xx 错误表示无成就数据
         if 400 <= response.status_code < 500:
-            return None
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and isinstance(data.get("playerstats"), dict):
+                return data
+            return {"playerstats": {"success": False, "error": f"HTTP {response.status_code}"}}
         response.raise_for_status()
         return response.json()
     except Exception as e:
-        print(f"⊘ 获取 {game['name']} 成就失败: {e}")
+        print(f"⊘ 获取 {game.get('name', game['appid'])} 成就失败: {e}")
         return None
 
 
+def achievements_unavailable(game_achievements):
+    """成就接口是否返回"游戏没有成就统计"（与账号无关，可以长期缓存）"""
+    error = ((game_achievements or {}).get("playerstats") or {}).get("error") or ""
+    return "no stats" in error.lower()
+
+
 def parse_achievements_info(game_achievements):
     """解析成就信息"""
     info = {"total": -1, "achieved": -1, "earliest_unlock": None}
@@ -102,21 +217,22 @@ def parse_achievements_info(game_achievements):
 # ==================== STEAM STORE ====================
 def get_steam_review_info(appid, userid):
     """获取用户对游戏的评论"""
-    url = f"https://steamcommunity.com/profiles/{userid}/recommended/{appid}"
+    url = f"{_base_urls['community']}/profiles/{userid}/recommended/{appid}"
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
     
     try:
-        req = request.Request(url, headers=headers)
-        with request.urlopen(req, timeout=10) as response:
-            html = response.read().decode('utf-8')
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        review_elem = soup.find('div', {'id': 'ReviewText'})
-        return review_elem.get_text(strip=True) if review_elem else ""
+        return _fetch_parsed(url, headers, "review", _extract_review_text)
     except Exception:
         return ""
 
 
+def _extract_review_text(html):
+    """从评测页面提取评测内容"""
+    soup = BeautifulSoup(html, FAST_HTML_PARSER, parse_only=SoupStrainer('div', id='ReviewText'))
+    review_elem = soup.find('div', {'id': 'ReviewText'})
+    return review_elem.get_text(strip=True) if review_elem else ""
+
+
 def _setup_steam_cookies(country="CN", language="schinese"):
     """设置 Steam 请求的 Cookie 和 Headers"""
     cookies = {
@@ -137,12 +253,9 @@ def _setup_steam_cookies(country="CN", language="schinese"):
     return headers
 
 
-def get_steam_store_info(appid, country="CN", language="schinese"):
-    """获取 Steam 商店游戏信息"""
-    url = f"https://store.steampowered.com/app/{appid}/?l={language}&cc={country}"
-    headers = _setup_steam_cookies(country, language)
-    
-    default_info = {
+def empty_store_info():
+    """商店信息的默认值（请求失败时返回）"""
+    return {
         'game_name': '',
         'genres': [],
         'developers': [],
@@ -155,15 +268,95 @@ def get_steam_store_info(appid, country="CN", language="schinese"):
         'app_icon': '',
         'header_image': ''
     }
+
+
+def get_steam_store_info(appid, country="CN", language="schinese", raise_errors=False):
+    """
+    获取 Steam 商店游戏信息。
+    raise_errors=True 时请求失败抛出异常（页面被重定向时为 StorePageUnavailable），否则返回默认值。
+    """
+    url = f"{_base_urls['store']}/app/{appid}/?l={language}&cc={country}"
+    headers = _setup_steam_cookies(country, language)
     
     try:
-        req = request.Request(url, headers=headers)
-        with request.urlopen(req, timeout=10) as response:
-            html = response.read().decode('utf-8')
+        return _fetch_parsed(url, headers, f"store:{_store_html_engine}", _STORE_HTML_ENGINES[_store_html_engine],
+                             check=lambda response: _check_store_redirect(appid, response))
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"✗ 请求失败 AppID {appid}: {e}")
-        return default_info
-    
+        return empty_store_info()
+
+
+# ==================== STEAM STORE API ====================
+def _format_price(data):
+    """从 appdetails 数据中提取价格文本"""
+    if data.get('is_free'):
+        return '免费开玩'
+    return (data.get('price_overview') or {}).get('final_formatted', '')
+
+
+def get_steam_app_details(appid, country="CN", language="schinese", raise_errors=False):
+    """
+    通过 appdetails JSON 接口获取商店信息（名称、类型、开发商、发行商、发行日期、简介、价格），
+    该地区没有数据时返回 None；请求失败时返回 None（raise_errors=True 时抛出异常）
+    """
+    url = f"{_base_urls['store']}/api/appdetails"
+    params = {"appids": appid, "cc": country, "l": language}
+
+    try:
+        response = _steam_api_get(url, params)
+        response.raise_for_status()
+        entry = (response.json() or {}).get(str(appid)) or {}
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"✗ 请求 appdetails 失败 AppID {appid}: {e}")
+        return None
+
+    data = entry.get('data')
+    if not entry.get('success') or not isinstance(data, dict):
+        return None
+
+    return {
+        'game_name': data.get('name', ''),
+        'genres': [g.get('description', '') for g in data.get('genres', []) if g.get('description')],
+        'developers': [d.replace(',', '_') for d in data.get('developers', [])],
+        'publishers': [p.replace(',', '_') for p in data.get('publishers', []) if p],
+        'release_date': (data.get('release_date') or {}).get('date', ''),
+        'info': unescape(data.get('short_description', '')).strip(),
+        'price': _format_price(data),
+    }
+
+
+def get_steam_prices(appids, country="CN"):
+    """批量获取价格（appdetails 仅在 filters=price_overview 时支持多个 appid），返回 {appid: 价格文本}"""
+    if not appids:
+        return {}
+    url = f"{_base_urls['store']}/api/appdetails"
+    params = {"appids": ",".join(str(a) for a in appids), "cc": country, "filters": "price_overview"}
+
+    try:
+        response = _steam_api_get(url, params)
+        response.raise_for_status()
+        payload = response.json() or {}
+    except Exception as e:
+        print(f"✗ 批量获取价格失败: {e}")
+        return {}
+
+    prices = {}
+    for appid in appids:
+        entry = payload.get(str(appid)) or {}
+        data = entry.get('data')
+        # 免费或无价格的游戏 data 为空列表，无法区分，交给单个查询处理
+        if entry.get('success') and isinstance(data, dict) and data.get('price_overview'):
+            prices[appid] = data['price_overview'].get('final_formatted', '')
+    return prices
+
+
+# ==================== STEAM STORE 解析引擎 ====================
+def _extract_store_fields_soup(html):
+    """完整解析页面后逐字段查找（参考实现）"""
     soup = BeautifulSoup(html, 'html.parser')
     
     # 提取各种信息
@@ -191,6 +384,143 @@ def get_steam_store_info(appid, country="CN", language="schinese"):
     }
 
 
+# 商店页面中需要解析的区域：(标签名或 None, class) 与 id
+_STORE_REGION_CLASSES = {
+    ('div', 'apphub_AppName'),
+    ('div', 'apphub_AppIcon'),
+    ('img', 'game_header_image_full'),
+    ('div', 'game_description_snippet'),
+    ('a', 'app_tag'),
+    (None, 'game_area_purchase_game'),
+    (None, 'user_reviews_summary_row'),
+}
+_STORE_REGION_IDS = {'genresAndManufacturer'}
+
+
+def _classes_of(attrs):
+    value = (attrs or {}).get('class') or []
+    return value.split() if isinstance(value, str) else list(value)
+
+
+def _is_store_region(name, attrs):
+    if (attrs or {}).get('id') in _STORE_REGION_IDS:
+        return True
+    for cls in _classes_of(attrs):
+        if (name, cls) in _STORE_REGION_CLASSES or (None, cls) in _STORE_REGION_CLASSES:
+            return True
+    return False
+
+
+class _StoreRegionStrainer(SoupStrainer):
+    """只为需要的页面区域建树，其余标签和文本在解析时直接丢弃"""
+
+    @property
+    def includes_everything(self):
+        return False
+
+    # beautifulsoup4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return _is_store_region(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    # beautifulsoup4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return _is_store_region(markup_name, markup_attrs)
+
+
+def _extract_store_fields_fast(html):
+    """快速解析：lxml（如已安装）+ 只解析相关区域 + 单次遍历提取所有字段"""
+    soup = BeautifulSoup(html, FAST_HTML_PARSER, parse_only=_StoreRegionStrainer())
+    fields = {
+        'game_name': None,
+        'genres': [],
+        'developers': [],
+        'publishers': [],
+        'release_date': '',
+        'info': None,
+        'price': None,
+        'review': None,
+        'tag': [],
+        'app_icon': None,
+        'header_image': None
+    }
+    details_seen = False
+
+    for elem in soup.find_all(True):
+        classes = _classes_of(elem.attrs)
+        name = elem.name
+        try:
+            if name == 'div' and 'apphub_AppName' in classes and fields['game_name'] is None:
+                fields['game_name'] = elem.get_text(strip=True)
+            elif name == 'div' and 'apphub_AppIcon' in classes and fields['app_icon'] is None:
+                icon_img = elem.find('img')
+                fields['app_icon'] = icon_img.get('src', '') if icon_img else ''
+            elif name == 'img' and 'game_header_image_full' in classes and fields['header_image'] is None:
+                fields['header_image'] = elem.get('src', '')
+            elif name == 'div' and 'game_description_snippet' in classes and fields['info'] is None:
+                fields['info'] = elem.get_text(strip=True)
+            elif name == 'a' and 'app_tag' in classes and len(fields['tag']) < 8:
+                fields['tag'].append(elem.get_text(strip=True))
+            elif 'game_area_purchase_game' in classes and fields['price'] is None:
+                price_elem = elem.find(class_='game_purchase_price')
+                if price_elem:
+                    fields['price'] = price_elem.get_text(strip=True)
+            elif 'user_reviews_summary_row' in classes and fields['review'] is None:
+                review_elem = elem.find(class_='game_review_summary')
+                if review_elem:
+                    fields['review'] = review_elem.get_text(strip=True)
+            elif elem.get('id') == 'genresAndManufacturer' and not details_seen:
+                details_seen = True
+                (fields['genres'], fields['developers'],
+                 fields['publishers'], fields['release_date']) = _parse_details_block(elem)
+        except Exception as e:
+            print(f"✗ 解析商店页面失败: {e}")
+
+    return {key: ('' if value is None else value) for key, value in fields.items()}
+
+
+def _parse_details_block(detail):
+    """解析 genresAndManufacturer 区域（类型、开发商、发行商、发行日期）"""
+    genres, developers, publishers, release_date = [], [], [], ''
+    dev_done = pub_done = date_done = False
+
+    for label in detail.find_all('b'):
+        text = label.get_text()
+        if '类型' in text:
+            for span in label.find_next_siblings('span'):
+                genres.extend(a.get_text(strip=True) for a in span.find_all('a'))
+        if not dev_done and '开发者' in text:
+            dev_done = True
+            developers = [a.get_text(strip=True).replace(',', '_') for a in label.find_next_siblings('a')]
+        if not pub_done and '发行商' in text:
+            pub_done = True
+            publishers = [a.get_text(strip=True).replace(',', '_') for a in label.find_next_siblings('a')]
+        if not date_done and '发行日期' in text:
+            date_done = True
+            sibling = label.find_next_sibling(string=True)
+            release_date = sibling.strip() if sibling else ''
+
+    return genres, developers, publishers, release_date
+
+
+# 可选的解析引擎
+_STORE_HTML_ENGINES = {
+    'soup': _extract_store_fields_soup,
+    'fast': _extract_store_fields_fast,
+}
+_store_html_engine = 'fast'
+
+
+def set_store_html_engine(name):
+    """选择商店页面解析引擎：fast（默认）或 soup"""
+    global _store_html_engine
+    if name not in _STORE_HTML_ENGINES:
+        raise ValueError(f"未知的解析引擎: {name}，可选: {', '.join(_STORE_HTML_ENGINES)}")
+    _store_html_engine = name
+
+
 # ==================== STEAM STORE 详情提取 ====================
 def _get_game_name(soup):
     """提取游戏名称"""
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限流器（Notion / Steam 共用）
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，burst 为桶容量"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取走一个令牌，不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    elapsed = max(0.0, now - self._updated)
+                    self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """暂停发放令牌（用于响应 Retry-After）"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            # 暂停结束后只放行一个请求，之后按速率恢复
+            self._tokens = 1.0
+            self._updated = self._blocked_until
+
+
+class RateLimiter:
+    """按主机（含端口，即 URL 的 netloc）维护令牌桶，未配置的主机不限流"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, rate, burst=1):
+        """设置主机的限流参数，rate <= 0 表示不限流"""
+        with self._lock:
+            if rate and rate > 0:
+                self._buckets[host] = TokenBucket(rate, burst)
+            else:
+                self._buckets.pop(host, None)
+
+    def configure_many(self, limits):
+        """批量设置 {host: (rate, burst)}"""
+        for host, (rate, burst) in limits.items():
+            self.configure(host, rate, burst)
+
+    def _bucket(self, url_or_host):
+        host = urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+        return self._buckets.get(host)
+
+    def acquire(self, url_or_host):
+        """请求前调用，按主机限流"""
+        bucket = self._bucket(url_or_host)
+        if bucket:
+            bucket.acquire()
+
+    def pause(self, url_or_host, seconds):
+        """暂停该主机的请求，主机未限流时返回 False"""
+        bucket = self._bucket(url_or_host)
+        if not bucket:
+            return False
+        if seconds > 0:
+            bucket.pause(seconds)
+        return True
+
+
+def parse_retry_after(value, default=None):
+    """解析 Retry-After（秒数或 HTTP 日期），返回秒数"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def respect_retry_after(url, headers, default=1.0):
+    """429 时根据 Retry-After 暂停对应主机，返回暂停秒数"""
+    seconds = parse_retry_after((headers or {}).get("Retry-After"), default)
+    logger.warning(f"触发限流 (429)，{seconds:.1f}s 后重试: {urlparse(url).netloc}")
+    if not rate_limiter.pause(url, seconds):
+        time.sleep(seconds)
+    return seconds
+
+
+# 全局共享的限流器
+rate_limiter = RateLimiter()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+重试策略与按主机的熔断器（Notion / Steam 共用）
+"""
+
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 值得重试的状态码：限流与服务端临时错误
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """主机熔断中，请求未发出"""
+
+
+class RetryPolicy:
+    """
+    重试策略：最多 max_attempts 次、总耗时不超过 budget 秒；
+    等待时间为 [0, min(max_delay, base_delay * 2^n)] 内的随机值（full jitter），有 Retry-After 时以其为准。
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0, budget=120.0, retry_statuses=RETRY_STATUSES):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.budget = float(budget)
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def is_retryable(self, response=None, error=None):
+        """超时、连接错误与 retry_statuses 中的状态码可以重试，其余（如 4xx 校验错误）立即失败"""
+        if error is not None:
+            return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)) \
+                and not isinstance(error, CircuitOpenError)
+        return response is not None and response.status_code in self.retry_statuses
+
+    def backoff(self, attempt):
+        """第 attempt 次（从 0 开始）失败后的等待秒数"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, attempt, started, retry_after=None):
+        """下一次重试前的等待秒数；次数或时间预算用尽时返回 None"""
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = retry_after if retry_after is not None else self.backoff(attempt)
+        if time.monotonic() - started + delay > self.budget:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    按主机的熔断器：连续 failure_threshold 次服务端故障（5xx、超时、连接错误，不含 429 限流）后
+    熔断 reset_timeout 秒，之后放行一次试探请求
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self._failures = {}    # {host: 连续失败次数}
+        self._opened_at = {}   # {host: 熔断开始时间}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url):
+        return urlparse(url).netloc or url
+
+    def before_request(self, url):
+        """熔断中且未到试探时间时抛出 CircuitOpenError"""
+        if self.failure_threshold <= 0:
+            return
+        host = self._host(url)
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return
+            remaining = opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(f"{host} 熔断中，{remaining:.0f}s 后重试")
+            # 半开：放行这一次请求，失败后重新计时
+            self._opened_at[host] = time.monotonic()
+
+    def record_success(self, url):
+        host = self._host(url)
+        with self._lock:
+            self._failures.pop(host, None)
+            if self._opened_at.pop(host, None) is not None:
+                logger.info(f"{host} 已恢复，解除熔断")
+
+    def record_failure(self, url):
+        if self.failure_threshold <= 0:
+            return
+        host = self._host(url)
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.failure_threshold and host not in self._opened_at:
+                self._opened_at[host] = time.monotonic()
+                logger.warning(f"{host} 连续失败 {self._failures[host]} 次，熔断 {self.reset_timeout:.0f}s")
+
+
+# 全局默认策略与熔断器（由入口按配置替换）
+default_policy = RetryPolicy()
+circuit_breaker = CircuitBreaker()
+
+
+def configure_retry(policy=None, breaker=None):
+    """替换全局默认的重试策略与熔断器"""
+    global default_policy, circuit_breaker
+    if policy is not None:
+        default_policy = policy
+    if breaker is not None:
+        circuit_breaker = breaker
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+商店数据来源 - appdetails JSON 接口与商店页面抓取，按字段组合并并写入缓存
+"""
+
+import threading
+
+from cache import STORE_FIELD_GROUPS
+from metrics import metrics
+from platforms.steam import (
+    StorePageUnavailable, empty_store_info, get_steam_app_details, get_steam_prices, get_steam_store_info
+)
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+# appdetails 批量查询价格时每次请求的 appid 数量
+PRICE_BATCH_SIZE = 100
+
+
+class StoreDataProvider:
+    """商店数据来源：groups 为该来源能提供的字段组"""
+
+    name = ""
+    groups = ()
+
+    def fetch(self, appid, country, language):
+        """获取单个游戏的数据：该地区没有数据时返回 None，请求失败时抛出异常"""
+        raise NotImplementedError
+
+    def fetch_prices(self, appids, country, language):
+        """批量获取价格 {appid: 价格}，不支持时返回空字典"""
+        return {}
+
+
+class AppDetailsProvider(StoreDataProvider):
+    """store.steampowered.com/api/appdetails：结构化 JSON，无需年龄验证 Cookie"""
+
+    name = "appdetails"
+    groups = ("static", "price")
+
+    def fetch(self, appid, country, language):
+        return get_steam_app_details(appid, country=country, language=language, raise_errors=True)
+
+    def fetch_prices(self, appids, country, language):
+        return get_steam_prices(appids, country=country)
+
+
+class StorePageProvider(StoreDataProvider):
+    """商店页面抓取：用户标签、评分等 JSON 接口不提供的字段"""
+
+    name = "html"
+
+    def __init__(self, groups=None):
+        self.groups = tuple(groups or STORE_FIELD_GROUPS)
+
+    def fetch(self, appid, country, language):
+        data = get_steam_store_info(appid, country=country, language=language, raise_errors=True)
+        # 页面不可用（锁区、下架）时没有游戏名称
+        return data if data.get("game_name") else None
+
+
+def build_providers(mode):
+    """按配置构建数据来源：appdetails 模式下页面只用于标签、评分和图片"""
+    if mode == "html":
+        return [StorePageProvider()]
+    if mode == "appdetails":
+        return [AppDetailsProvider(), StorePageProvider(groups=("tags", "review", "media"))]
+    raise ValueError(f"未知的商店数据来源: {mode}，可选: appdetails, html")
+
+
+# 同一次查询中多个来源失败时，按此顺序取最需要重试的原因
+_FAILURE_PRIORITY = ("error", "agecheck", "unavailable")
+
+
+class StoreDataService:
+    """
+    按字段组读取商店数据：缓存未过期的组直接使用，其余按来源分别请求。
+    设置 status（cache.StoreStatusCache）后，get_with_fallback 会记住可用的地区与查询失败的游戏。
+    """
+
+    def __init__(self, cache, providers, slots=None, status=None, fallback_countries=()):
+        self.cache = cache
+        self.providers = providers
+        self.slots = slots  # 商店请求的并发限制（信号量）
+        self.status = status
+        self.fallback_countries = tuple(fallback_countries)
+        self._key_locks = {}  # {(appid, country, language): Lock}，多个账号同时请求同一游戏时只抓取一次
+        self._lock = threading.Lock()
+
+    def _key_lock(self, appid, country, language):
+        with self._lock:
+            return self._key_locks.setdefault((appid, country, language), threading.Lock())
+
+    def _fetch(self, provider, appid, country, language):
+        """请求单个来源，返回 (数据, 失败原因)：成功时原因为 None，该地区没有数据时为 "unavailable" """
+        with metrics.timer(f"store.fetch {provider.name}"):
+            try:
+                if self.slots is None:
+                    result = provider.fetch(appid, country, language)
+                else:
+                    with self.slots:
+                        result = provider.fetch(appid, country, language)
+            except StorePageUnavailable as e:
+                return None, e.reason
+            except Exception as e:
+                logger.warning(f"✗ 请求 {provider.name} 失败 AppID {appid} ({country}): {e}")
+                return None, "error"
+        return result, None if result is not None else "unavailable"
+
+    def get(self, appid, country="CN", language="schinese", groups=None):
+        """获取商店信息（只请求已过期字段组对应的来源）"""
+        groups = list(groups or STORE_FIELD_GROUPS)
+        # 同一游戏的请求串行执行：后到的调用直接读取前一个调用写入的缓存
+        with self._key_lock(appid, country, language):
+            return self._get(appid, country, language, groups)[0]
+
+    def get_with_fallback(self, appid, country="CN", language="schinese", groups=None):
+        """
+        获取商店信息，默认地区没有数据（锁区、年龄验证）时依次尝试 fallback_countries；请求失败时不切换地区。
+        记住可用的地区与下架 / 需要年龄验证 / 请求失败的游戏，记录过期前只使用缓存，不再重复请求。
+        """
+        groups = list(groups or STORE_FIELD_GROUPS)
+        # 同一游戏的地区回退串行执行，后到的调用直接使用前一个调用记录的状态
+        with self._key_lock(appid, None, language):
+            status = self.status.get(appid) if self.status is not None else None
+            if self.status is not None and self.status.enabled:
+                metrics.hit("store_status", status is not None)
+            if status is not None and status["state"] != "region":
+                data = empty_store_info()
+                data.update(self.cache.lookup(appid, country, language, groups)[0])
+                return data
+
+            preferred = status["country"] if status is not None else country
+            countries = list(dict.fromkeys([preferred, country, *self.fallback_countries]))
+            first, failures = None, []
+            for region in countries:
+                with self._key_lock(appid, region, language):
+                    data, failure = self._get(appid, region, language, groups)
+                if failure is None:
+                    if self.status is not None:
+                        self.status.record_ok(appid, None if region == country else region)
+                    return data
+                first = first if first is not None else data
+                failures.append(failure)
+                if failure == "error":
+                    # 请求失败不说明该地区没有数据，不切换地区（否则会把游戏固定到其他地区的商店）
+                    break
+
+            state = next(reason for reason in _FAILURE_PRIORITY if reason in failures)
+            tried = ", ".join(countries[:len(failures)])
+            logger.info(f"⊘ AppID {appid} 商店信息不可用（{state}，已尝试: {tried}）")
+            if self.status is not None:
+                self.status.record_failure(appid, state, error=f"{state}: {tried}")
+            return first
+
+    def _get(self, appid, country, language, groups):
+        """返回 (商店信息, 失败原因)：所需字段组都已刷新时原因为 None"""
+        cached, stale = self.cache.lookup(appid, country, language, groups)
+        if self.cache.enabled:
+            for group in groups:
+                metrics.hit(f"store_cache.{group}", group not in stale)
+
+        data = empty_store_info()
+        data.update(cached)
+        failures = []
+        for provider in self.providers:
+            if not stale:
+                break
+            if not any(group in provider.groups for group in stale):
+                continue
+
+            result, failure = self._fetch(provider, appid, country, language)
+            if result is None:
+                failures.append(failure)
+                continue
+            fields = {f for g in provider.groups for f in STORE_FIELD_GROUPS.get(g, [])}
+            data.update({k: v for k, v in result.items() if k in fields})
+            self.cache.put(appid, country, language, result, groups=list(provider.groups))
+            stale = [g for g in stale if g not in provider.groups]
+
+        if not stale:
+            return data, None
+        logger.debug(f"AppID {appid} 商店信息未能刷新: {', '.join(stale)}")
+        return data, next((reason for reason in _FAILURE_PRIORITY if reason in failures), "unavailable")
+
+    def prefetch_prices(self, appids, country="CN", language="schinese"):
+        """批量刷新价格已过期的游戏，减少逐个请求"""
+        provider = next((p for p in self.providers if "price" in p.groups), None)
+        if provider is None or not self.cache.enabled:
+            return 0
+        stale_appids = [a for a in appids if self.cache.lookup(a, country, language, ["price"])[1]]
+        if self.status is not None:
+            # 默认地区不可用或需要其他地区的游戏由 get_with_fallback 单独处理
+            stale_appids = [a for a in stale_appids if self.status.get(a) is None]
+
+        refreshed = 0
+        for start in range(0, len(stale_appids), PRICE_BATCH_SIZE):
+            batch = stale_appids[start:start + PRICE_BATCH_SIZE]
+            if self.slots is None:
+                prices = provider.fetch_prices(batch, country, language)
+            else:
+                with self.slots:
+                    prices = provider.fetch_prices(batch, country, language)
+            for appid, price in prices.items():
+                self.cache.put(appid, country, language, {"price": price}, groups=["price"])
+            refreshed += len(prices)
+        return refreshed
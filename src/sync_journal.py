@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+同步运行日志 - 记录每个游戏完成到哪一步，运行中断后可以从断点继续
+"""
+
+import json
+import threading
+import time
+
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+# 单个游戏的处理进度（依次推进）
+STAGE_PLANNED = "planned"   # 已进入流水线
+STAGE_FETCHED = "fetched"   # 详情已获取（保存在日志中，续跑时不再请求）
+STAGE_WRITTEN = "written"   # 页面已写入 Notion
+STAGE_DONE = "done"         # 每日记录也已写入（或无需写入）
+
+STAGES = (STAGE_PLANNED, STAGE_FETCHED, STAGE_WRITTEN, STAGE_DONE)
+
+
+class SyncJournal:
+    """按运行记录的同步日志，持久化在缓存数据库中"""
+
+    def __init__(self, db):
+        self.db = db
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_tables(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self.db.executescript("""
+                    CREATE TABLE IF NOT EXISTS sync_runs (
+                        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        scope TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        started_at REAL NOT NULL,
+                        finished_at REAL
+                    );
+                    CREATE TABLE IF NOT EXISTS sync_journal (
+                        run_id INTEGER NOT NULL,
+                        appid INTEGER NOT NULL,
+                        stage TEXT NOT NULL,
+                        change TEXT NOT NULL,
+                        details TEXT,
+                        daily_done TEXT NOT NULL DEFAULT '[]',
+                        updated_at REAL NOT NULL,
+                        PRIMARY KEY (run_id, appid)
+                    );
+                """)
+                self._ready = True
+
+    def start(self, scope, resume=False):
+        """开始一次运行；resume=True 且存在未完成的运行时继续使用它，返回 (run_id, 是否续跑)"""
+        self._ensure_tables()
+        rows = self.db.execute(
+            "SELECT run_id FROM sync_runs WHERE scope = ? AND status = 'running' ORDER BY run_id DESC",
+            (scope,),
+        )
+        if rows and resume:
+            run_id = rows[0][0]
+            logger.info(f"从上次中断处继续同步（运行 #{run_id}）")
+            return run_id, True
+
+        if rows:
+            logger.warning("上次同步未完成，本次重新开始（可使用 --resume 从断点继续）")
+            self._close([row[0] for row in rows], "abandoned")
+        elif resume:
+            logger.info("没有未完成的同步，重新开始")
+
+        self.db.execute(
+            "INSERT INTO sync_runs (scope, status, started_at) VALUES (?, 'running', ?)",
+            (scope, time.time()),
+        )
+        run_id = self.db.execute("SELECT MAX(run_id) FROM sync_runs WHERE scope = ?", (scope,))[0][0]
+        return run_id, False
+
+    def entries(self, run_id):
+        """读取运行中已记录的游戏 {appid: {"stage", "change", "details", "daily_done"}}"""
+        self._ensure_tables()
+        rows = self.db.execute(
+            "SELECT appid, stage, change, details, daily_done FROM sync_journal WHERE run_id = ?",
+            (run_id,),
+        )
+        return {
+            appid: {
+                "stage": stage,
+                "change": json.loads(change),
+                "details": tuple(json.loads(details)) if details else None,
+                "daily_done": json.loads(daily_done),
+            }
+            for appid, stage, change, details, daily_done in rows
+        }
+
+    def record(self, run_id, change, stage, details=None, daily_done=None):
+        """记录游戏的处理进度（details / daily_done 为 None 时保留已有值）"""
+        self._ensure_tables()
+        self.db.execute(
+            "INSERT INTO sync_journal (run_id, appid, stage, change, details, daily_done, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (run_id, appid) DO UPDATE SET stage = excluded.stage, change = excluded.change, "
+            "updated_at = excluded.updated_at, "
+            "details = COALESCE(excluded.details, details), "
+            "daily_done = CASE WHEN ? THEN excluded.daily_done ELSE daily_done END",
+            (
+                run_id, int(change["appid"]), stage, json.dumps(change, ensure_ascii=False),
+                json.dumps(details, ensure_ascii=False) if details is not None else None,
+                json.dumps(daily_done or [], ensure_ascii=False), time.time(),
+                daily_done is not None,
+            ),
+        )
+
+    def finish(self, run_id):
+        """运行成功结束：清理日志条目"""
+        self._close([run_id], "finished")
+
+    def _close(self, run_ids, status):
+        now = time.time()
+        self.db.executemany(
+            "UPDATE sync_runs SET status = ?, finished_at = ? WHERE run_id = ?",
+            [(status, now, run_id) for run_id in run_ids],
+        )
+        self.db.executemany("DELETE FROM sync_journal WHERE run_id = ?", [(run_id,) for run_id in run_ids])
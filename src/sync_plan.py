@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+同步计划 - 根据 Steam 游戏列表与 Notion 索引计算变更（不发起任何请求）
+"""
+
+import json
+from datetime import datetime
+
+from config import TIMEZONE, enable_item_update
+from notion_index import normalize_date
+from utils import format_timestamp
+
+PLAN_VERSION = 1
+
+# 计划中保留的 Steam 游戏字段
+_GAME_FIELDS = ("appid", "name", "playtime_forever", "rtime_last_played", "img_icon_url")
+
+
+def plan_game(game, notion_game, item_update=None):
+    """计算单个游戏的变更：action 为 add / update / skip，reason 说明原因"""
+    if item_update is None:
+        item_update = enable_item_update
+
+    change = {
+        "action": "skip",
+        "reason": "",
+        "appid": game["appid"],
+        "name": game["name"],
+        "page_id": notion_game["page_id"] if notion_game else None,
+        "previous_minutes": None,
+        "game": {k: game[k] for k in _GAME_FIELDS if k in game},
+    }
+
+    if not notion_game:
+        change.update(action="add", reason="not_in_notion")
+        return change
+
+    if not item_update:
+        change["reason"] = "item_update_disabled"
+        return change
+
+    if not (game.get("rtime_last_played") or 0) > 0:
+        change["reason"] = "never_played"
+        return change
+
+    game_last_played = format_timestamp(game.get("rtime_last_played"), TIMEZONE, date_only=False)
+    previous_minutes = int(notion_game.get("playtime", 0) or 0)
+    current_minutes = int(game.get("playtime_forever", 0))
+    change["previous_minutes"] = previous_minutes
+
+    if previous_minutes != current_minutes:
+        change.update(action="update", reason="playtime_changed")
+    elif normalize_date(notion_game.get("last_play")) != normalize_date(game_last_played):
+        change.update(action="update", reason="last_play_changed")
+    elif notion_game.get("appid") is None:
+        # 按名称匹配到的旧页面没有 appid，更新时补写
+        change.update(action="update", reason="missing_appid")
+    else:
+        change["reason"] = "unchanged"
+    return change
+
+
+def iter_plan(games, notion_games_map, item_update=None):
+    """逐个生成游戏的变更（供流水线按需消费）"""
+    for game in games:
+        yield plan_game(game, notion_games_map.find("Steam", appid=game["appid"], name=game["name"]), item_update)
+
+
+def plan_sync(games, notion_games_map, item_update=None):
+    """为整个游戏库生成变更计划（纯计算，可序列化为 JSON）"""
+    changes = list(iter_plan(games, notion_games_map, item_update))
+    return {
+        "version": PLAN_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "changes": changes,
+    }
+
+
+def summarize_plan(plan):
+    """统计计划中各类变更数量 {"add": n, "update": n, "skip": n}"""
+    summary = {"add": 0, "update": 0, "skip": 0}
+    for change in plan["changes"]:
+        summary[change["action"]] = summary.get(change["action"], 0) + 1
+    return summary
+
+
+def shard_plan(plan, index, count):
+    """把计划拆分为 count 份，返回第 index 份（从 0 开始）"""
+    return dict(plan, changes=plan["changes"][index::count])
+
+
+def save_plan(plan, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+
+
+def load_plan(path):
+    with open(path, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"不支持的计划版本: {plan.get('version')}")
+    return plan
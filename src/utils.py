@@ -2,11 +2,13 @@ import logging
 import requests
 import time
 from datetime import datetime
+from urllib.parse import urlparse
 from zoneinfo import ZoneInfo
 
-# MISC
-MAX_RETRIES = 20
-RETRY_DELAY = 2
+import retry
+from http_session import get_session
+from metrics import metrics
+from rate_limiter import rate_limiter, parse_retry_after, respect_retry_after
 
 _logger = logging.getLogger(__name__)
 
@@ -34,38 +36,81 @@ def setup_logging(debug=False, logfile=None):
         root_logger.addHandler(file_handler)
 
 
-def send_request_with_retry(
-    url,
-    headers=None,
-    json_data=None,
-    method="post",
-    retries=MAX_RETRIES,
-    retry_delay=RETRY_DELAY,
-    timeout=10,
-):
-    """统一的请求函数（带重试和指数退避）"""
-    for attempt in range(retries):
+def request_with_retry(method, url, policy=None, **kwargs):
+    """
+    按重试策略发送请求（带按主机限流与熔断），返回最后一次的响应，不检查状态码。
+    只重试超时、连接错误与策略中的状态码（429 / 5xx），429 时遵循 Retry-After。
+    """
+    policy = policy or retry.default_policy
+    breaker = retry.circuit_breaker
+    started = time.monotonic()
+    kwargs.setdefault("timeout", 10)
+    host = urlparse(url).netloc or url
+
+    attempt = 0
+    while True:
+        breaker.before_request(url)
+        rate_limiter.acquire(url)
+        response, error = None, None
+        request_started = time.perf_counter()
         try:
-            method_lower = method.lower()
-            if method_lower == "patch":
-                response = requests.patch(url, headers=headers, json=json_data, timeout=timeout)
-            elif method_lower == "post":
-                response = requests.post(url, headers=headers, json=json_data, timeout=timeout)
-            elif method_lower == "get":
-                response = requests.get(url, headers=headers, timeout=timeout)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-
-            response.raise_for_status()
+            response = get_session().request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            error = e
+        metrics.observe(f"http {host}", time.perf_counter() - request_started)
+        if response is not None:
+            metrics.incr(f"http.bytes {host}", len(response.content))
+        else:
+            metrics.incr(f"http.errors {host}")
+
+        if not policy.is_retryable(response, error):
+            if error is not None:
+                raise error
+            breaker.record_success(url)
             return response
 
-        except requests.exceptions.RequestException as e:
-            _logger.warning(f"Request failed (attempt {attempt + 1}/{retries}): {e}")
-            if attempt < retries - 1:
-                time.sleep(retry_delay * (2 ** attempt))  # 指数退避
-            else:
-                _logger.error(f"Max retries exceeded for {url}")
-                raise
+        throttled = response is not None and response.status_code == 429
+        if throttled:
+            # 429 是限流（背压）而不是故障：主机正常响应，由 Retry-After 与限流器暂停处理，不计入熔断
+            breaker.record_success(url)
+        else:
+            breaker.record_failure(url)
+        retry_after = None
+        if throttled:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"), policy.backoff(attempt))
+        delay = policy.next_delay(attempt, started, retry_after)
+        reason = error if error is not None else f"HTTP {response.status_code}"
+        if delay is None:
+            _logger.error(f"Giving up after {attempt + 1} attempt(s) for {url}: {reason}")
+            if error is not None:
+                raise error
+            return response
+
+        _logger.warning(f"Request failed (attempt {attempt + 1}/{policy.max_attempts}): {reason}, retry in {delay:.1f}s")
+        if throttled:
+            respect_retry_after(url, response.headers, default=delay)  # 按 Retry-After 暂停该主机
+        else:
+            time.sleep(delay)
+        metrics.incr(f"http.retries {host}")
+        attempt += 1
+
+
+def send_request_with_retry(url, headers=None, json_data=None, method="post", policy=None, timeout=10):
+    """统一的请求函数（按重试策略重试，最终失败时抛出异常）"""
+    method_lower = method.lower()
+    if method_lower not in ("get", "post", "patch"):
+        raise ValueError(f"Unsupported method: {method}")
+
+    response = request_with_retry(
+        method_lower,
+        url,
+        policy=policy,
+        headers=headers,
+        json=json_data if method_lower != "get" else None,
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response
 
 def parse_steam_date(text: str): 
     text = text.strip() 
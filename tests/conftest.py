@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置：模块按 PYTHONPATH=./src 的方式导入，缓存数据库使用临时目录
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# 导入 notion_game_list 时会按配置创建账号与缓存，测试中不使用真实配置
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="game2notion-test-")
+os.environ.pop("ACCOUNTS_FILE", None)
+os.environ.setdefault("STEAM_USER_ID", "76561198000000000")
+
+from cache import CacheDB  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """独立的缓存数据库"""
+    cache_db = CacheDB(str(tmp_path / "cache.db"))
+    yield cache_db
+    cache_db.close()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""run_for_accounts：单个账号失败不影响其他账号，失败的账号单独汇总（单账号与多账号行为一致）"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import notion_game_list as ngl
+
+
+def accounts(*names):
+    return [SimpleNamespace(name=name) for name in names]
+
+
+def sync(acct):
+    if acct.name == "bob":
+        raise ngl.SyncIncompleteError("1 个游戏写入失败")
+    return (1, 2, 3)
+
+
+def test_failures_are_collected_across_accounts():
+    failures = {}
+    results = ngl.run_for_accounts(accounts("alice", "bob", "carol"), sync, failures)
+
+    assert results == {"alice": (1, 2, 3), "bob": None, "carol": (1, 2, 3)}
+    assert list(failures) == ["bob"]
+    assert isinstance(failures["bob"], ngl.SyncIncompleteError)
+
+
+@pytest.mark.parametrize("names", [("bob",), ("alice",)])
+def test_single_account_behaves_the_same(names):
+    failures = {}
+    results = ngl.run_for_accounts(accounts(*names), sync, failures)
+
+    assert list(results) == list(names)
+    assert (names[0] in failures) == (names[0] == "bob")
+
+
+def test_accounts_run_in_parallel():
+    barrier = threading.Barrier(3, timeout=5)  # 三个账号都进入 func 后才能继续，串行执行会超时
+
+    def wait(acct):
+        barrier.wait()
+        return acct.name
+
+    failures = {}
+    assert ngl.run_for_accounts(accounts("a", "b", "c"), wait, failures) == {"a": "a", "b": "b", "c": "c"}
+    assert failures == {}
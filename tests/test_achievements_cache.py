@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""成就缓存：游玩时间不变时复用进度，没有成就统计的游戏不再请求，请求失败时沿用上次的进度"""
+
+import pytest
+
+import cache as cache_module
+import notion_game_list as ngl
+from cache import AchievementsCache
+
+DAY = 86400
+USER = "76561198000000000"
+
+PROGRESS = {"playerstats": {"success": True, "achievements": [
+    {"apiname": "A", "achieved": 1, "unlocktime": 1_600_000_500},
+    {"apiname": "B", "achieved": 1, "unlocktime": 1_600_000_100},
+    {"apiname": "C", "achieved": 0, "unlocktime": 0},
+]}}
+NO_STATS = {"playerstats": {"success": False, "error": "Requested app has no stats"}}
+PRIVATE = {"playerstats": {"success": False, "error": "Profile is not public"}}
+
+
+@pytest.fixture
+def steam(monkeypatch, db):
+    """Steam 成就接口替身：按顺序返回 responses 中的结果"""
+    responses = []
+    requested = []
+
+    def fake_achievements(game, api_key, user_id):
+        requested.append(game["appid"])
+        return responses.pop(0)
+
+    monkeypatch.setattr(ngl, "achievements_cache", AchievementsCache(db, no_stats_ttl=30 * DAY))
+    monkeypatch.setattr(ngl, "get_achievements_from_steam", fake_achievements)
+    return responses, requested
+
+
+def game(appid, playtime):
+    return {"appid": appid, "name": f"Game {appid}", "playtime_forever": playtime}
+
+
+def test_progress_is_reused_until_playtime_changes(steam):
+    responses, requested = steam
+    acct = ngl.accounts[0]
+    responses.append(PROGRESS)
+
+    first = ngl._get_achievements_info(acct, game(620, 300))
+    assert first == {"total": 3, "achieved": 2, "earliest_unlock": 1_600_000_100}
+    assert ngl._get_achievements_info(acct, game(620, 300)) == first
+    assert requested == [620]
+
+    responses.append(PROGRESS)
+    ngl._get_achievements_info(acct, game(620, 360))
+    assert requested == [620, 620]
+
+
+def test_failed_request_keeps_last_progress(steam):
+    responses, requested = steam
+    acct = ngl.accounts[0]
+    responses.extend([PROGRESS, None])
+
+    known = ngl._get_achievements_info(acct, game(620, 300))
+    assert ngl._get_achievements_info(acct, game(620, 420)) == known
+    assert ngl.achievements_cache.get_progress(USER, 620)[0] == 300  # 失败结果不写入缓存
+
+
+def test_no_stats_is_cached_only_for_owned_games(steam, monkeypatch):
+    responses, requested = steam
+    acct = ngl.accounts[0]
+
+    # 未拥有的游戏返回的错误可能与账号有关，不记录
+    responses.append(NO_STATS)
+    ngl._get_achievements_info(acct, {"appid": 70}, owned=False)
+    assert ngl.achievements_cache.get_total(70) is None
+
+    responses.append(NO_STATS)
+    assert ngl._get_achievements_info(acct, game(70, 10))["total"] == -1
+    assert ngl.achievements_cache.get_total(70) == 0
+    ngl._get_achievements_info(acct, game(70, 20))
+    assert requested == [70, 70]
+
+    # 过期后重新查询
+    now = cache_module.time.time() + 31 * DAY
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    responses.append(PROGRESS)
+    assert ngl._get_achievements_info(acct, game(70, 20))["total"] == 3
+    assert requested == [70, 70, 70]
+
+
+def test_account_errors_are_not_cached(steam):
+    responses, requested = steam
+    acct = ngl.accounts[0]
+    responses.extend([PRIVATE, PRIVATE])
+
+    ngl._get_achievements_info(acct, game(440, 50))
+    ngl._get_achievements_info(acct, game(440, 50))
+
+    assert requested == [440, 440]
+    assert ngl.achievements_cache.get_total(440) is None
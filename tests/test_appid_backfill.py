@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""按名称匹配到的旧页面（没有 appid）在更新时补写 appid，之后改名仍能按 appid 匹配"""
+
+import pytest
+
+import notion_game_list as ngl
+import sync_plan
+from config import get_property_name as prop
+from notion_index import GameLookup, NotionGameIndex
+from platforms.steam import parse_achievements_info
+
+GAME = {"appid": 620, "name": "Portal 2", "playtime_forever": 600, "rtime_last_played": 1_709_253_000}
+
+
+def legacy_page(page_id="page-1", name="Portal 2", playtime=600, appid=None):
+    properties = {
+        prop("name"): {"type": "title", "title": [{"plain_text": name}]},
+        prop("platform"): {"type": "select", "select": {"name": "Steam"}},
+        prop("playtime"): {"type": "number", "number": playtime},
+        prop("last_play"): {"type": "date", "date": {"start": "2024-03-01T08:30:00.000+08:00"}},
+        prop("achieved_achievements"): {"type": "number", "number": -1},
+    }
+    if appid is not None:
+        properties[prop("appid")] = {"type": "rich_text", "rich_text": [{"plain_text": str(appid)}]}
+    return {"id": page_id, "last_edited_time": "2024-03-01T00:31:00.000Z", "properties": properties}
+
+
+class EchoNotion:
+    """PATCH 后返回合并了新属性的页面（读取格式）"""
+
+    def __init__(self, page):
+        self.page = page
+        self.patches = []
+
+    def update_page(self, page_id, data):
+        self.patches.append(data["properties"])
+        page = dict(self.page, properties=dict(self.page["properties"]))
+        for name, value in data["properties"].items():
+            if value["type"] == "rich_text":
+                value = {"type": "rich_text", "rich_text": [{"plain_text": value["rich_text"][0]["text"]["content"]}]}
+            page["properties"][name] = value
+        return page
+
+
+@pytest.fixture
+def acct(monkeypatch, db):
+    acct = ngl.accounts[0]
+    monkeypatch.setattr(acct, "notion_index", NotionGameIndex(db, "games-db", lambda payload: {"results": []}))
+    monkeypatch.setattr(ngl, "TIMEZONE", "Asia/Shanghai")
+    return acct
+
+
+def test_update_diff_adds_appid_for_legacy_pages(acct):
+    acct.notion_index.upsert_page(legacy_page())
+    diff = ngl.build_update_diff(acct, "page-1", GAME, parse_achievements_info(None), {}, force_update=False)
+
+    assert list(diff) == [prop("appid")]
+    assert diff[prop("appid")]["rich_text"][0]["text"]["content"] == "620"
+
+
+def test_update_diff_leaves_pages_with_appid_alone(acct):
+    acct.notion_index.upsert_page(legacy_page(appid=620))
+    assert ngl.build_update_diff(acct, "page-1", GAME, parse_achievements_info(None), {}, force_update=False) == {}
+
+
+def test_plan_updates_unchanged_legacy_pages():
+    legacy = GameLookup([{"page_id": "page-1", "name": "Portal 2", "platform": "Steam", "appid": None,
+                          "playtime": 600, "last_play": "2024-03-01T00:30:00.000Z"}])
+    change = sync_plan.plan_game(GAME, legacy.find("Steam", appid=620, name="Portal 2"), item_update=True)
+    assert (change["action"], change["reason"], change["previous_minutes"]) == ("update", "missing_appid", 600)
+
+    current = GameLookup([dict(legacy.find("Steam", name="Portal 2"), appid=620)])
+    change = sync_plan.plan_game(GAME, current.find("Steam", appid=620), item_update=True)
+    assert change["action"] == "skip"
+
+
+def test_renamed_game_still_matches_after_backfill(monkeypatch, acct):
+    acct.notion_index.upsert_page(legacy_page())
+    notion = EchoNotion(legacy_page())
+    monkeypatch.setattr(acct, "notion", notion)
+
+    assert ngl.update_game_in_notion(acct, "page-1", GAME, parse_achievements_info(None), {}, force_update=False)
+
+    assert list(notion.patches[0]) == [prop("appid")]
+    renamed = acct.notion_index.lookup().find("Steam", appid=620, name="Portal 2: Community Edition")
+    assert renamed is not None and renamed["page_id"] == "page-1"
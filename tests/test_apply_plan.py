@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""apply 执行已保存的计划前刷新本地镜像，按 Notion 当前的属性值计算差异"""
+
+import pytest
+
+import notion_game_list as ngl
+from config import get_property_name as prop
+from notion_index import NotionGameIndex
+from platforms.steam import parse_achievements_info
+from sync_journal import SyncJournal
+from sync_plan import plan_sync, save_plan
+
+GAME = {"appid": 620, "name": "Portal 2", "playtime_forever": 600, "rtime_last_played": 1_709_253_000,
+        "img_icon_url": ""}
+
+
+def page(playtime, edited):
+    return {
+        "id": "page-1",
+        "last_edited_time": edited,
+        "properties": {
+            prop("name"): {"type": "title", "title": [{"plain_text": "Portal 2"}]},
+            prop("platform"): {"type": "select", "select": {"name": "Steam"}},
+            prop("appid"): {"type": "rich_text", "rich_text": [{"plain_text": "620"}]},
+            prop("playtime"): {"type": "number", "number": playtime},
+            prop("last_play"): {"type": "date", "date": {"start": "2024-02-01T00:00:00.000Z"}},
+            prop("achieved_achievements"): {"type": "number", "number": -1},
+        },
+    }
+
+
+class RecordingNotion:
+    def __init__(self):
+        self.patches = []
+
+    def update_page(self, page_id, data):
+        self.patches.append((page_id, data["properties"]))
+        return None
+
+
+@pytest.fixture
+def plan_file(monkeypatch, db, tmp_path):
+    """计划生成时 Notion 中的游戏时长为 500，计划把它更新为 600"""
+    notion_pages = [page(500, "2024-03-01T00:00:00.000Z")]
+    index = NotionGameIndex(db, "games-db", lambda payload: {"results": list(notion_pages), "has_more": False})
+    index.refresh()
+    path = str(tmp_path / "plan.json")
+    save_plan(plan_sync([GAME], index.lookup(), item_update=True), path)
+
+    acct = ngl.accounts[0]
+    notion = RecordingNotion()
+    monkeypatch.setattr(acct, "notion", notion)
+    monkeypatch.setattr(acct, "notion_index", NotionGameIndex(db, "games-db", index._query))
+    monkeypatch.setattr(ngl, "sync_journal", SyncJournal(db))
+    monkeypatch.setattr(ngl, "enable_full_update", False)
+    monkeypatch.setattr(ngl, "_fetch_game_details", lambda acct, game, mode: (parse_achievements_info(None), {}))
+    return path, notion_pages, notion
+
+
+def test_apply_diffs_against_refreshed_index(plan_file):
+    path, notion_pages, notion = plan_file
+    # 计划生成后 Notion 中的时长被改回 600，本地镜像还不知道
+    notion_pages[:] = [page(600, "2024-03-02T00:00:00.000Z")]
+
+    ngl.apply_sync_plan(ngl.accounts[0], path)
+
+    # 只剩最后游玩时间不同，游戏时长与 Notion 一致不再写入
+    assert len(notion.patches) == 1
+    assert list(notion.patches[0][1]) == [prop("last_play")]
+
+
+def test_apply_restores_values_changed_in_notion(plan_file):
+    path, notion_pages, notion = plan_file
+    # 本地镜像记录的已是 600（例如更早的一次写入），之后有人在 Notion 中改成了 120
+    ngl.accounts[0].notion_index.upsert_page(page(600, "2024-03-01T12:00:00.000Z"))
+    notion_pages[:] = [page(120, "2024-03-02T00:00:00.000Z")]
+
+    ngl.apply_sync_plan(ngl.accounts[0], path)
+
+    assert sorted(notion.patches[0][1]) == sorted([prop("playtime"), prop("last_play")])
+    assert notion.patches[0][1][prop("playtime")]["number"] == 600
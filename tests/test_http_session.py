@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""共享会话：复用 keep-alive 连接、按配置重建连接池、不保存服务端下发的 Cookie"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_session
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+
+    def do_GET(self):
+        self.server.clients.append(self.client_address)
+        body = (self.headers.get("Cookie") or "").encode()
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.clients = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    http_session.configure_session()
+    yield
+    http_session.configure_session()
+
+
+def test_requests_reuse_one_connection(server):
+    httpd, url = server
+    session = http_session.get_session()
+
+    for _ in range(3):
+        assert session.get(url, timeout=5).status_code == 200
+
+    assert len(httpd.clients) == 3
+    assert len(set(httpd.clients)) == 1  # 同一个客户端端口，即同一条连接
+
+
+def test_server_cookies_are_not_kept(server):
+    _, url = server
+    session = http_session.get_session()
+
+    session.get(url, timeout=5)
+    assert session.get(url, timeout=5).text == ""
+    # 调用方显式传入的 Cookie 照常发送
+    assert session.get(url, headers={"Cookie": "lang=schinese"}, timeout=5).text == "lang=schinese"
+
+
+def test_session_is_shared_across_threads():
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(http_session.get_session())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(s) for s in sessions}) == 1
+
+
+def test_configure_rebuilds_pool():
+    before = http_session.get_session()
+    http_session.configure_session(pool_connections=3, pool_maxsize=0)
+
+    session = http_session.get_session()
+    adapter = session.get_adapter("https://store.steampowered.com/")
+    assert session is not before
+    assert (adapter._pool_connections, adapter._pool_maxsize) == (3, 1)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""NotionClient 的 asyncio 接口：与同步接口共用请求合并、并发上限和统计"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+import notion_client
+from notion_client import NotionClient, endpoint_name
+
+
+class Transport:
+    """替换 send_request_with_retry：记录请求并统计同时进行的请求数"""
+
+    def __init__(self, delay=0.05, fail_paths=()):
+        self.delay = delay
+        self.fail_paths = set(fail_paths)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, url, headers=None, json_data=None, method="post"):
+        with self.lock:
+            self.calls.append((method, url))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if url.rsplit("/", 1)[-1] in self.fail_paths:
+                raise requests.HTTPError("400 Client Error")
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'{"object": "page", "id": "%s"}' % url.rsplit("/", 1)[-1].encode()
+            return response
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    transport = Transport()
+    monkeypatch.setattr(notion_client, "send_request_with_retry", transport)
+    client = NotionClient("secret", base_url="http://notion.test/v1", max_concurrency=2)
+    yield client, transport
+    client.close()
+
+
+def test_identical_async_queries_are_coalesced(client):
+    client, transport = client
+
+    async def main():
+        return await asyncio.gather(*(client.aquery_database("db", {"page_size": 100}) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(transport.calls) == 1
+    assert all(result == results[0] for result in results)
+    stats = client.stats()[endpoint_name("post", "databases/db/query")]
+    assert (stats["calls"], stats["coalesced"]) == (1, 4)
+
+
+def test_async_writes_respect_the_concurrency_limit(client):
+    client, transport = client
+
+    async def main():
+        return await asyncio.gather(*(client.aupdate_page(f"page-{i}", {"properties": {}}) for i in range(6)))
+
+    results = asyncio.run(main())
+
+    assert [result["id"] for result in results] == [f"page-{i}" for i in range(6)]
+    assert len(transport.calls) == 6  # 写入请求不合并
+    assert transport.peak == 2
+
+
+def test_sync_and_async_callers_share_in_flight_requests(client):
+    client, transport = client
+    transport.delay = 0.2
+
+    async def main():
+        pending = asyncio.ensure_future(client.arequest("get", "pages/page-1"))
+        await asyncio.sleep(0.05)  # 协程的请求已在进行中
+        sync_result = await asyncio.get_running_loop().run_in_executor(
+            None, client.request, "get", "pages/page-1"
+        )
+        return await pending, sync_result
+
+    async_result, sync_result = asyncio.run(main())
+
+    assert async_result == sync_result == {"object": "page", "id": "page-1"}
+    assert len(transport.calls) == 1
+
+
+def test_async_errors_propagate_and_are_counted(client):
+    client, transport = client
+    transport.fail_paths = {"page-9"}
+
+    with pytest.raises(requests.HTTPError):
+        asyncio.run(client.arequest("get", "pages/page-9"))
+
+    assert client.stats()[endpoint_name("get", "pages/page-9")]["errors"] == 1
+    # 失败的只读请求不会留在进行中请求表里，之后的调用重新请求
+    transport.fail_paths = set()
+    assert asyncio.run(client.arequest("get", "pages/page-9"))["id"] == "page-9"
+    assert len(transport.calls) == 2
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Notion 本地镜像：已归档 / 删除的页面从镜像中移除并重新添加"""
+
+import pytest
+import requests
+
+import notion_game_list as ngl
+import sync_plan
+from cache import StateStore
+from notion_index import NotionGameIndex
+from platforms.steam import parse_achievements_info
+from sync_journal import SyncJournal
+
+DATABASE_ID = "games-db"
+
+
+def notion_page(page_id, name, appid, playtime=0):
+    return {
+        "id": page_id,
+        "last_edited_time": "2024-01-01T00:00:00.000Z",
+        "properties": {
+            "游戏名称": {"type": "title", "title": [{"plain_text": name}]},
+            "游戏平台": {"type": "select", "select": {"name": "Steam"}},
+            "游戏时长": {"type": "number", "number": playtime},
+            "appid": {"type": "rich_text", "rich_text": [{"plain_text": str(appid)}]},
+        },
+    }
+
+
+def http_error(status, text=""):
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode()
+    return requests.HTTPError(f"{status} Client Error", response=response)
+
+
+class FakeNotion:
+    """PATCH 失败时抛出指定的 HTTPError，记录新增的页面"""
+
+    def __init__(self, error):
+        self.error = error
+        self.created = []
+
+    def update_page(self, page_id, data):
+        raise self.error
+
+    def create_page(self, data):
+        props = data["properties"]
+        name = props["游戏名称"]["title"][0]["text"]["content"]
+        self.created.append(name)
+        return notion_page(f"new-{len(self.created)}", name, props["appid"]["rich_text"][0]["text"]["content"])
+
+
+@pytest.fixture
+def index(db):
+    index = NotionGameIndex(db, DATABASE_ID, lambda payload: {"results": []})
+    index.upsert_page(notion_page("page-1", "Alpha", 1, playtime=60))
+    return index
+
+
+def test_remove_is_persisted(db, index):
+    index.remove("page-1")
+
+    assert index.get("page-1") is None
+    reloaded = NotionGameIndex(db, DATABASE_ID, lambda payload: {"results": []})
+    assert reloaded.lookup().find("Steam", appid=1, name="Alpha") is None
+
+
+@pytest.mark.parametrize("error", [
+    http_error(404, '{"code": "object_not_found"}'),
+    http_error(400, '{"code": "validation_error", "message": "Can\'t edit block that is archived."}'),
+])
+def test_gone_page_is_dropped_from_index(monkeypatch, index, error):
+    acct = ngl.accounts[0]
+    monkeypatch.setattr(acct, "notion", FakeNotion(error))
+    monkeypatch.setattr(acct, "notion_index", index)
+
+    game = {"appid": 1, "name": "Alpha", "playtime_forever": 90}
+    result = ngl.update_game_in_notion(acct, "page-1", game, None, {}, properties={"游戏时长": {"number": 1.5}})
+
+    assert result is None
+    assert index.get("page-1") is None
+
+
+@pytest.mark.parametrize("error", [
+    http_error(400, '{"code": "validation_error", "message": "body failed validation"}'),
+    http_error(500),
+])
+def test_other_errors_keep_the_index_entry(monkeypatch, index, error):
+    acct = ngl.accounts[0]
+    monkeypatch.setattr(acct, "notion", FakeNotion(error))
+    monkeypatch.setattr(acct, "notion_index", index)
+
+    game = {"appid": 1, "name": "Alpha", "playtime_forever": 90}
+    result = ngl.update_game_in_notion(acct, "page-1", game, None, {}, properties={"游戏时长": {"number": 1.5}})
+
+    assert result is False
+    assert index.get("page-1") is not None
+
+
+def test_archived_page_is_re_added_on_resume(monkeypatch, db, index):
+    acct = ngl.accounts[0]
+    notion = FakeNotion(http_error(404))
+    monkeypatch.setattr(acct, "notion", notion)
+    monkeypatch.setattr(acct, "notion_index", index)
+    monkeypatch.setattr(ngl, "sync_state", StateStore(db))
+    monkeypatch.setattr(ngl, "sync_journal", SyncJournal(db))
+    monkeypatch.setattr(sync_plan, "enable_item_update", True)
+    monkeypatch.setattr(ngl.owned_games_cache, "enabled", False)
+    monkeypatch.setattr(ngl, "get_owned_games_from_steam", lambda *a, **k: [
+        {"appid": 1, "name": "Alpha", "playtime_forever": 90, "rtime_last_played": 1_700_000_000, "img_icon_url": ""},
+    ])
+    monkeypatch.setattr(ngl, "query_all_games_from_notion", lambda acct, *a, **k: acct.notion_index.lookup())
+    monkeypatch.setattr(ngl, "_fetch_game_details", lambda acct, game, mode: (parse_achievements_info(None), {}))
+
+    with pytest.raises(ngl.SyncIncompleteError):
+        ngl.sync_games_to_notion(acct)
+    assert notion.created == []
+
+    ngl.sync_games_to_notion(acct, resume=True)
+
+    assert notion.created == ["Alpha"]
+    assert index.lookup().find("Steam", appid=1, name="Alpha")["page_id"] == "new-1"
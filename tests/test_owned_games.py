@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""OwnedGamesCache 与 add 使用已拥有游戏信息"""
+
+import pytest
+import requests
+
+import notion_game_list as ngl
+from cache import OwnedGamesCache
+from notion_index import GameLookup
+from platforms import steam
+
+USER = "76561198000000000"
+
+
+def _game(appid, playtime):
+    return {"appid": appid, "name": f"Game {appid}", "playtime_forever": playtime, "rtime_last_played": 1700000000}
+
+
+def test_lookup_distinguishes_owned_unowned_and_unknown(db):
+    cache = OwnedGamesCache(db, ttl=3600)
+    cache.update(USER, [_game(10, 3445)], requested=[10, 20])
+
+    found, missing = cache.lookup(USER, [10, 20, 30])
+
+    assert found == {10: _game(10, 3445), 20: None}
+    assert missing == [30]
+
+
+def test_entries_expire_and_survive_restart(db):
+    OwnedGamesCache(db, ttl=3600).update(USER, [_game(10, 3445)])
+
+    # 新实例（下一次运行）从数据库读取
+    found, missing = OwnedGamesCache(db, ttl=3600).lookup(USER, [10])
+    assert found[10]["playtime_forever"] == 3445 and missing == []
+
+    found, missing = OwnedGamesCache(db, ttl=-1).lookup(USER, [10])
+    assert found == {} and missing == [10]
+
+
+def test_get_owned_games_returns_none_on_http_error(monkeypatch):
+    class Response:
+        status_code = 500
+
+        def raise_for_status(self):
+            raise requests.HTTPError("500 Server Error")
+
+    monkeypatch.setattr(steam, "_steam_api_get", lambda url, params: Response())
+
+    assert steam.get_owned_games_from_steam("key", USER, appids=[10]) is None
+
+
+def test_failed_lookup_is_not_cached_as_unowned(monkeypatch, db):
+    cache = OwnedGamesCache(db, ttl=3600)
+    monkeypatch.setattr(ngl, "owned_games_cache", cache)
+    monkeypatch.setattr(ngl, "get_owned_games_from_steam", lambda *a, **k: None)
+
+    with pytest.raises(RuntimeError):
+        ngl._get_owned_games(ngl.accounts[0], [10])
+
+    assert cache.lookup(USER, [10]) == ({}, [10])
+
+
+def test_add_multiple_aborts_when_owned_games_unavailable(monkeypatch, db):
+    monkeypatch.setattr(ngl, "owned_games_cache", OwnedGamesCache(db, ttl=3600))
+    monkeypatch.setattr(ngl, "get_owned_games_from_steam", lambda *a, **k: None)
+    monkeypatch.setattr(ngl, "query_all_games_from_notion", lambda *a, **k: GameLookup([]))
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("不应写入游玩时间未知的游戏")
+
+    monkeypatch.setattr(ngl, "_fetch_appid_details", unexpected)
+    monkeypatch.setattr(ngl, "_write_appid", unexpected)
+
+    assert ngl.add_multiple_games_by_appids(ngl.accounts[0], "10,20") is False
+
+
+def test_missing_appids_are_queried_in_batches(monkeypatch, db):
+    cache = OwnedGamesCache(db, ttl=3600)
+    cache.update(USER, [_game(5, 60)], requested=[5])
+    batches = []
+
+    def owned_games(api_key, user_id, include_free, appids=None):
+        batches.append(list(appids))
+        return [_game(appid, 10) for appid in appids if appid % 2 == 0]  # 只拥有偶数 appid
+
+    monkeypatch.setattr(ngl, "owned_games_cache", cache)
+    monkeypatch.setattr(ngl, "get_owned_games_from_steam", owned_games)
+    monkeypatch.setattr(ngl, "OWNED_GAMES_BATCH_SIZE", 4)
+
+    owned = ngl._get_owned_games(ngl.accounts[0], [5] + list(range(10, 20)))
+
+    assert batches == [[10, 11, 12, 13], [14, 15, 16, 17], [18, 19]]
+    assert sorted(owned) == [5, 10, 12, 14, 16, 18]
+    assert cache.lookup(USER, [11, 19])[0] == {11: None, 19: None}  # 未拥有的结果也已缓存
+
+
+def test_failed_batch_keeps_earlier_batches(monkeypatch, db):
+    cache = OwnedGamesCache(db, ttl=3600)
+    responses = [[_game(10, 10)], None]
+    monkeypatch.setattr(ngl, "owned_games_cache", cache)
+    monkeypatch.setattr(ngl, "get_owned_games_from_steam", lambda *a, **k: responses.pop(0))
+    monkeypatch.setattr(ngl, "OWNED_GAMES_BATCH_SIZE", 2)
+
+    with pytest.raises(RuntimeError):
+        ngl._get_owned_games(ngl.accounts[0], [10, 11, 12, 13])
+
+    assert cache.lookup(USER, [10, 11, 12, 13]) == ({10: _game(10, 10), 11: None}, [12, 13])
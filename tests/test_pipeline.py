@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""run_pipeline 的条目流转与异常传播"""
+
+import threading
+
+import pytest
+
+from pipeline import PipelineStage, run_pipeline
+
+
+def _collect():
+    done = []
+    lock = threading.Lock()
+
+    def on_done(item, error):
+        with lock:
+            done.append((item, error))
+
+    return done, on_done
+
+
+def test_items_flow_through_all_stages():
+    done, on_done = _collect()
+    stages = [
+        PipelineStage("double", lambda x: x * 2, workers=3, queue_size=2),
+        PipelineStage("inc", lambda x: x + 1, workers=2, queue_size=2),
+    ]
+
+    run_pipeline(range(20), stages, on_done)
+
+    assert sorted(item for item, _ in done) == [x * 2 + 1 for x in range(20)]
+    assert all(error is None for _, error in done)
+
+
+def test_stage_error_is_reported_per_item():
+    done, on_done = _collect()
+
+    def fragile(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    run_pipeline(range(5), [PipelineStage("fragile", fragile), PipelineStage("tail", lambda x: x)], on_done)
+
+    errors = {item: error for item, error in done if error is not None}
+    assert list(errors) == [3] and isinstance(errors[3], ValueError)
+    assert sorted(item for item, error in done if error is None) == [0, 1, 2, 4]
+
+
+def test_producer_error_is_reraised_after_draining():
+    done, on_done = _collect()
+
+    def items():
+        yield 1
+        yield 2
+        raise RuntimeError("journal write failed")
+
+    with pytest.raises(RuntimeError, match="journal write failed"):
+        run_pipeline(items(), [PipelineStage("noop", lambda x: x, queue_size=1)], on_done)
+
+    # 已生产的条目仍然处理完毕
+    assert sorted(item for item, _ in done) == [1, 2]
+
+
+def test_on_done_error_is_reraised_and_remaining_items_drain():
+    seen = []
+
+    def on_done(item, error):
+        seen.append(item)
+        if item == 0:
+            raise KeyError("on_done failed")
+
+    with pytest.raises(KeyError):
+        run_pipeline(range(10), [PipelineStage("noop", lambda x: x, workers=1, queue_size=1)], on_done)
+
+    assert sorted(seen) == list(range(10))
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""只 PATCH 有变化的属性：日期规整、读取 / 写入格式的属性比较"""
+
+import pytest
+
+import sync_plan
+from notion_index import GameLookup, diff_properties, normalize_date, property_value
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-03-01T08:30:45.123+08:00", "2024-03-01T00:30:00+00:00"),
+    ("2024-03-01T00:30:00.000Z", "2024-03-01T00:30:00+00:00"),
+    ("2024-03-01T08:30:59", "2024-03-01T08:30:00"),  # 无时区信息时只截断到分钟
+    ("2024-03-01", "2024-03-01"),
+    ("not-a-dateTime", "not-a-dateTime"),
+    (None, None),
+])
+def test_normalize_date(value, expected):
+    assert normalize_date(value) == expected
+
+
+def test_read_and_write_formats_compare_equal():
+    # Notion 返回的读取格式
+    stored = {
+        "name": {"type": "title", "title": [{"plain_text": "Half-Life"}]},
+        "tags": {"type": "multi_select", "multi_select": [{"name": "FPS"}, {"name": "Action"}]},
+        "last_play": {"type": "date", "date": {"start": "2024-03-01T08:30:00.000+08:00"}},
+        "score": {"type": "number", "number": 96},
+    }
+    # build_update_properties 生成的写入格式
+    written = {
+        "name": {"type": "title", "title": [{"text": {"content": "Half-Life"}}]},
+        "tags": {"type": "multi_select", "multi_select": [{"name": "Action"}, {"name": "FPS"}]},
+        "last_play": {"type": "date", "date": {"start": "2024-03-01T00:30:00Z"}},
+        "score": {"type": "number", "number": 96},
+    }
+    for name in stored:
+        assert property_value(written[name]) == property_value(stored[name]), name
+
+
+def test_diff_keeps_only_changed_or_unknown_properties():
+    current = {
+        "游戏时长": 12.5,
+        "标签": ["Action", "FPS"],
+        "最后游玩": "2024-03-01T00:30:00+00:00",
+    }
+    properties = {
+        "游戏时长": {"type": "number", "number": 13.0},
+        "标签": {"type": "multi_select", "multi_select": [{"name": "FPS"}, {"name": "Action"}]},
+        "最后游玩": {"type": "date", "date": {"start": "2024-03-01T08:30:00+08:00"}},
+        "评分": {"type": "number", "number": 90},
+    }
+
+    assert sorted(diff_properties(properties, current)) == ["游戏时长", "评分"]
+    assert diff_properties({}, current) == {}
+
+
+def test_plan_ignores_last_play_timezone_differences(monkeypatch):
+    monkeypatch.setattr(sync_plan, "TIMEZONE", "Asia/Shanghai")
+    game = {"appid": 10, "name": "Counter-Strike", "playtime_forever": 300, "rtime_last_played": 1_709_253_000}
+    page = {"page_id": "page-10", "name": "Counter-Strike", "platform": "Steam", "appid": 10, "playtime": 300}
+
+    # 1_709_253_000 = 2024-03-01T00:30:00Z，Notion 中以 UTC 保存
+    same = GameLookup([dict(page, last_play="2024-03-01T00:30:00.000Z")])
+    change = sync_plan.plan_game(game, same.find("Steam", appid=10), item_update=True)
+    assert (change["action"], change["reason"]) == ("skip", "unchanged")
+
+    later = GameLookup([dict(page, last_play="2024-02-28T00:30:00.000Z")])
+    change = sync_plan.plan_game(game, later.find("Steam", appid=10), item_update=True)
+    assert (change["action"], change["reason"]) == ("update", "last_play_changed")
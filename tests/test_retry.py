@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""RetryPolicy、CircuitBreaker 与 request_with_retry 的熔断计数"""
+
+import random
+
+import pytest
+import requests
+
+import retry
+import utils
+from retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+URL = "http://api.example.test/v1/pages"
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b"{}"
+
+
+class FakeSession:
+    """按顺序返回预设的响应（或抛出异常）"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_only_transient_failures_are_retryable():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(FakeResponse(429))
+    assert policy.is_retryable(FakeResponse(503))
+    assert not policy.is_retryable(FakeResponse(400))
+    assert not policy.is_retryable(FakeResponse(200))
+    assert policy.is_retryable(error=requests.exceptions.ConnectTimeout())
+    assert not policy.is_retryable(error=CircuitOpenError("open"))
+    assert not policy.is_retryable(error=requests.exceptions.InvalidURL())
+
+
+def test_next_delay_respects_attempts_budget_and_retry_after(monkeypatch):
+    policy = RetryPolicy(max_attempts=3, base_delay=2, max_delay=5, budget=10)
+    monkeypatch.setattr(retry.time, "monotonic", lambda: 100.0)
+
+    assert policy.next_delay(0, started=100.0, retry_after=4) == 4
+    assert policy.next_delay(2, started=100.0) is None          # 次数用尽
+    assert policy.next_delay(0, started=93.0, retry_after=4) is None  # 超出时间预算
+
+    random.seed(1)
+    delays = [policy.backoff(attempt) for attempt in range(6) for _ in range(50)]
+    assert all(0 <= d <= 5 for d in delays) and max(delays) > 4
+
+
+def test_breaker_opens_then_half_opens_after_reset(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(retry.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure(URL)
+    breaker.before_request(URL)
+    breaker.record_failure(URL)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(URL)
+    breaker.before_request("http://other.example.test/")  # 按主机独立
+
+    now[0] += 31
+    breaker.before_request(URL)  # 试探请求放行
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(URL)  # 试探期间其余请求仍被拒绝
+
+    breaker.record_success(URL)
+    breaker.before_request(URL)
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    monkeypatch.setattr(retry, "circuit_breaker", breaker)
+    monkeypatch.setattr(retry, "default_policy", RetryPolicy(max_attempts=10, base_delay=0, budget=60))
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+    return breaker
+
+
+def test_rate_limiting_does_not_open_breaker(monkeypatch, fast_retries):
+    session = FakeSession([FakeResponse(429, {"Retry-After": "0"})] * 6 + [FakeResponse(200)])
+    monkeypatch.setattr(utils, "get_session", lambda: session)
+
+    assert utils.request_with_retry("post", URL).status_code == 200
+    assert session.calls == 7
+    fast_retries.before_request(URL)  # 未熔断
+
+
+def test_server_errors_open_breaker(monkeypatch, fast_retries):
+    session = FakeSession([FakeResponse(503), requests.exceptions.ConnectionError("down"), FakeResponse(502)])
+    monkeypatch.setattr(utils, "get_session", lambda: session)
+
+    with pytest.raises(CircuitOpenError):
+        utils.request_with_retry("post", URL)
+    assert session.calls == 3
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""StoreCache：按字段组过期、部分刷新合并、按最近访问淘汰"""
+
+import pytest
+
+import cache as cache_module
+from cache import StoreCache
+
+DAY = 86400
+TTLS = {"static": 30 * DAY, "media": 30 * DAY, "tags": 7 * DAY, "price": DAY, "review": DAY}
+
+FULL = {
+    "game_name": "Portal", "genres": ["Puzzle"], "developers": ["Valve"], "publishers": ["Valve"],
+    "release_date": "2007-10-10", "info": "", "app_icon": "", "header_image": "",
+    "tag": ["Puzzle", "Sci-fi"], "price": "¥ 37.00", "review": "好评如潮",
+}
+
+
+@pytest.fixture
+def now(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_each_group_expires_on_its_own_ttl(db, now):
+    store = StoreCache(db, TTLS)
+    store.put(400, "CN", "schinese", FULL)
+
+    now[0] += 2 * DAY
+    # 价格已过期，只需要静态信息与标签时仍可命中
+    assert store.get(400, "CN", "schinese", groups=["static", "tags"])["game_name"] == "Portal"
+    assert store.get(400, "CN", "schinese", groups=["price"]) is None
+    assert store.get(400, "CN", "schinese") is None
+
+    now[0] += 6 * DAY
+    assert store.get(400, "CN", "schinese", groups=["static"]) is not None
+    assert store.get(400, "CN", "schinese", groups=["static", "tags"]) is None
+
+
+def test_partial_refresh_merges_and_renews_only_those_groups(db, now):
+    store = StoreCache(db, TTLS)
+    store.put(400, "CN", "schinese", FULL)
+
+    now[0] += 2 * DAY
+    store.put(400, "CN", "schinese", {"price": "¥ 9.00", "review": "特别好评"}, groups=["price", "review"])
+
+    data = store.get(400, "CN", "schinese")
+    assert data["price"] == "¥ 9.00"
+    assert data["tag"] == ["Puzzle", "Sci-fi"]  # 未刷新的字段组保留原值
+    now[0] += 6 * DAY
+    assert store.get(400, "CN", "schinese", groups=["price"]) is None
+    assert store.get(400, "CN", "schinese", groups=["tags"]) is None
+
+
+def test_keys_include_country_and_language(db, now):
+    store = StoreCache(db, TTLS)
+    store.put(400, "CN", "schinese", FULL)
+
+    assert store.get(400, "US", "schinese") is None
+    assert store.get(400, "CN", "english") is None
+
+
+def test_evict_keeps_most_recently_accessed(db, now):
+    store = StoreCache(db, TTLS, max_entries=2)
+    for appid in (1, 2, 3):
+        store.put(appid, "CN", "schinese", FULL)
+        now[0] += 1
+    store.get(1, "CN", "schinese")  # 最近访问过，不应被淘汰
+
+    store.evict()
+
+    assert store.get(1, "CN", "schinese") is not None
+    assert store.get(2, "CN", "schinese") is None
+    assert store.get(3, "CN", "schinese") is not None
+
+
+def test_disabled_cache_never_stores(db, now):
+    store = StoreCache(db, TTLS, enabled=False)
+    store.put(400, "CN", "schinese", FULL)
+
+    store.enabled = True
+    assert store.get(400, "CN", "schinese") is None
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""appdetails 解析，以及 StoreDataService 只向覆盖过期字段组的来源发请求"""
+
+import pytest
+import requests
+
+from cache import StoreCache
+from platforms import steam
+from store_data import AppDetailsProvider, StoreDataService, build_providers
+
+DAY = 86400
+TTLS = {"static": 30 * DAY, "media": 30 * DAY, "tags": 7 * DAY, "price": DAY, "review": DAY}
+
+APP_DETAILS = {
+    "620": {
+        "success": True,
+        "data": {
+            "name": "Portal 2",
+            "is_free": False,
+            "genres": [{"id": "25", "description": "冒险"}, {"id": "0", "description": ""}],
+            "developers": ["Valve"],
+            "publishers": ["Valve, Inc.", ""],
+            "release_date": {"coming_soon": False, "date": "2011 年 4 月 19 日"},
+            "short_description": "&quot;Portal 2&quot; 续写了前作的故事。 ",
+            "price_overview": {"final_formatted": "¥ 42.00"},
+        },
+    },
+}
+
+
+class JSONResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error")
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """替换 Steam API 请求，记录请求参数"""
+    calls = []
+    responses = {}
+
+    def fake_get(url, params):
+        calls.append(params)
+        return responses["next"]
+
+    monkeypatch.setattr(steam, "_steam_api_get", fake_get)
+    return calls, responses
+
+
+def test_app_details_are_mapped_to_store_fields(api):
+    calls, responses = api
+    responses["next"] = JSONResponse(APP_DETAILS)
+
+    data = steam.get_steam_app_details(620, country="US", language="english")
+
+    assert calls == [{"appids": 620, "cc": "US", "l": "english"}]
+    assert data == {
+        "game_name": "Portal 2",
+        "genres": ["冒险"],
+        "developers": ["Valve"],
+        "publishers": ["Valve_ Inc."],
+        "release_date": "2011 年 4 月 19 日",
+        "info": '"Portal 2" 续写了前作的故事。',
+        "price": "¥ 42.00",
+    }
+
+
+def test_free_games_and_missing_regions(api):
+    _, responses = api
+    free = {"620": {"success": True, "data": dict(APP_DETAILS["620"]["data"], is_free=True)}}
+    responses["next"] = JSONResponse(free)
+    assert steam.get_steam_app_details(620)["price"] == "免费开玩"
+
+    # 锁区或下架时 success 为 false
+    responses["next"] = JSONResponse({"620": {"success": False}})
+    assert steam.get_steam_app_details(620) is None
+
+
+def test_request_errors_raise_only_when_asked(api):
+    _, responses = api
+    responses["next"] = JSONResponse(None, status_code=503)
+
+    assert steam.get_steam_app_details(620) is None
+    with pytest.raises(requests.HTTPError):
+        steam.get_steam_app_details(620, raise_errors=True)
+
+
+def test_batch_prices_skip_entries_without_price(api):
+    calls, responses = api
+    responses["next"] = JSONResponse({
+        "620": {"success": True, "data": {"price_overview": {"final_formatted": "¥ 42.00"}}},
+        "440": {"success": True, "data": []},  # 免费游戏
+        "10": {"success": False},
+    })
+
+    assert steam.get_steam_prices([620, 440, 10]) == {620: "¥ 42.00"}
+    assert calls[0]["appids"] == "620,440,10"
+    assert calls[0]["filters"] == "price_overview"
+
+
+class RecordingProvider:
+    def __init__(self, name, groups, result):
+        self.name = name
+        self.groups = groups
+        self.result = result
+        self.calls = 0
+
+    def fetch(self, appid, country, language):
+        self.calls += 1
+        return dict(self.result) if self.result is not None else None
+
+
+def test_only_providers_covering_stale_groups_are_called(db):
+    details = RecordingProvider("appdetails", ("static", "price"), {"game_name": "Portal 2", "price": "¥ 42.00"})
+    page = RecordingProvider("html", ("tags", "review", "media"), {"tag": ["解谜"], "review": "好评如潮"})
+    service = StoreDataService(StoreCache(db, TTLS), [details, page])
+
+    data = service.get(620)
+    assert (details.calls, page.calls) == (1, 1)
+    assert (data["game_name"], data["tag"], data["price"]) == ("Portal 2", ["解谜"], "¥ 42.00")
+
+    # 缓存命中时不再请求
+    service.get(620)
+    assert (details.calls, page.calls) == (1, 1)
+
+    # 只请求标签时只需要页面来源
+    service.cache.ttls = dict(TTLS, tags=0)
+    assert service.get(620, groups=["static", "tags"])["tag"] == ["解谜"]
+    assert (details.calls, page.calls) == (1, 2)
+
+
+def test_missing_appdetails_leaves_groups_stale(db):
+    details = RecordingProvider("appdetails", ("static", "price"), None)
+    page = RecordingProvider("html", ("tags", "review", "media"), {"tag": ["解谜"]})
+    service = StoreDataService(StoreCache(db, TTLS), [details, page])
+
+    data, failure = service._get(620, "CN", "schinese", ["static", "tags"])
+
+    assert failure == "unavailable"
+    assert data["tag"] == ["解谜"]
+    assert service.cache.lookup(620, "CN", "schinese", ["static", "tags"])[1] == ["static"]
+
+
+def test_build_providers():
+    providers = build_providers("appdetails")
+    assert isinstance(providers[0], AppDetailsProvider)
+    assert set(providers[0].groups) | set(providers[1].groups) == set(TTLS)
+    assert [p.name for p in build_providers("html")] == ["html"]
+    with pytest.raises(ValueError):
+        build_providers("xml")
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""StoreStatusCache 的过期与退避、get_with_fallback 的地区回退"""
+
+import pytest
+import requests
+
+import cache as cache_module
+from cache import StoreCache, StoreStatusCache
+from store_data import StoreDataProvider, StoreDataService
+
+HOUR = 3600
+DAY = 86400
+GROUPS = ["static", "tags"]
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def status(db, clock):
+    return StoreStatusCache(db, region_ttl=30 * DAY, unavailable_ttl=7 * DAY, error_retry=HOUR)
+
+
+def test_error_backoff_doubles_and_is_capped(status, clock):
+    status.record_failure(10, "error")
+    clock.now += HOUR - 1
+    assert status.get(10)["failures"] == 1
+    clock.now += 2
+    assert status.get(10) is None
+
+    status.record_failure(10, "error")  # 第二次连续失败：2 小时
+    clock.now += 2 * HOUR - 1
+    assert status.get(10)["failures"] == 2
+    clock.now += 2
+    assert status.get(10) is None
+
+    for _ in range(10):
+        status.record_failure(10, "error")
+    clock.now += 7 * DAY - 1
+    assert status.get(10) is not None
+    clock.now += 2
+    assert status.get(10) is None
+
+
+def test_region_is_remembered_until_ttl_and_cleared_by_default_success(status, clock):
+    status.record_failure(20, "unavailable")
+    status.record_ok(20, "SG")
+    entry = status.get(20)
+    assert (entry["state"], entry["country"], entry["failures"]) == ("region", "SG", 0)
+
+    clock.now += 30 * DAY + 1
+    assert status.get(20) is None
+
+    status.record_ok(20, None)
+    assert status._row(20) is None
+
+
+def test_report_orders_by_consecutive_failures(status, clock):
+    status.record_failure(1, "agecheck")
+    for _ in range(3):
+        status.record_failure(2, "unavailable")
+        clock.now += DAY
+    status.record_ok(3, "SG")
+
+    report = status.report()
+
+    assert [entry["appid"] for entry in report] == [2, 1]
+    assert report[0]["first_failed_at"] == 1_700_000_000.0
+
+
+class RegionProvider(StoreDataProvider):
+    """按地区返回结果：dict 为数据，None 为该地区没有数据，异常类为请求失败"""
+
+    name = "fake"
+    groups = tuple(GROUPS)
+
+    def __init__(self, by_country):
+        self.by_country = by_country
+        self.calls = []
+
+    def fetch(self, appid, country, language):
+        self.calls.append(country)
+        result = self.by_country.get(country)
+        if isinstance(result, type) and issubclass(result, Exception):
+            raise result(f"{country} failed")
+        return result
+
+
+def _service(db, status, provider):
+    store_cache = StoreCache(db, {"static": DAY, "tags": DAY})
+    return StoreDataService(store_cache, [provider], status=status, fallback_countries=["SG", "US"]), store_cache
+
+
+def test_locked_default_region_falls_back_and_is_pinned(db, status):
+    provider = RegionProvider({"CN": None, "SG": {"game_name": "Locked", "tag": ["RPG"]}})
+    service, store_cache = _service(db, status, provider)
+
+    assert service.get_with_fallback(30, groups=GROUPS)["game_name"] == "Locked"
+    assert provider.calls == ["CN", "SG"]
+    assert status.get(30)["country"] == "SG"
+
+    store_cache.purge()
+    provider.calls.clear()
+    service.get_with_fallback(30, groups=GROUPS)
+    assert provider.calls == ["SG"]
+
+
+def test_transient_error_does_not_switch_region(db, status):
+    provider = RegionProvider({"CN": requests.ConnectionError, "SG": {"game_name": "Fine", "tag": ["RPG"]}})
+    service, _ = _service(db, status, provider)
+
+    service.get_with_fallback(40, groups=GROUPS)
+
+    assert provider.calls == ["CN"]
+    entry = status.get(40)
+    assert (entry["state"], entry["country"], entry["failures"]) == ("error", None, 1)
+
+
+def test_unavailable_everywhere_is_not_refetched(db, status):
+    provider = RegionProvider({})
+    service, _ = _service(db, status, provider)
+
+    service.get_with_fallback(50, groups=GROUPS)
+    assert provider.calls == ["CN", "SG", "US"]
+    assert status.get(50)["state"] == "unavailable"
+
+    provider.calls.clear()
+    assert service.get_with_fallback(50, groups=GROUPS)["game_name"] == ""
+    assert provider.calls == []
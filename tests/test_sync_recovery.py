@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""写入或拉取失败时保留运行日志、不推进同步状态，--resume 只重试失败的游戏"""
+
+import time
+
+import pytest
+import requests
+
+import notion_game_list as ngl
+import sync_plan
+from cache import StateStore
+from notion_index import GameLookup
+from platforms import steam
+from platforms.steam import parse_achievements_info
+from sync_journal import SyncJournal
+
+STEAM_GAMES = [
+    {"appid": 1, "name": "Alpha", "playtime_forever": 3475, "rtime_last_played": 1_700_000_100},
+    {"appid": 2, "name": "Beta", "playtime_forever": 120, "rtime_last_played": 1_700_000_200},
+]
+NOTION_PAGES = [
+    {"page_id": "page-1", "name": "Alpha", "platform": "Steam", "appid": 1, "playtime": 3445, "last_play": None},
+    {"page_id": "page-2", "name": "Beta", "platform": "Steam", "appid": 2, "playtime": 60, "last_play": None},
+]
+
+
+@pytest.fixture
+def sync_env(monkeypatch, db):
+    """Steam / Notion 替身：page-2 的第一次写入失败"""
+    state = StateStore(db)
+    journal = SyncJournal(db)
+    writes = []
+    failing = {"page-2"}
+
+    def update_game(acct, page_id, game, *args, **kwargs):
+        writes.append(page_id)
+        if page_id in failing:
+            failing.discard(page_id)
+            return False
+        return True
+
+    monkeypatch.setattr(ngl, "sync_state", state)
+    monkeypatch.setattr(ngl, "sync_journal", journal)
+    monkeypatch.setattr(sync_plan, "enable_item_update", True)
+    monkeypatch.setattr(ngl, "get_owned_games_from_steam", lambda *a, **k: [dict(g) for g in STEAM_GAMES])
+    monkeypatch.setattr(ngl.owned_games_cache, "enabled", False)
+    monkeypatch.setattr(ngl, "query_all_games_from_notion", lambda *a, **k: GameLookup(NOTION_PAGES))
+    monkeypatch.setattr(ngl, "_fetch_game_details", lambda acct, game, mode: (parse_achievements_info(None), {}))
+    monkeypatch.setattr(ngl, "build_update_diff",
+                        lambda acct, page_id, game, *a, **k: {"游戏时长": {"number": game["playtime_forever"]}})
+    monkeypatch.setattr(ngl, "update_game_in_notion", update_game)
+    return state, journal, writes
+
+
+def test_failed_write_keeps_journal_and_watermark(sync_env):
+    state, journal, writes = sync_env
+    acct = ngl.accounts[0]
+    watermark_key = ngl._state_key(acct, "last_played_watermark")
+
+    with pytest.raises(ngl.SyncIncompleteError):
+        ngl.sync_games_to_notion(acct)
+
+    assert sorted(writes) == ["page-1", "page-2"]
+    assert state.get(watermark_key) is None
+    run_id, resumed = journal.start(f"sync:{acct.account.steam_user_id}", resume=True)
+    assert resumed
+    stages = {appid: entry["stage"] for appid, entry in journal.entries(run_id).items()}
+    assert stages[1] == ngl.STAGE_DONE and stages[2] != ngl.STAGE_DONE
+
+
+def test_resume_retries_only_the_failed_game(sync_env):
+    state, journal, writes = sync_env
+    acct = ngl.accounts[0]
+
+    with pytest.raises(ngl.SyncIncompleteError):
+        ngl.sync_games_to_notion(acct)
+    writes.clear()
+
+    ngl.sync_games_to_notion(acct, resume=True)
+
+    assert writes == ["page-2"]
+    assert state.get(ngl._state_key(acct, "last_played_watermark")) == 1_700_000_200
+    # 成功结束后运行日志被清理
+    assert journal.start(f"sync:{acct.account.steam_user_id}", resume=True)[1] is False
+
+
+def test_failed_recent_games_fetch_keeps_sync_state(sync_env, monkeypatch):
+    state, journal, writes = sync_env
+    acct = ngl.accounts[0]
+    now = time.time()
+    monkeypatch.setattr(ngl, "FULL_RECONCILE_DAYS", 30)
+    state.set(ngl._state_key(acct, "last_full_sync"), int(now - 13 * 86400))
+    state.set(ngl._state_key(acct, "last_sync"), int(now - 13 * 86400))
+    state.set(ngl._state_key(acct, "last_played_watermark"), 1_700_000_000)
+    monkeypatch.setattr(ngl, "get_steam_recent_games", lambda *a, **k: None)
+    monkeypatch.setattr(ngl, "get_owned_games_from_steam", lambda *a, **k: pytest.fail("不应继续同步"))
+
+    ngl.sync_games_to_notion(acct, incremental=True)
+
+    assert writes == []
+    assert state.get(ngl._state_key(acct, "last_sync")) == int(now - 13 * 86400)
+    assert state.get(ngl._state_key(acct, "last_played_watermark")) == 1_700_000_000
+
+
+def test_recent_games_request_failure_returns_none(monkeypatch):
+    def failing_get(url, params):
+        raise requests.ConnectionError("connection reset")
+
+    monkeypatch.setattr(steam, "_steam_api_get", failing_get)
+    assert steam.get_steam_recent_games("key", "76561198000000000") is None